@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 import logging
@@ -7,7 +8,8 @@ from src.user_profile import profile_routes
 from src.jobs_matcher import jobs_matcher_routes
 from src.applied_jobs import applied_jobs_routes
 from src.jobs_processor import jobs_routes
-from src.dependencies.dependencies import es_client
+from src.metrics import metrics_routes
+from src.dependencies.dependencies import es_client, vector_index, invalidation_listener
 
 logging.basicConfig(
     level=logging.INFO,
@@ -16,11 +18,20 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    drift = await es_client.ensure_indices_exist()
+    if drift:
+        logger.warning(f"Outdated index mappings: {sorted(drift)}, run src.jobs_processor.index_mapping_migration --reindex")
+    await es_client.restore_disabled_refresh()
+    if vector_index and not vector_index.load():
+        await vector_index.refresh(es_client)
+    invalidation_listener.start()
+    yield
+    await invalidation_listener.stop()
+    await es_client.close()
 
-@app.on_event("startup")
-async def ensure_es_indices():
-    await es_client.ensure_indices_exist()
+app = FastAPI(lifespan=lifespan)
 
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
@@ -57,4 +68,5 @@ app.include_router(interview_routes.router)
 app.include_router(profile_routes.router)
 app.include_router(jobs_matcher_routes.router)
 app.include_router(applied_jobs_routes.router)
-app.include_router(jobs_routes.router)
\ No newline at end of file
+app.include_router(jobs_routes.router)
+app.include_router(metrics_routes.router)
\ No newline at end of file
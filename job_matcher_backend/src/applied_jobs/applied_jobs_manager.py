@@ -1,6 +1,7 @@
 # applied_jobs_handler.py
 from datetime import datetime, timezone
-from ..clients.es_client import ElasticsearchClient
+from typing import Optional
+from ..clients.es_client import ElasticsearchClient, APPLICATIONS_PAGE_SIZE, encode_cursor, decode_cursor, is_sort_values
 
 class AppliedJobsManager:
     """
@@ -10,10 +11,10 @@ class AppliedJobsManager:
         self.es = es_client
     
     async def save_application(self, user_id: str, job_id: str):
-        """Save a new job application for a user."""
-        if await self.is_applied_job(user_id, job_id):
-            raise ValueError("User has already applied to this job.")
-        
+        """
+        Save a new job application for a user.
+        The application ID is derived from (user_id, job_id), so a duplicate apply fails atomically.
+        """
         document = {
             "user_id": user_id,
             "job_id": job_id,
@@ -21,9 +22,21 @@ class AppliedJobsManager:
         }
         return await self.es.index_applied_job(document)
     
-    async def get_enriched_applications(self, user_id: str):
-        """Retrieve all applications for a user, enriched with job data.""" 
-        return await self.es.get_enriched_applications(user_id)
+    async def get_enriched_applications(self, user_id: str, page_size: int = APPLICATIONS_PAGE_SIZE, cursor: Optional[str] = None):
+        """
+        Retrieve a page of applications for a user, enriched with job data.
+        Returns the applications, the cursor of the next page (None on the last page)
+        and the IDs of stale applications to remove with `remove_stale_applications`.
+        """
+        # Applications are sorted by applied_date (epoch millis) and job_id
+        search_after = decode_cursor(cursor, lambda values: is_sort_values(values, (int, str))) if cursor else None
+        applications, next_search_after, stale_ids = await self.es.get_enriched_applications(user_id, page_size, search_after)
+        next_cursor = encode_cursor(next_search_after) if next_search_after else None
+        return applications, next_cursor, stale_ids
+
+    async def remove_stale_applications(self, user_id: str, application_ids: list):
+        """Delete applications whose job no longer exists."""
+        return await self.es.delete_applications(user_id, application_ids)
     
     async def delete_application(self, application_id: str, user_id: str):
         """Delete a user's job application."""
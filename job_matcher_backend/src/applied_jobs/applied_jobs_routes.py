@@ -1,11 +1,15 @@
-from fastapi import APIRouter, Depends
+from typing import Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, Query
 from fastapi.responses import JSONResponse
+from ..clients.es_client import APPLICATIONS_PAGE_SIZE
 from ..clients.firebase.verify_token import get_current_user
 from ..dependencies.dependencies import get_applied_jobs_manager
+from ..types.responses import ModelJSONResponse
 
 router = APIRouter(
     prefix="/applied_jobs",
     tags=["Applied Jobs"],
+    default_response_class=ModelJSONResponse,
     dependencies=[Depends(get_current_user)]
 )
 
@@ -27,16 +31,25 @@ async def apply_to_job(
     
 @router.get("")
 async def get_applied_jobs(
+    background_tasks: BackgroundTasks,
+    page_size: int = Query(APPLICATIONS_PAGE_SIZE, ge=1, le=100),
+    cursor: Optional[str] = None,
     user_id: str = Depends(get_current_user),
     applied_jobs_manager = Depends(get_applied_jobs_manager)
 ):
-    """Retrieve all job applications for the current user."""
+    """Retrieve a page of job applications for the current user, newest first."""
     try:
-        applications = await applied_jobs_manager.get_enriched_applications(user_id)
-        if not applications:
+        applications, next_cursor, stale_ids = await applied_jobs_manager.get_enriched_applications(user_id, page_size, cursor)
+        if stale_ids:
+            # Applications for deleted jobs are removed after the response is sent
+            background_tasks.add_task(applied_jobs_manager.remove_stale_applications, user_id, stale_ids)
+
+        if not applications and not next_cursor and not cursor:
             return JSONResponse(content={"error": "No applications found"}, status_code=404)
         
-        return {"applications": applications}
+        return ModelJSONResponse({"applications": applications, "next_cursor": next_cursor})
+    except ValueError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=400)
     except Exception as e:
         return JSONResponse(
             content={"error": str(e)},
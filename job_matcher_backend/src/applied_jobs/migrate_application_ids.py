@@ -0,0 +1,72 @@
+import logging
+import asyncio
+from elasticsearch.helpers import async_scan, async_bulk
+from ..clients.es_client import ElasticsearchClient, generate_application_id
+
+logging.basicConfig(level=logging.INFO)
+es_client = ElasticsearchClient()
+
+
+async def migrate_application_ids():
+    """
+    Re-key applications created with random IDs to the (user_id, job_id) hash.
+    Oldest applications are created first, so duplicates collapse into the earliest one.
+    An old document is only deleted once its re-keyed copy exists.
+    """
+    to_migrate = []
+    async for hit in async_scan(
+        es_client.client,
+        index="user_applied_jobs",
+        query={"query": {"match_all": {}}, "sort": [{"applied_date": {"order": "asc"}}]},
+        preserve_order=True
+    ):
+        source = hit["_source"]
+        new_id = generate_application_id(source["user_id"], source["job_id"])
+        if hit["_id"] != new_id:
+            to_migrate.append((hit["_id"], new_id, source))
+
+    if not to_migrate:
+        logging.info("✅ All applications already use deterministic IDs.")
+        return
+
+    # Create phase: a 409 means the re-keyed application already exists (duplicate apply)
+    _, errors = await async_bulk(
+        es_client.client,
+        (
+            {"_op_type": "create", "_index": "user_applied_jobs", "_id": new_id, "_source": source}
+            for _, new_id, source in to_migrate
+        ),
+        raise_on_error=False
+    )
+    failed_ids = {
+        error["create"]["_id"] for error in errors
+        if error.get("create", {}).get("status") != 409
+    }
+    for error in errors:
+        if error.get("create", {}).get("status") != 409:
+            logging.error(f"❌ Failed to re-key application: {error}")
+
+    # Delete phase: only for applications whose re-keyed copy exists
+    old_ids = [old_id for old_id, new_id, _ in to_migrate if new_id not in failed_ids]
+    deleted, delete_errors = await async_bulk(
+        es_client.client,
+        ({"_op_type": "delete", "_index": "user_applied_jobs", "_id": old_id} for old_id in old_ids),
+        raise_on_error=False
+    )
+    for error in delete_errors:
+        logging.error(f"❌ Failed to delete old application: {error}")
+
+    logging.info(
+        f"✅ Re-keyed {len(old_ids)} applications ({len(errors) - len(failed_ids)} duplicates merged), "
+        f"{len(failed_ids)} failed, {deleted} old documents deleted."
+    )
+
+
+async def main():
+    try:
+        await migrate_application_ids()
+    finally:
+        await es_client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import os
+
+EMBEDDING_BATCH_MAX_TOKENS = int(os.getenv("EMBEDDING_BATCH_MAX_TOKENS", "200000"))
+EMBEDDING_BATCH_MAX_ITEMS = int(os.getenv("EMBEDDING_BATCH_MAX_ITEMS", "256"))
+EMBEDDING_BATCH_WAIT = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "50")) / 1000
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Upper estimate of the tokens of a text. Tokens average about 4 bytes of UTF-8 in English and
+    a bit less in Romanian, so counting 3 bytes per token keeps batches under the API limit.
+    """
+    return len(text.encode("utf-8")) // 3 + 1
+
+
+class EmbeddingBatcher:
+    """
+    Collects the texts concurrent workers want embedded and sends them to the embeddings API as
+    list inputs. A batch is sent once it reaches `max_items` texts, once the next text would take it
+    over `max_tokens`, or `max_wait` seconds after its first text arrived. Each caller gets its own
+    vector back, or the error of the request its batch was part of.
+    """
+    def __init__(self, embedding_client, max_tokens: int = EMBEDDING_BATCH_MAX_TOKENS,
+                 max_items: int = EMBEDDING_BATCH_MAX_ITEMS, max_wait: float = EMBEDDING_BATCH_WAIT):
+        self.embedding_client = embedding_client
+        self.max_tokens = max_tokens
+        self.max_items = max_items
+        self.max_wait = max_wait
+
+        self._pending = []
+        self._pending_tokens = 0
+        self._timer = None
+        self._requests = set()
+
+        self.batches = 0
+        self.items = 0
+        self.tokens = 0
+
+    async def embed(self, text: str) -> list[float]:
+        """Return the embedding of `text`, sent along with the texts of other callers."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        tokens = estimate_tokens(text)
+
+        if self._pending and self._pending_tokens + tokens > self.max_tokens:
+            self._flush()
+        self._pending.append((text, future))
+        self._pending_tokens += tokens
+        if len(self._pending) >= self.max_items or self._pending_tokens >= self.max_tokens:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, tokens = self._pending, self._pending_tokens
+        self._pending, self._pending_tokens = [], 0
+
+        request = asyncio.ensure_future(self._send(batch, tokens))
+        self._requests.add(request)
+        request.add_done_callback(self._requests.discard)
+
+    async def _send(self, batch: list, tokens: int):
+        self.batches += 1
+        self.items += len(batch)
+        self.tokens += tokens
+        try:
+            response = await self.embedding_client.create([text for text, _ in batch])
+            for item in response.data:
+                future = batch[item.index][1]
+                if not future.done():
+                    future.set_result(item.embedding)
+            missing = [future for _, future in batch if not future.done()]
+            if missing:
+                logging.error(f"❌ Embedding batch of {len(batch)} texts returned {len(response.data)} vectors")
+                for future in missing:
+                    future.set_exception(RuntimeError(
+                        f"Embedding response of {len(response.data)} vectors lacks this text of a batch of {len(batch)}"
+                    ))
+        except Exception as e:
+            logging.error(f"❌ Embedding batch of {len(batch)} texts failed: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+    async def close(self):
+        """Send what is still pending and wait for the requests in flight."""
+        self._flush()
+        if self._requests:
+            await asyncio.gather(*self._requests, return_exceptions=True)
+        logging.info(f"Embedding batcher stats: {self.stats()}")
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "estimated_tokens": self.tokens,
+            "items_per_batch": self.items / self.batches if self.batches else 0.0
+        }
@@ -0,0 +1,165 @@
+import asyncio
+import json
+import logging
+from elasticsearch import AsyncElasticsearch
+from elasticsearch.helpers import async_streaming_bulk
+
+BULK_CHUNK_SIZE = 100
+BULK_MAX_CHUNK_BYTES = 10 * 1024 * 1024
+BULK_FLUSH_INTERVAL = 2.0
+
+
+class BulkWriter:
+    """
+    Buffers index operations and sends them through the bulk API, flushing when the buffer
+    reaches `chunk_size` documents or `max_chunk_bytes`, or every `flush_interval` seconds.
+    Used as an async context manager: the index refresh is switched off for the duration
+    of the run and each backing index gets its own interval back afterwards, with an optional
+    force merge at the end. A run that dies in between leaves refresh off; the next writer
+    and `restore_disabled_refresh` at startup turn it back on.
+    Every `index` call returns a future that resolves once its document is written,
+    or fails with the per-document error reported by Elasticsearch.
+    """
+    def __init__(self, client: AsyncElasticsearch, index: str, chunk_size: int = BULK_CHUNK_SIZE,
+                 max_chunk_bytes: int = BULK_MAX_CHUNK_BYTES, flush_interval: float = BULK_FLUSH_INTERVAL,
+                 disable_refresh: bool = True, force_merge: bool = False):
+        self.client = client
+        self.index_name = index
+        self.chunk_size = chunk_size
+        self.max_chunk_bytes = max_chunk_bytes
+        self.flush_interval = flush_interval
+        self.disable_refresh = disable_refresh
+        self.force_merge = force_merge
+
+        self.indexed = 0
+        self.failed = 0
+
+        self._buffer = []
+        self._buffer_bytes = 0
+        self._lock = asyncio.Lock()
+        self._closed = asyncio.Event()
+        self._flusher = None
+        # Backing index -> refresh interval before the run, None for the index default
+        self._previous_refresh_intervals = {}
+
+    async def __aenter__(self):
+        if self.disable_refresh:
+            intervals = await refresh_intervals(self.client, self.index_name)
+            for index, interval in intervals.items():
+                if interval == "-1":
+                    # Only a writer disables refresh, so this one was left by a run that did not finish
+                    logging.warning(f"⚠️ Refresh of {index} was left disabled by an earlier run, restoring the default.")
+                    intervals[index] = None
+            self._previous_refresh_intervals = intervals
+            await self.client.indices.put_settings(index=self.index_name, settings={"index": {"refresh_interval": "-1"}})
+        self._flusher = asyncio.create_task(self._flush_periodically())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._closed.set()
+        await self._flusher
+        try:
+            await self.flush()
+        finally:
+            try:
+                if self.disable_refresh:
+                    await self._restore_refresh_intervals()
+            finally:
+                await self.client.indices.refresh(index=self.index_name)
+        if self.force_merge:
+            await self.client.options(request_timeout=None, retry_on_timeout=False).indices.forcemerge(
+                index=self.index_name, max_num_segments=1
+            )
+        logging.info(f"Bulk writer for {self.index_name}: {self.indexed} indexed, {self.failed} failed")
+
+    async def _restore_refresh_intervals(self):
+        """Put back each backing index's interval; indices created during the run already have the default."""
+        by_interval = {}
+        for index, interval in self._previous_refresh_intervals.items():
+            by_interval.setdefault(interval, []).append(index)
+        for interval, indices in by_interval.items():
+            # None resets the setting to the index default
+            await self.client.indices.put_settings(
+                index=",".join(indices),
+                settings={"index": {"refresh_interval": interval}}
+            )
+
+    async def index(self, doc_id: str, document: dict, index: str = None) -> asyncio.Future:
+        """
+        Queue a document for indexing and return a future for its result.
+        `index` overrides the target index, e.g. a partition behind the writer's alias.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._buffer.append(({"_index": index or self.index_name, "_id": doc_id, "_source": document}, future))
+        self._buffer_bytes += len(json.dumps(document))
+        if len(self._buffer) >= self.chunk_size or self._buffer_bytes >= self.max_chunk_bytes:
+            await self.flush()
+        return future
+
+    async def flush(self):
+        """Send everything buffered so far in a single bulk request."""
+        async with self._lock:
+            pending, self._buffer, self._buffer_bytes = self._buffer, [], 0
+            if not pending:
+                return
+
+            futures = {}
+            for action, future in pending:
+                futures.setdefault(action["_id"], []).append(future)
+            try:
+                # Retried documents can come back out of order, so results are matched by _id
+                async for ok, item in async_streaming_bulk(
+                    self.client,
+                    [action for action, _ in pending],
+                    chunk_size=len(pending),
+                    max_chunk_bytes=self.max_chunk_bytes * 2,
+                    raise_on_error=False,
+                    raise_on_exception=False,
+                    max_retries=2
+                ):
+                    result = next(iter(item.values()))
+                    self._resolve(futures[result["_id"]].pop(0), ok, result)
+            except Exception as e:
+                for remaining in futures.values():
+                    for future in remaining:
+                        self.failed += 1
+                        future.set_exception(e)
+
+    def _resolve(self, future: asyncio.Future, ok: bool, result: dict):
+        if ok:
+            self.indexed += 1
+            future.set_result(result["_id"])
+        else:
+            self.failed += 1
+            future.set_exception(RuntimeError(f"Bulk indexing failed for {result['_id']}: {result.get('error')}"))
+
+    async def _flush_periodically(self):
+        while not self._closed.is_set():
+            try:
+                await asyncio.wait_for(self._closed.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                try:
+                    await self.flush()
+                except Exception as e:
+                    logging.error(f"❌ Periodic bulk flush failed: {e}")
+
+
+async def refresh_intervals(client: AsyncElasticsearch, index: str) -> dict:
+    """Refresh interval of every index behind `index`, None where it is the index default."""
+    settings = await client.indices.get_settings(index=index, name="index.refresh_interval")
+    return {
+        name: index_settings.get("settings", {}).get("index", {}).get("refresh_interval")
+        for name, index_settings in settings.items()
+    }
+
+
+async def restore_disabled_refresh(client: AsyncElasticsearch, index: str) -> list[str]:
+    """
+    Turn refresh back on for the indices behind `index` a bulk writer left it disabled on,
+    e.g. after the process running it was killed. Returns the indices that were restored.
+    """
+    disabled = sorted(name for name, interval in (await refresh_intervals(client, index)).items() if interval == "-1")
+    if disabled:
+        await client.indices.put_settings(index=",".join(disabled), settings={"index": {"refresh_interval": None}})
+        logging.warning(f"⚠️ Restored the refresh of {disabled}, left disabled by an interrupted bulk run.")
+    return disabled
@@ -1,56 +1,179 @@
 from elasticsearch import AsyncElasticsearch
-from elasticsearch.exceptions import NotFoundError
+from elasticsearch.exceptions import NotFoundError, ConflictError, BadRequestError
+from elasticsearch.helpers import async_scan, async_bulk
+import asyncio
+import logging
 import os
-import uuid
+import base64
+import hashlib
+import json
+import math
+import re
+import time
+from datetime import datetime, timezone
 from typing import Optional
 from ..types.types import *
-import numpy as np
-import heapq
+from ..scoring.vector_scoring import rank_by_cosine
+from .es_bulk_writer import BulkWriter, restore_disabled_refresh
+from .es_connection import create_es_client, pool_stats
+from .match_context_cache import MatchContext, MatchContextCache
+from .single_flight import single_flight
+
+KNN_RECALL_TARGET = float(os.getenv("KNN_RECALL_TARGET", "0.95"))
+KNN_MIN_CANDIDATES = 100
+KNN_MAX_CANDIDATES = 10000
+
+JOBS_VECTOR_INDEX_TYPE = os.getenv("JOBS_VECTOR_INDEX_TYPE", "hnsw")
+# Quantization types in the order Elasticsearch allows an in-place mapping update
+VECTOR_INDEX_TYPES = ["hnsw", "int8_hnsw", "int4_hnsw", "bbq_hnsw"]
+KNN_RESCORE_OVERSAMPLE = float(os.getenv("KNN_RESCORE_OVERSAMPLE", "0"))
+
+# Jobs are stored in one index per expiration month ("jobs-2025.06") behind the "jobs" read alias
+JOBS_ALIAS = "jobs"
+JOBS_PARTITION_PREFIX = "jobs-"
+JOBS_UNDATED_PARTITION = "jobs-undated"
+JOBS_PARTITION_PATTERN = re.compile(r"jobs-\d{4}\.\d{2}(\.v[0-9a-f]+)?")
+
+# Reindexed copies are named "<name>.v<mapping version>" and kept behind an alias with the original name
+MAPPING_VERSION_SUFFIX = re.compile(r"\.v[0-9a-f]+$")
+
+APPLICATIONS_PAGE_SIZE = 50
+# Applied job IDs are read in pages of the default max_result_window
+APPLIED_JOB_IDS_PAGE_SIZE = 10000
+APPLICATIONS_CASCADE_BATCH = 10000
+
+# Posting IDs resolved per terms query when checking which postings are already indexed
+SITE_ID_CHECK_BATCH = 1000
+
+TASK_POLL_INTERVAL = 5.0
+
+KEYWORD_RANKING_MODE = os.getenv("KEYWORD_RANKING_MODE", "rescore")
+KEYWORD_SEARCH_SIZE = 15
+KEYWORD_RERANK_WINDOW = 100
+KEYWORD_PIT_KEEP_ALIVE = "1m"
+
+SUGGEST_SIZE = 5
+# Job title prefixes are indexed as edge n-grams, so a typed prefix is a plain term lookup
+JOB_TITLE_PREFIX_MAX_GRAM = 20
+JOB_TITLE_SUBFIELDS = ("job_title.prefix", "job_title.suggest")
+# Until every partition has the job title subfields, their mapping is checked again this often (seconds)
+JOB_TITLE_SUBFIELDS_CHECK_INTERVAL = 60
+
+def encode_cursor(values) -> str:
+    """Encode pagination state (e.g. `search_after` sort values) as an opaque URL-safe cursor."""
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(",", ":")).encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str, valid=None):
+    """
+    Decode a cursor produced by `encode_cursor`, raising ValueError if it is malformed
+    or if `valid`, a check of the decoded values, rejects them.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid pagination cursor")
+    if valid is not None and not valid(values):
+        raise ValueError("Invalid pagination cursor")
+    return values
+
+def is_sort_values(values, types: tuple) -> bool:
+    """Whether `values` is a list of sort values of the given types, e.g. `((int, float), str)`."""
+    return isinstance(values, list) and len(values) == len(types) and all(
+        isinstance(value, kind) and not isinstance(value, bool) for value, kind in zip(values, types)
+    )
+
+def mapping_version(mappings: dict) -> str:
+    """Short content hash of a mapping, stamped in the index `_meta` to detect outdated indices."""
+    properties = {key: value for key, value in mappings.items() if key != "_meta"}
+    return hashlib.sha256(json.dumps(properties, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+def with_mapping_version(mappings: dict) -> dict:
+    """Return the mapping with its version stamped in `_meta`."""
+    return {**mappings, "_meta": {"mapping_version": mapping_version(mappings)}}
+
+def mapping_drift(expected: dict, actual: dict, path: str = "") -> list[str]:
+    """
+    List the settings of the expected mapping that the live one lacks or sets differently,
+    e.g. `properties.embedding.index_options.type: hnsw -> int8_hnsw`.
+    Fields the live mapping has on top (dynamic ones, defaults Elasticsearch fills in) are not drift.
+    """
+    changes = []
+    for key, value in expected.items():
+        if key == "_meta":
+            continue
+        if key not in actual:
+            changes.append(f"{path}{key}: missing")
+        elif isinstance(value, dict) and isinstance(actual[key], dict):
+            changes.extend(mapping_drift(value, actual[key], f"{path}{key}."))
+        elif actual[key] != value:
+            changes.append(f"{path}{key}: {actual[key]} -> {value}")
+    return changes
+
+def generate_application_id(user_id: str, job_id: str) -> str:
+    """Create a stable application ID for a (user_id, job_id) pair."""
+    return hashlib.sha256(f"{user_id}|{job_id}".encode("utf-8")).hexdigest()
 
 class ElasticsearchClient:
     """
     Client for interacting with Elasticsearch to manage user profiles, jobs, applications,
     and perform job matching and search operations.
     """
-    def __init__(self):
-        self.client = AsyncElasticsearch(
-            os.getenv('ELASTICSEARCH_URL'),
-        )
+    def __init__(self, client: Optional[AsyncElasticsearch] = None):
+        self.client = client or create_es_client()
+        self.match_context_cache = MatchContextCache()
+        self._jobs_partitioned = None
+        self._job_title_subfields = None
+        self._job_title_subfields_checked_at = None
+
+    def pool_stats(self) -> dict:
+        """Connection pool utilization of the underlying client."""
+        return pool_stats(self.client)
+
+    async def close(self):
+        """Close the connection pool, logging how it was used."""
+        logging.info(f"Closing Elasticsearch client, pool stats: {self.pool_stats()}")
+        await self.client.close()
     
-    async def ensure_indices_exist(self):
-        """Ensure all required indices exist with correct mappings."""
+    async def ensure_indices_exist(self, reindex: bool = False) -> dict:
+        """
+        Create the missing indices and check the existing ones against the expected mappings, all concurrently.
+        Returns the drift found per index; with `reindex`, drifted indices are rebuilt behind an alias.
+        """
+        checks = [self.ensure_jobs_partitions(reindex=reindex)] + [
+            self._ensure_index(index, body, reindex) for index, body in self.index_definitions().items()
+        ]
+        drift = {}
+        for report in await asyncio.gather(*checks):
+            drift.update(report)
+        return drift
+
+    @staticmethod
+    def index_definitions() -> dict:
+        """Settings and version-stamped mappings of every index besides the jobs partitions."""
         indices = {
-            "jobs": {
+            "scraper_metadata": {
                 "mappings": {
                     "properties": {
-                        "company": {"type": "keyword"},
-                        "date_uploaded": {"type": "date", "format": "strict_date_optional_time"},
-                        "description": {"type": "text"},
-                        "embedding": {
-                            "type": "dense_vector",
-                            "dims": 1536,
-                            "index": True,
-                            "similarity": "cosine",
-                            "index_options": {"type": "hnsw", "m": 32, "ef_construction": 100}
-                        },
-                        "expiration_date": {"type": "date", "format": "yyyy-MM-dd"},
-                        "job_title": {"type": "text"},
-                        "job_url": {"type": "keyword"},
-                        "location": {
-                            "properties": {
-                                "city": {"type": "keyword"},
-                                "country": {"type": "keyword"}
-                            }
-                        },
-                        "site_id": {"type": "keyword"}
+                        "creation_date": {"type": "date"},
+                        "id": {"type": "long"},
+                        "version": {"type": "long"},
+                        "facets": {
+                            "type": "object",
+                            "enabled": False
+                        }
                     }
                 }
             },
-            "scraper_metadata": {
+            "invalidation_events": {
                 "mappings": {
                     "properties": {
-                        "creation_date": {"type": "date"},
-                        "id": {"type": "long"}
+                        "created_at": {"type": "date"},
+                        "payload": {
+                            "type": "object",
+                            "enabled": False
+                        },
+                        "type": {"type": "keyword"},
+                        "version": {"type": "long"}
                     }
                 }
             },
@@ -81,13 +204,312 @@ class ElasticsearchClient:
                         "user_id": {"type": "keyword"}
                     }
                 }
+            },
+            "user_recommendations": {
+                "mappings": {
+                    "properties": {
+                        "generated_at": {"type": "date"},
+                        "jobs": {
+                            "type": "object",
+                            "enabled": False
+                        },
+                        "profile_seq_no": {"type": "long"},
+                        "user_id": {"type": "keyword"}
+                    }
+                }
+            }
+        }
+
+        return {index: {**body, "mappings": with_mapping_version(body["mappings"])} for index, body in indices.items()}
+
+    async def _ensure_index(self, index: str, body: dict, reindex: bool) -> dict:
+        """Create an index, or check the mapping of the existing one."""
+        try:
+            live = await self.client.indices.get_mapping(index=index)
+        except NotFoundError:
+            await self._create_index(index, body)
+            return {}
+        return await self._check_mappings(live, body, reindex, lambda concrete: (index, []))
+
+    async def _create_index(self, index: str, body: dict):
+        """Create an index, tolerating another replica creating it at the same time."""
+        try:
+            await self.client.indices.create(index=index, **body)
+        except BadRequestError as e:
+            if e.error != "resource_already_exists_exception":
+                raise
+
+    async def _check_mappings(self, live: dict, body: dict, reindex: bool, aliases_for) -> dict:
+        """
+        Compare live index mappings with the expected one. Indices whose mapping only lacks the
+        version stamp are stamped in place; the others are reported and, with `reindex`, rebuilt
+        behind the alias and extra aliases `aliases_for(index)` returns.
+        """
+        expected = body["mappings"]
+        drift = {}
+        for index, response in live.items():
+            mappings = response["mappings"]
+            if mappings.get("_meta", {}).get("mapping_version") == expected["_meta"]["mapping_version"]:
+                continue
+            changes = mapping_drift(expected, mappings)
+            if not changes:
+                await self.client.indices.put_mapping(index=index, meta=expected["_meta"])
+                continue
+            logging.warning(f"⚠️ Mapping of {index} is outdated: {changes}")
+            drift[index] = changes
+            if reindex:
+                alias, extra_aliases = aliases_for(index)
+                await self.reindex_behind_alias(index, alias, body, extra_aliases)
+        return drift
+
+    async def reindex_behind_alias(self, index: str, alias: str, body: dict, extra_aliases: list[str] = ()) -> str:
+        """
+        Rebuild `index` with a new mapping into `<alias>.v<mapping version>` and move `alias` onto it atomically.
+        Stored documents are copied as they are, embeddings included, so nothing is embedded again.
+        A second pass under a write block copies what changed during the first one; reads never stop,
+        writes are rejected only for that pass.
+        A copy left by an earlier run that failed before moving the alias is reused, and the copy resumes
+        where it stopped, since documents already copied with the same version are skipped.
+        """
+        target = f"{alias}.v{body['mappings']['_meta']['mapping_version']}"
+        await self._create_index(target, body)
+        if extra_aliases:
+            # Index templates may already have added the copy to a read alias, where it would duplicate results
+            await self.client.indices.update_aliases(actions=[
+                {"remove": {"index": target, "aliases": list(extra_aliases), "must_exist": False}}
+            ])
+
+        await self._copy_documents(index, target)
+        await self.client.indices.put_settings(index=index, settings={"index.blocks.write": True})
+        try:
+            await self._copy_documents(index, target)
+            await self.client.indices.update_aliases(actions=[
+                {"add": {"index": target, "aliases": [alias, *extra_aliases]}},
+                {"remove_index": {"index": index}}
+            ])
+        except Exception:
+            await self.client.indices.put_settings(index=index, settings={"index.blocks.write": False})
+            raise
+        logging.info(f"✅ Reindexed {index} into {target} behind {[alias, *extra_aliases]}")
+        return target
+
+    async def _copy_documents(self, source: str, dest: str):
+        """
+        Copy documents with their versions as a sliced background task. Documents already copied
+        with the same version are skipped, so a repeated pass only copies what changed.
+        """
+        task = await self.client.reindex(
+            source={"index": source},
+            dest={"index": dest, "version_type": "external"},
+            conflicts="proceed",
+            slices="auto",
+            refresh=True,
+            wait_for_completion=False
+        )
+        response = await self.wait_for_task(task["task"])
+        if response.get("failures"):
+            raise RuntimeError(f"Failed to copy {source} into {dest}: {response['failures'][:5]}")
+
+    @classmethod
+    def jobs_mapping(cls, index_type: str = JOBS_VECTOR_INDEX_TYPE) -> dict:
+        """Mapping of a jobs partition."""
+        return {
+            "properties": {
+                "company": {"type": "keyword"},
+                "date_uploaded": {"type": "date", "format": "strict_date_optional_time"},
+                "description": {"type": "text"},
+                "embedding": cls.jobs_embedding_mapping(index_type),
+                "expiration_date": {"type": "date", "format": "yyyy-MM-dd"},
+                "job_title": {
+                    "type": "text",
+                    "fields": {
+                        "prefix": {"type": "text", "analyzer": "job_title_prefix", "search_analyzer": "job_title_search"},
+                        "suggest": {"type": "completion"}
+                    }
+                },
+                "job_url": {"type": "keyword"},
+                "location": {
+                    "properties": {
+                        "city": {"type": "keyword"},
+                        "country": {"type": "keyword"}
+                    }
+                },
+                "site_id": {"type": "keyword"}
+            }
+        }
+
+    @staticmethod
+    def jobs_settings() -> dict:
+        """Settings of a jobs partition: the analyzer indexing job title prefixes."""
+        return {
+            "analysis": {
+                "filter": {
+                    "job_title_prefix": {"type": "edge_ngram", "min_gram": 1, "max_gram": JOB_TITLE_PREFIX_MAX_GRAM},
+                    # Longer query terms are cut to the longest indexed prefix instead of matching nothing
+                    "job_title_truncate": {"type": "truncate", "length": JOB_TITLE_PREFIX_MAX_GRAM}
+                },
+                "analyzer": {
+                    "job_title_prefix": {
+                        "type": "custom",
+                        "tokenizer": "standard",
+                        "filter": ["lowercase", "asciifolding", "job_title_prefix"]
+                    },
+                    "job_title_search": {
+                        "type": "custom",
+                        "tokenizer": "standard",
+                        "filter": ["lowercase", "asciifolding", "job_title_truncate"]
+                    }
+                }
             }
         }
 
-        for index, body in indices.items():
-            exists = await self.client.indices.exists(index=index)
-            if not exists:
-                await self.client.indices.create(index=index, **body)
+    @classmethod
+    def jobs_index_template(cls, index_type: str = JOBS_VECTOR_INDEX_TYPE, with_alias: bool = True) -> dict:
+        """Index template applied to every jobs partition, adding it to the read alias on creation."""
+        template = {"settings": cls.jobs_settings(), "mappings": with_mapping_version(cls.jobs_mapping(index_type))}
+        if with_alias:
+            template["aliases"] = {JOBS_ALIAS: {}}
+        return {"index_patterns": [f"{JOBS_PARTITION_PREFIX}*"], "priority": 100, "template": template}
+
+    async def ensure_jobs_partitions(self, reindex: bool = False) -> dict:
+        """
+        Install the jobs partition template and make sure the read alias exists,
+        by creating the current month's partition on a fresh cluster.
+        Existing partitions are checked against the template mapping, and with `reindex` the drifted
+        ones are rebuilt behind their partition name and the read alias; partitions created from now
+        on get the new mapping either way.
+        A legacy single `jobs` index is only reported until `jobs_partition_migration` runs.
+        """
+        template = self.jobs_index_template()
+        await self.client.indices.put_index_template(name=JOBS_ALIAS, **template)
+        if not await self.client.indices.exists(index=JOBS_ALIAS):
+            await self.create_jobs_partition(self.jobs_partition(datetime.now(timezone.utc).strftime("%Y-%m-%d")))
+            return {}
+
+        partitioned = await self.jobs_partitioned()
+        live = await self.client.indices.get_mapping(index=JOBS_ALIAS)
+        drift = await self._check_mappings(
+            live,
+            {key: value for key, value in template["template"].items() if key != "aliases"},
+            reindex and partitioned,
+            lambda partition: (MAPPING_VERSION_SUFFIX.sub("", partition), [JOBS_ALIAS])
+        )
+        if drift and reindex and not partitioned:
+            logging.warning("⚠️ The legacy jobs index gets the new mapping through jobs_partition_migration.")
+        return drift
+
+    @staticmethod
+    def jobs_partition(expiration_date: Optional[str]) -> str:
+        """Partition holding the jobs that expire in the month of `expiration_date` (yyyy-MM-dd)."""
+        if not expiration_date:
+            return JOBS_UNDATED_PARTITION
+        return f"{JOBS_PARTITION_PREFIX}{expiration_date[:4]}.{expiration_date[5:7]}"
+
+    async def jobs_partitioned(self) -> bool:
+        """Whether `jobs` is the partitions' read alias rather than a legacy single index."""
+        if self._jobs_partitioned is None:
+            self._jobs_partitioned = bool(await self.client.indices.exists_alias(name=JOBS_ALIAS))
+        return self._jobs_partitioned
+
+    async def job_title_subfields(self) -> bool:
+        """
+        Whether every jobs index maps the `job_title` prefix and suggest subfields. Indices created before
+        they were added lack them until `index_mapping_migration --reindex` runs, and searches fall back
+        to phrase prefix queries on `job_title` meanwhile. A missing mapping is checked again every minute.
+        """
+        if self._job_title_subfields or (
+            self._job_title_subfields_checked_at is not None
+            and time.monotonic() - self._job_title_subfields_checked_at < JOB_TITLE_SUBFIELDS_CHECK_INTERVAL
+        ):
+            return bool(self._job_title_subfields)
+        mappings = await self.client.indices.get_field_mapping(index=JOBS_ALIAS, fields=list(JOB_TITLE_SUBFIELDS))
+        self._job_title_subfields = bool(mappings) and all(
+            set(JOB_TITLE_SUBFIELDS) <= set(index["mappings"]) for index in mappings.values()
+        )
+        self._job_title_subfields_checked_at = time.monotonic()
+        if not self._job_title_subfields:
+            logging.warning("⚠️ Jobs indices lack the job_title subfields, run index_mapping_migration --reindex")
+        return self._job_title_subfields
+
+    async def create_jobs_partition(self, partition: str):
+        """Create a jobs partition from the template, unless it exists, e.g. created by a concurrent ingestion run."""
+        await self._create_index(partition, {})
+
+    async def jobs_write_index(self, expiration_date: Optional[str]) -> str:
+        """Index a job document is written to: its partition, or the legacy `jobs` index before the migration."""
+        return self.jobs_partition(expiration_date) if await self.jobs_partitioned() else JOBS_ALIAS
+
+    async def expired_job_partitions(self, today: str) -> list[str]:
+        """
+        Return the partitions of the months before `today`'s; every job in them has expired.
+        The current month's partition is created first so dropping them never leaves the read alias empty.
+        """
+        current = self.jobs_partition(today)
+        await self.create_jobs_partition(current)
+        aliases = await self.client.indices.get_alias(name=JOBS_ALIAS)
+        return sorted(index for index in aliases if JOBS_PARTITION_PATTERN.fullmatch(index) and index < current)
+
+    async def drop_job_partitions(self, partitions: list[str]):
+        """Delete whole jobs partitions."""
+        if partitions:
+            await self.client.indices.delete(index=",".join(partitions))
+
+    @staticmethod
+    def jobs_embedding_mapping(index_type: str = JOBS_VECTOR_INDEX_TYPE) -> dict:
+        """Mapping of the jobs `embedding` field for the given HNSW quantization type."""
+        if index_type not in VECTOR_INDEX_TYPES:
+            raise ValueError(f"Unsupported vector index type: {index_type}")
+        return {
+            "type": "dense_vector",
+            "dims": 1536,
+            "index": True,
+            "similarity": "cosine",
+            "index_options": {"type": index_type, "m": 32, "ef_construction": 100}
+        }
+
+    async def migrate_jobs_vector_index_type(self, index_type: str, force_merge: bool = True):
+        """
+        Switch the jobs `embedding` field to another quantization type in place.
+        Elasticsearch only allows moving towards stronger quantization
+        (hnsw -> int8_hnsw -> int4_hnsw -> bbq_hnsw); new segments use the new format,
+        and a force merge rewrites the existing ones.
+        The float vectors are kept, so a downgrade can be done by reindexing.
+        The partition template is installed from `JOBS_VECTOR_INDEX_TYPE` at every ingestion run,
+        so the variable must already name the target type or the partitions would drift back.
+        """
+        if index_type != JOBS_VECTOR_INDEX_TYPE:
+            raise ValueError(
+                f"Set JOBS_VECTOR_INDEX_TYPE={index_type} before migrating, it is {JOBS_VECTOR_INDEX_TYPE}."
+            )
+        mapping = await self.client.indices.get_mapping(index=JOBS_ALIAS)
+        current = {
+            index: response["mappings"]["properties"]["embedding"]["index_options"]["type"]
+            for index, response in mapping.items()
+        }
+        stronger = sorted(
+            index for index, kind in current.items()
+            if VECTOR_INDEX_TYPES.index(kind) > VECTOR_INDEX_TYPES.index(index_type)
+        )
+        if stronger:
+            raise ValueError(f"Cannot migrate jobs embeddings of {stronger} to {index_type} in place, reindex instead.")
+        pending = sorted(index for index, kind in current.items() if kind != index_type)
+        if not pending:
+            return index_type
+
+        template = self.jobs_index_template(index_type)
+        await self.client.indices.put_mapping(
+            index=",".join(pending),
+            properties={"embedding": self.jobs_embedding_mapping(index_type)}
+        )
+        if await self.client.indices.exists_alias(name=JOBS_ALIAS):
+            # Partitions created from now on get the new type too
+            await self.client.indices.put_index_template(name=JOBS_ALIAS, **template)
+        if force_merge:
+            # A force merge runs for minutes on a large index, so it is neither timed out nor retried
+            await self.client.options(request_timeout=None, retry_on_timeout=False).indices.forcemerge(
+                index=",".join(pending), max_num_segments=1
+            )
+        return index_type
 
     # -------------------------------
     #     User Profile handling
@@ -95,11 +517,15 @@ class ElasticsearchClient:
 
     async def index_user_profile(self, user_id: str, document: dict):
         """Index or update a user profile document."""
-        return await self.client.index(
+        response = await self.client.index(
             index="user_profiles",
             id=user_id,
             document=document
         )
+        self.match_context_cache.invalidate(user_id)
+        # Recommendations computed for the old profile are stale; matching falls back to live KNN
+        await self.client.options(ignore_status=404).delete(index="user_recommendations", id=user_id)
+        return response
     
     async def search_user_profile(self, user_id: str):
         """Retrieve a user profile by user ID."""
@@ -114,13 +540,84 @@ class ElasticsearchClient:
             raise RuntimeError(f"Error retrieving user profile: {str(e)}")
         
     async def get_user_embedding(self, user_id: str):
-        """Get the embedding vector from a user's profile."""
+        """Get the embedding vector from a user's profile, without the rest of the profile."""
         if not user_id:
             return None
-        profile = await self.search_user_profile(user_id)
-        if not profile:
+        try:
+            result = await self.client.get(index="user_profiles", id=user_id, _source_includes=["embedding"])
+            return result["_source"].get("embedding")
+        except NotFoundError:
             return None
-        return profile.get("embedding")
+        except Exception as e:
+            raise RuntimeError(f"Error retrieving user embedding: {str(e)}")
+
+    async def get_user_embedding_version(self, user_id: str) -> tuple[Optional[list], Optional[int]]:
+        """Get the embedding of a user's profile and the sequence number of the profile document."""
+        try:
+            result = await self.client.get(index="user_profiles", id=user_id, _source_includes=["embedding"])
+            return result["_source"].get("embedding"), result.get("_seq_no")
+        except NotFoundError:
+            return None, None
+        except Exception as e:
+            raise RuntimeError(f"Error retrieving user embedding: {str(e)}")
+
+    async def get_match_context(self, user_id: str) -> Optional[MatchContext]:
+        """
+        Return the user's embedding and applied job IDs, served from the in-process cache
+        when possible. Returns None if the user has no profile embedding.
+        """
+        if not user_id:
+            return None
+        context = self.match_context_cache.get(user_id)
+        if context:
+            return context
+
+        generation = self.match_context_cache.generation(user_id)
+        (embedding, profile_seq_no), applied_job_ids = await asyncio.gather(
+            self.get_user_embedding_version(user_id),
+            self.get_user_applied_job_ids(user_id)
+        )
+        if not embedding:
+            return None
+        context = MatchContext(embedding, applied_job_ids, profile_seq_no)
+        self.match_context_cache.put(user_id, context, generation)
+        return context
+
+    async def scan_user_embeddings(self):
+        """
+        Iterate over every user profile with an embedding, yielding (user_id, embedding, seq_no)
+        triples, where seq_no is the sequence number of the profile document.
+        """
+        async for hit in async_scan(
+            self.client,
+            index="user_profiles",
+            query={"query": {"exists": {"field": "embedding"}}},
+            _source=["embedding"],
+            seq_no_primary_term=True,
+            size=1000
+        ):
+            yield hit["_id"], hit["_source"]["embedding"], hit["_seq_no"]
+
+    # -------------------------------
+    #     User Recommendations handling
+    # -------------------------------
+
+    async def get_user_recommendations(self, user_id: str) -> Optional[tuple[list[dict], Optional[int]]]:
+        """
+        Return the precomputed recommendations of a user, best match first, each a MatchedJob
+        dict with the job's `expiration_date`, and the sequence number of the profile document
+        they were computed from. Returns None if none were computed.
+        """
+        if not user_id:
+            return None
+        try:
+            result = await self.client.get(index="user_recommendations", id=user_id,
+                                           _source_includes=["jobs", "profile_seq_no"])
+            return result["_source"].get("jobs", []), result["_source"].get("profile_seq_no")
+        except NotFoundError:
+            return None
+        except Exception as e:
+            raise RuntimeError(f"Error retrieving user recommendations: {str(e)}")
     
 
     # -------------------------------
@@ -128,24 +625,46 @@ class ElasticsearchClient:
     # -------------------------------
     
     async def index_job(self, job_id, job_data):
-        """Index or update a job document."""
+        """Index or update a job document in its expiration month partition."""
         return await self.client.index(
-            index="jobs",
+            index=await self.jobs_write_index(job_data.get("expiration_date")),
             id=job_id,
             document=job_data
         )
     
+    def bulk_writer(self, index: str = "jobs", force_merge: bool = False, **kwargs) -> BulkWriter:
+        """Return a bulk writer for ingestion runs, to be used as `async with es_client.bulk_writer() as writer`."""
+        return BulkWriter(self.client, index, force_merge=force_merge, **kwargs)
+
+    async def restore_disabled_refresh(self) -> list[str]:
+        """
+        Turn refresh back on for the indices bulk writers write to, where a run that was killed left it off.
+        A run still in progress only loses its refresh savings.
+        """
+        restored = await asyncio.gather(*(
+            restore_disabled_refresh(self.client, index) for index in (JOBS_ALIAS, "user_recommendations")
+        ))
+        return [index for indices in restored for index in indices]
+
+    @single_flight("es.get_job")
     async def get_job(self, job_id: str)-> Optional[FullJob]:
         """Retrieve a job by ID, excluding its embedding."""
         try:
-            result = await self.client.get(index="jobs", id=job_id, _source_excludes=["embedding"])
-            result["_source"]["id"] = job_id
-            return FullJob.model_validate(result["_source"])
-        except NotFoundError:
-            return None
+            # A get by ID is not possible through an alias over several partitions, an ids query is
+            response = await self.client.search(
+                index="jobs",
+                query={"ids": {"values": [job_id]}},
+                _source_excludes=["embedding"],
+                size=1
+            )
+            hits = response.get("hits", {}).get("hits", [])
+            if not hits:
+                return None
+            return FullJob.from_source(job_id, hits[0]["_source"])
         except Exception as e:
             raise RuntimeError(f"Error retrieving job: {str(e)}")
         
+    @single_flight("es.get_jobs_batch")
     async def get_jobs_batch(self, job_ids: list)-> list[BaseJob]:
         """Get multiple jobs in a single query"""
         if not job_ids:
@@ -163,218 +682,558 @@ class ElasticsearchClient:
         )
 
         hits = response.get("hits", {}).get("hits", [])
-        jobs = []
-        for hit in hits:
-            job_data = {
-                "id": hit["_id"],
-                **hit["_source"]
-            }
-            jobs.append(BaseJob.model_validate(job_data))
-
-        return jobs
+        return [BaseJob.from_source(hit["_id"], hit["_source"]) for hit in hits]
     
-    async def get_jobs_countries(self):
-        """Return a list of all distinct countries from job postings."""
+    async def scan_jobs(self, source_fields: list, with_versions: bool = False):
+        """
+        Iterate over every job in the index, yielding (job_id, source) pairs.
+        With `with_versions` the triples (job_id, source, version) are yielded instead, where
+        the version of a job changes whenever its document is written again.
+        """
+        async for hit in async_scan(
+            self.client,
+            index="jobs",
+            query={"query": {"match_all": {}}},
+            _source=source_fields,
+            size=1000,
+            version=with_versions
+        ):
+            if with_versions:
+                # _version restarts at 1 in another index, e.g. when a job moves partition
+                yield hit["_id"], hit["_source"], f"{hit['_index']}/{hit['_version']}"
+            else:
+                yield hit["_id"], hit["_source"]
+
+    async def get_indexed_site_ids(self, site_ids: list) -> set:
+        """
+        Return the posting IDs among `site_ids` that are already indexed, resolving up to
+        `SITE_ID_CHECK_BATCH` of them per terms query without fetching any job.
+        """
+        indexed = set()
+        for start in range(0, len(site_ids), SITE_ID_CHECK_BATCH):
+            batch = [str(site_id) for site_id in site_ids[start:start + SITE_ID_CHECK_BATCH]]
+            response = await self.client.search(
+                index="jobs",
+                query={"terms": {"site_id": batch}},
+                aggs={"site_ids": {"terms": {"field": "site_id", "size": len(batch)}}},
+                size=0
+            )
+            indexed.update(bucket["key"] for bucket in response["aggregations"]["site_ids"]["buckets"])
+        return {site_id for site_id in site_ids if str(site_id) in indexed}
+
+    async def scan_job_ids(self, index: str = "jobs", query: dict = None) -> list[str]:
+        """Return the IDs of the jobs matching a query, without their documents."""
+        return [
+            hit["_id"] async for hit in async_scan(
+                self.client,
+                index=index,
+                query={"query": query or {"match_all": {}}},
+                _source=False,
+                size=5000
+            )
+        ]
+
+    async def delete_jobs_by_query(self, index: str, query: dict) -> dict:
+        """
+        Delete the jobs matching a query as a background task split into automatic slices,
+        polling the task until it completes instead of holding a request open.
+        Raises RuntimeError if some of the jobs could not be deleted.
+        """
+        task = await self.client.delete_by_query(
+            index=index,
+            query=query,
+            slices="auto",
+            conflicts="proceed",
+            refresh=True,
+            wait_for_completion=False
+        )
+        response = await self.wait_for_task(task["task"])
+        if response.get("failures"):
+            raise RuntimeError(f"Failed to delete jobs from {index}: {response['failures'][:5]}")
+        return response
+
+    async def wait_for_task(self, task_id: str, poll_interval: float = TASK_POLL_INTERVAL) -> dict:
+        """Poll a background task until it completes and return its response."""
+        while True:
+            task = await self.client.tasks.get(task_id=task_id)
+            if task.get("completed"):
+                if task.get("error"):
+                    raise RuntimeError(f"Task {task_id} failed: {task['error']}")
+                return task.get("response", {})
+            status = task.get("task", {}).get("status", {})
+            processed = sum(status.get(key, 0) for key in ("created", "updated", "deleted", "version_conflicts"))
+            logging.info(f"Task {task_id}: {processed}/{status.get('total', 0)} processed")
+            await asyncio.sleep(poll_interval)
+
+    async def get_job_embeddings(self, job_ids: list) -> dict:
+        """Return a mapping of job ID to embedding for the given jobs."""
+        if not job_ids:
+            return {}
         response = await self.client.search(
             index="jobs",
-            size=0,
-            aggs={
-                "distinct_countries": {
-                    "terms": {
-                        "field": "location.country",
-                        "size": 1000
-                    }
-                }
-            }
+            query={"ids": {"values": job_ids}},
+            _source=["embedding"],
+            size=len(job_ids)
         )
-        countries = [bucket['key'] for bucket in response['aggregations']['distinct_countries']['buckets']]
-        return countries
+        return {
+            hit["_id"]: hit["_source"]["embedding"]
+            for hit in response["hits"]["hits"]
+            if "embedding" in hit["_source"]
+        }
 
-    async def get_jobs_cities(self, country: str):
-        """Return a list of all distinct cities for a given country."""
+    async def build_location_facets(self) -> list[dict]:
+        """Build the country -> cities facet tree with job counts from a single aggregation."""
         response = await self.client.search(
             index="jobs",
             size=0,
-            query={"term": {"location.country": country}},
             aggs={
-                "distinct_cities": {
-                    "terms": {
-                        "field": "location.city",
-                        "size": 1000
+                "countries": {
+                    "terms": {"field": "location.country", "size": 1000},
+                    "aggs": {
+                        "cities": {"terms": {"field": "location.city", "size": 1000}}
                     }
                 }
             }
         )
-        cities = [bucket['key'] for bucket in response['aggregations']['distinct_cities']['buckets']]
-        return cities
-    
+        return [
+            {
+                "country": country["key"],
+                "count": country["doc_count"],
+                "cities": [
+                    {"city": city["key"], "count": city["doc_count"]}
+                    for city in country["cities"]["buckets"]
+                ]
+            }
+            for country in response["aggregations"]["countries"]["buckets"]
+        ]
+
+    async def store_location_facets(self) -> dict:
+        """Materialize the location facets as a new version of the `location_facets` metadata document."""
+        document = {
+            "version": time.time_ns(),
+            "creation_date": datetime.now(timezone.utc).isoformat(),
+            "facets": await self.build_location_facets()
+        }
+        await self.update_metadata("location_facets", document)
+        return document
+
+    async def get_location_facets_version(self) -> Optional[int]:
+        """Return the version of the materialized location facets, without the facets themselves."""
+        try:
+            response = await self.client.get(index="scraper_metadata", id="location_facets", _source_includes=["version"])
+            return response["_source"].get("version")
+        except NotFoundError:
+            return None
+
 
     # -------------------------------
     #     Applied Jobs handling 
     # -------------------------------
 
     async def index_applied_job(self, document: dict):
-        """Index a new applied job for a user."""
-        return await self.client.index(
-            index="user_applied_jobs",
-            id=str(uuid.uuid4()),
-            document=document
-        )
+        """
+        Create a new applied job for a user, keyed by (user_id, job_id).
+        Raises ValueError if the user already applied to the job.
+        """
+        try:
+            return await self.client.index(
+                index="user_applied_jobs",
+                id=generate_application_id(document["user_id"], document["job_id"]),
+                document=document,
+                op_type="create"
+            )
+        except ConflictError:
+            raise ValueError("User has already applied to this job.")
+        finally:
+            self.match_context_cache.invalidate(document["user_id"])
     
     async def delete_applied_job(self, application_id: str, user_id: str):
         """Delete an applied job if the user is authorized."""
         if not await self.verify_application_ownership(application_id, user_id):
             raise ValueError("Not authorized to delete this application")
-        return await self.client.delete(
+        response = await self.client.delete(
             index="user_applied_jobs",
             id=application_id
         )
+        self.match_context_cache.invalidate(user_id)
+        return response
     
     async def is_applied_job(self, user_id: str, job_id: str):
         """Check if a user has applied for a specific job"""
-        response = await self.client.search(
+        response = await self.client.exists(
             index="user_applied_jobs",
-            body={
-                "query": {
-                    "bool": {
-                        "must": [
-                            {"term": {"user_id": user_id}},
-                            {"term": {"job_id": job_id}},
-                        ]
-                    }
-                }
-            }
+            id=generate_application_id(user_id, job_id)
         )
-        return response["hits"]["total"]["value"] > 0
+        return bool(response)
 
-    async def get_user_applications(self, user_id: str):
-        """Retrieve applications sorted by applied_date"""
+    async def get_user_applications(self, user_id: str, size: int = 1000, search_after: Optional[list] = None):
+        """
+        Retrieve applications sorted by applied_date.
+        `job_id` breaks ties so `search_after` pages are stable.
+        """
+        body = {
+            "query": {
+                "bool": {
+                    "must": [
+                        {"term": {"user_id": user_id}}
+                    ]
+                }
+            },
+            "size": size,
+            "_source": ["job_id", "applied_date"],
+            "sort": [
+                {"applied_date": {"order": "desc"}},
+                {"job_id": {"order": "asc"}}
+            ]
+        }
+        if search_after:
+            body["search_after"] = search_after
         return await self.client.search(
             index="user_applied_jobs",
-            body={
-                "query": {
-                    "bool": {
-                        "must": [
-                            {"term": {"user_id": user_id}}
-                        ]
-                    }
-                },
-                "size": 1000,
-                "_source": ["job_id", "applied_date"],
-                "sort": [
-                    {"applied_date": {"order": "desc"}}
-                ]
-            }
+            body=body
         )
     
+    async def get_user_applied_job_ids(self, user_id: str) -> list[str]:
+        """Return the IDs of all jobs the user has applied to, paging with `search_after` past the result window."""
+        job_ids = []
+        search_after = None
+        while True:
+            response = await self.get_user_applications(user_id, size=APPLIED_JOB_IDS_PAGE_SIZE, search_after=search_after)
+            hits = response["hits"]["hits"]
+            job_ids.extend(hit["_source"]["job_id"] for hit in hits)
+            if len(hits) < APPLIED_JOB_IDS_PAGE_SIZE:
+                return job_ids
+            search_after = hits[-1]["sort"]
+
+    async def scan_applied_job_ids(self):
+        """Iterate over every application, yielding (user_id, job_id) pairs."""
+        async for hit in async_scan(
+            self.client,
+            index="user_applied_jobs",
+            query={"query": {"match_all": {}}},
+            _source=["user_id", "job_id"],
+            size=1000
+        ):
+            yield hit["_source"]["user_id"], hit["_source"]["job_id"]
+
     async def verify_application_ownership(self, application_id: str, user_id: str):
         """Check if a given application belongs to the user."""
         response = await self.client.get(index="user_applied_jobs", id=application_id)
         return response['_source']['user_id'] == user_id
     
-    async def get_enriched_applications(self, user_id: str) -> list[AppliedJob]:
-        """Return user's applications with job data, removing stale applications."""
-        applications = await self.get_user_applications(user_id)
+    async def get_enriched_applications(self, user_id: str, page_size: int = APPLICATIONS_PAGE_SIZE,
+                                        search_after: Optional[list] = None):
+        """
+        Return one page of the user's applications with job data.
+        Returns the applications, the `search_after` values for the next page (None on the last page)
+        and the IDs of stale applications whose job was deleted, left to the caller to remove.
+        """
+        applications = await self.get_user_applications(user_id, size=page_size, search_after=search_after)
+        hits = applications.get("hits", {}).get("hits", [])
+        next_search_after = hits[-1]["sort"] if len(hits) == page_size else None
+
         apps = [{
             "application_id": hit["_id"],
             **hit["_source"]
-        } for hit in applications.get("hits", {}).get("hits", [])]
+        } for hit in hits]
 
         if not apps:
-            return []
+            return [], None, []
 
         # Get job data for all applications
         job_ids = [app["job_id"] for app in apps]
         job_list = await self.get_jobs_batch(job_ids)
         job_map = {job.id: job for job in job_list}
 
-        # Update statuses and prepare results
+        # Prepare results, collecting applications whose job was deleted
         results = []
+        stale_application_ids = []
         for app in apps:
             job = job_map.get(app["job_id"])
             if not job:
-                # If job is not found(it was deleted), delete the application
-                await self.delete_applied_job(app["application_id"], user_id)
+                stale_application_ids.append(app["application_id"])
             else:
-                # Add job data to AppliedJob model result
-                applied_job = AppliedJob.model_validate({
-                    **job.model_dump(),
-                    "application_id": app["application_id"],
-                    "applied_date": app["applied_date"],
-                })
+                # The job fields were validated by get_jobs_batch and the application ones are
+                # written by index_applied_job, so the model is built without validating them again
+                applied_job = AppliedJob.model_construct(
+                    **dict(job),
+                    application_id=app["application_id"],
+                    applied_date=app["applied_date"]
+                )
                 results.append(applied_job)
 
-        return results
-    
+        return results, next_search_after, stale_application_ids
+
+    async def delete_applications(self, user_id: str, application_ids: list):
+        """Delete several of a user's applications in one request, ignoring IDs owned by other users."""
+        if not application_ids:
+            return None
+        response = await self.client.delete_by_query(
+            index="user_applied_jobs",
+            query={
+                "bool": {
+                    "filter": [
+                        {"term": {"user_id": user_id}},
+                        {"ids": {"values": application_ids}}
+                    ]
+                }
+            },
+            conflicts="proceed"
+        )
+        self.match_context_cache.invalidate(user_id)
+        return response
+
+    async def delete_applications_for_jobs(self, job_ids: list) -> list[str]:
+        """
+        Delete every application pointing at one of the given (removed) jobs with bulk requests.
+        Returns the IDs of the users whose applications were deleted.
+        """
+        user_ids = set()
+        actions = []
+        for start in range(0, len(job_ids), APPLICATIONS_CASCADE_BATCH):
+            async for hit in async_scan(
+                self.client,
+                index="user_applied_jobs",
+                query={"query": {"terms": {"job_id": job_ids[start:start + APPLICATIONS_CASCADE_BATCH]}}},
+                _source=["user_id"],
+                size=5000
+            ):
+                user_ids.add(hit["_source"]["user_id"])
+                actions.append({"_op_type": "delete", "_index": "user_applied_jobs", "_id": hit["_id"]})
+
+        if actions:
+            deleted, errors = await async_bulk(self.client, actions, raise_on_error=False)
+            for error in errors:
+                if error.get("delete", {}).get("status") != 404:
+                    logging.error(f"❌ Failed to delete orphaned application: {error}")
+            logging.info(f"Deleted {deleted} orphaned applications of {len(user_ids)} users.")
+        for user_id in user_ids:
+            self.match_context_cache.invalidate(user_id)
+        return sorted(user_ids)
+
 
     # -------------------------------
     #   Job Match KNN handling
     # -------------------------------
     
-    async def search_jobs_by_embedding(self, embedding, k=15, exclude_job_ids: list = None) -> list[MatchedJob]:
+    async def search_jobs_by_embedding(self, embedding, k=15, exclude_job_ids: list = None, filtered: bool = True,
+                                       rescore_oversample: float = KNN_RESCORE_OVERSAMPLE,
+                                       model: type[MatchedJob] = MatchedJob) -> list[MatchedJob]:
         """
         KNN Search for jobs most similar to a given user profile embedding,
         excluding the jobs the user has already applied to.
+        By default the exclusion runs inside the knn clause as a filter, so the response
+        size stays k no matter how many jobs the user has applied to.
+        Set `filtered=False` to over-fetch and drop applied jobs afterwards.
+        A `rescore_oversample` above 1 fetches that many times more knn results
+        and reorders them by exact cosine similarity on the float vectors.
+        `model` is the MatchedJob subclass to return, its fields decide the `_source` fetched.
         """
-        fetch_size = k + (len(exclude_job_ids) if exclude_job_ids else 0)
-        
-        exclude_job_ids = set(exclude_job_ids) if exclude_job_ids else set()
+        exclude_job_ids = list(set(exclude_job_ids)) if exclude_job_ids else []
 
-        source_fields = [f for f in MatchedJob.model_fields if f not in ("id", "score")]
+        source_fields = [f for f in model.model_fields if f not in ("id", "score")]
 
-        query_body = {
-            "knn": {
-                "field": "embedding",
-                "query_vector": embedding,
-                "k": fetch_size,
-                "num_candidates": 100
-            },
+        fetch_size = k if filtered else k + len(exclude_job_ids)
+        # With quantized vectors, oversample the knn results and rescore them at full precision
+        rescore_window = math.ceil(fetch_size * rescore_oversample) if rescore_oversample > 1 else 0
+        knn_k = max(fetch_size, rescore_window)
+        knn = {
+            "field": "embedding",
+            "query_vector": embedding,
+            "k": knn_k,
+            "num_candidates": self.knn_num_candidates(knn_k)
+        }
+        if filtered and exclude_job_ids:
+            knn["filter"] = {"bool": {"must_not": [{"ids": {"values": exclude_job_ids}}]}}
+
+        body = {
+            "knn": knn,
             "_source": source_fields,
             "size": fetch_size
         }
+        if rescore_window:
+            body["rescore"] = self.exact_cosine_rescore(embedding, rescore_window)
 
         response = await self.client.search(
             index="jobs",
-            body=query_body
+            body=body
         )
 
         hits = response.get("hits", {}).get("hits", [])
 
+        excluded = set(exclude_job_ids)
         matched_jobs = []
         for hit in hits:
-            if hit["_id"] in exclude_job_ids:
+            if hit["_id"] in excluded:
                 continue
-            source = hit["_source"]
-            matched_job = MatchedJob.model_validate({
-                "id": hit["_id"],
-                "score": hit.get("_score", 0),
-                **source
-            })
-            matched_jobs.append(matched_job)
+            matched_jobs.append(model.from_source(hit["_id"], hit["_source"], score=hit.get("_score") or 0.0))
             if len(matched_jobs) == k:
                 break
 
         return matched_jobs
-    
+
+    @staticmethod
+    def knn_num_candidates(k: int, recall_target: float = KNN_RECALL_TARGET) -> int:
+        """
+        Size the per-shard HNSW candidate list from k and a recall target.
+        Higher targets explore more candidates per result, within [100, 10000].
+        """
+        oversample = 1.0 / max(1.0 - recall_target, 0.01)
+        # Rounded first so float noise (1 / (1 - 0.9) = 10.000000000000002) does not add a candidate
+        num_candidates = max(KNN_MIN_CANDIDATES, math.ceil(round(k * oversample, 6)))
+        return max(k, min(num_candidates, KNN_MAX_CANDIDATES))
+
+    @staticmethod
+    def exact_cosine_rescore(query_vector: list, window_size: int) -> dict:
+        """
+        Rescore clause that replaces the score of the top `window_size` hits with the exact
+        cosine similarity, on the same (1 + cosine) / 2 scale as the knn score.
+        """
+        return {
+            "window_size": window_size,
+            "query": {
+                "rescore_query": {
+                    "script_score": {
+                        "query": {"match_all": {}},
+                        "script": {
+                            "source": "doc['embedding'].size() == 0 ? 0 : (cosineSimilarity(params.query_vector, 'embedding') + 1.0) / 2.0",
+                            "params": {"query_vector": query_vector}
+                        }
+                    }
+                },
+                "query_weight": 0,
+                "rescore_query_weight": 1
+            }
+        }
+
     # -------------------------------
     #     Job Search handling
     # -------------------------------
-    async def search_jobs_by_keyword_with_similarity(self, request: SearchRequest, user_id: str) -> list[BaseJob]:
+    async def search_jobs_by_keyword_with_similarity(self, request: SearchRequest, user_id: str,
+                                                     ranking: str = KEYWORD_RANKING_MODE,
+                                                     page_size: int = KEYWORD_SEARCH_SIZE,
+                                                     cursor: Optional[str] = None) -> tuple[list[BaseJob], Optional[str]]:
         """
         Search jobs by keyword and location,
         ranking by similarity to user's embedding if available.
+        The similarity ranking runs inside Elasticsearch ("rescore" or "knn"), so only the final
+        slim documents are returned; "client" pulls the candidate embeddings and ranks them here.
+        Returns one page of jobs and the cursor of the next page (None on the last page).
+        """
+        state = decode_cursor(cursor, self._is_keyword_cursor) if cursor else {}
+
+        context = await self.get_match_context(user_id)
+        user_embedding = context.embedding.tolist() if context else None
+        if not user_embedding or "pit" in state:
+            return await self._search_keyword_page(request, page_size, state)
+        return await self._search_ranked_page(request, user_embedding, ranking, page_size, state.get("offset", 0))
+
+    @staticmethod
+    def _is_keyword_cursor(state) -> bool:
+        """Whether a decoded keyword search cursor has one of the shapes the pages below produce."""
+        if not isinstance(state, dict):
+            return False
+        if "pit" not in state:
+            return set(state) == {"offset"} and is_sort_values([state["offset"]], (int,)) and state["offset"] >= 0
+        if state["pit"] is None:
+            return set(state) == {"pit", "from"} and is_sort_values([state["from"]], (int,)) and state["from"] >= 0
+        return (
+            set(state) == {"pit", "search_after"} and isinstance(state["pit"], str)
+            and is_sort_values(state["search_after"], ((int, float), int))
+        )
+
+    async def _search_keyword_page(self, request: SearchRequest, page_size: int, state: dict):
+        """
+        Page through keyword matches. The first page is a plain search; a point in time is opened
+        only when the second page is asked for, and the pages after it use `search_after` on it,
+        so they neither repeat earlier hits nor see jobs indexed in between.
+        Searches nobody pages through, like search-as-you-type, never hold a point in time open.
+        """
+        body = self.build_keyword_search_body(request, size=page_size, title_prefix=await self.job_title_subfields())
+        if "pit" not in state:
+            response = await self.client.search(index="jobs", body=body)
+            hits = response.get("hits", {}).get("hits", [])
+            next_cursor = encode_cursor({"pit": None, "from": len(hits)}) if len(hits) == page_size else None
+            return [BaseJob.from_source(hit["_id"], hit["_source"]) for hit in hits], next_cursor
+
+        pit_id = state["pit"]
+        if pit_id is None:
+            pit = await self.client.open_point_in_time(index="jobs", keep_alive=KEYWORD_PIT_KEEP_ALIVE)
+            pit_id = pit["id"]
+            body["from"] = state["from"]
+        else:
+            body["search_after"] = state["search_after"]
+        body["pit"] = {"id": pit_id, "keep_alive": KEYWORD_PIT_KEEP_ALIVE}
+        body["sort"] = [{"_score": {"order": "desc"}}, {"_shard_doc": {"order": "asc"}}]
+
+        try:
+            response = await self.client.search(body=body)
+        except NotFoundError:
+            raise ValueError("Pagination cursor expired")
+
+        hits = response.get("hits", {}).get("hits", [])
+        pit_id = response.get("pit_id", pit_id)
+        if len(hits) < page_size:
+            await self.client.options(ignore_status=404).close_point_in_time(id=pit_id)
+            next_cursor = None
+        else:
+            next_cursor = encode_cursor({"pit": pit_id, "search_after": hits[-1]["sort"]})
+
+        return [BaseJob.from_source(hit["_id"], hit["_source"]) for hit in hits], next_cursor
+
+    async def _search_ranked_page(self, request: SearchRequest, user_embedding: list, ranking: str,
+                                  page_size: int, offset: int):
+        """
+        Page through the similarity-ranked keyword matches. Pages are slices of the fixed
+        rerank window, so every page costs the same as the first and the window, not the page
+        depth, bounds the candidates Elasticsearch ranks.
+        """
+        if offset >= KEYWORD_RERANK_WINDOW:
+            return [], None
+        size = min(page_size, KEYWORD_RERANK_WINDOW - offset)
+        body = self.build_keyword_search_body(request, user_embedding, ranking, size=size, offset=offset,
+                                              title_prefix=await self.job_title_subfields())
+
+        response = await self.client.search(index="jobs", body=body)
+
+        hits = response.get("hits", {}).get("hits", [])
+        if ranking == "client":
+            hits = self._rank_hits_by_similarity(hits, user_embedding, k=offset + size)[offset:]
+
+        end = offset + len(hits)
+        next_cursor = encode_cursor({"offset": end}) if len(hits) == size and end < KEYWORD_RERANK_WINDOW else None
+        return [BaseJob.from_source(hit["_id"], hit["_source"]) for hit in hits], next_cursor
+
+    def build_keyword_search_body(self, request: SearchRequest, user_embedding: Optional[list] = None,
+                                  ranking: str = KEYWORD_RANKING_MODE, size: int = KEYWORD_SEARCH_SIZE,
+                                  offset: int = 0, title_prefix: bool = True) -> dict:
+        """
+        Build the search body for a keyword search, with the similarity ranking mode applied.
+        `offset` pages inside the rerank window and is ignored by "client", which ranks the whole window.
+        Without `title_prefix`, for indices that lack the `job_title.prefix` subfield, the query is
+        a phrase prefix query on `job_title`.
         """
         must_clauses = []
         filter_clauses = []
 
         if request.query and request.query.strip():
-            must_clauses.append({
-                "match_phrase_prefix": {
-                    "job_title": {
-                        "query": request.query
+            if title_prefix:
+                must_clauses.append({
+                    "match": {
+                        "job_title.prefix": {
+                            "query": request.query,
+                            "operator": "and"
+                        }
                     }
-                }
-            })
+                })
+            else:
+                must_clauses.append({
+                    "match_phrase_prefix": {
+                        "job_title": {
+                            "query": request.query
+                        }
+                    }
+                })
 
         if request.location:
             if request.location.city:
@@ -389,51 +1248,143 @@ class ElasticsearchClient:
             }
         }
 
-        user_embedding = await self.get_user_embedding(user_id)
-
         source_fields = [f for f in BaseJob.model_fields.keys() if f != "id"]
-        if user_embedding:
-            source_fields.append("embedding")
 
+        if not user_embedding:
+            # No embedding: return keyword matches only
+            return {"query": query_body, "_source": source_fields, "size": size}
+
+        if ranking == "client":
+            return {"query": query_body, "_source": source_fields + ["embedding"], "size": KEYWORD_RERANK_WINDOW}
+
+        if ranking == "knn":
+            # Rank every keyword/location match by similarity, using the bool query as the knn filter.
+            # k is the whole window so every page slices the same ranking
+            return {
+                "knn": {
+                    "field": "embedding",
+                    "query_vector": user_embedding,
+                    "k": KEYWORD_RERANK_WINDOW,
+                    "num_candidates": self.knn_num_candidates(KEYWORD_RERANK_WINDOW),
+                    "filter": query_body
+                },
+                "_source": source_fields,
+                "from": offset,
+                "size": size
+            }
+
+        # Rescore the top keyword matches by exact cosine similarity, ignoring the keyword score
+        return {
+            "query": query_body,
+            "_source": source_fields,
+            "from": offset,
+            "size": size,
+            "rescore": self.exact_cosine_rescore(user_embedding, KEYWORD_RERANK_WINDOW)
+        }
+
+    @staticmethod
+    def _rank_hits_by_similarity(hits: list, user_embedding: list, k: int = KEYWORD_SEARCH_SIZE) -> list:
+        """Rank hits carrying their embedding in `_source` by cosine similarity to the user's embedding."""
+        indices, _ = rank_by_cosine(
+            user_embedding,
+            [hit["_source"]["embedding"] for hit in hits],
+            k
+        )
+        return [hits[i] for i in indices]
+
+    @single_flight("es.suggest_job_titles")
+    async def suggest_job_titles(self, prefix: str, size: int = SUGGEST_SIZE) -> list[str]:
+        """
+        Return distinct job titles starting with `prefix`, from the completion suggester alone.
+        Indices without the `job_title.suggest` subfield are searched with a phrase prefix query instead.
+        """
+        if not prefix.strip():
+            return []
+        if not await self.job_title_subfields():
+            return await self._suggest_job_titles_by_phrase_prefix(prefix, size)
         response = await self.client.search(
             index="jobs",
-            size=100,
-            query=query_body,
-            _source=source_fields
+            suggest={
+                "job_titles": {
+                    "prefix": prefix,
+                    "completion": {"field": "job_title.suggest", "size": size, "skip_duplicates": True}
+                }
+            },
+            _source=False,
+            size=0
         )
+        return [option["text"] for option in response["suggest"]["job_titles"][0]["options"]]
 
-        hits = response.get("hits", {}).get("hits", [])
-        if not hits:
-            return []
-        
-        if not user_embedding:
-            # No embedding: return keyword matches only
-            return [BaseJob(id=hit["_id"], **hit["_source"]) for hit in hits[:15]]
+    async def _suggest_job_titles_by_phrase_prefix(self, prefix: str, size: int) -> list[str]:
+        response = await self.client.search(
+            index="jobs",
+            query={"match_phrase_prefix": {"job_title": {"query": prefix}}},
+            _source=["job_title"],
+            # Over-fetch so that repeated titles still leave `size` distinct ones
+            size=size * 4
+        )
+        titles = dict.fromkeys(hit["_source"]["job_title"] for hit in response["hits"]["hits"])
+        return list(titles)[:size]
 
-        user_embedding_np = np.array(user_embedding)
-        user_norm = np.linalg.norm(user_embedding_np)
 
-        def cosine_similarity(vec):
-            vec_np = np.array(vec)
-            return np.dot(user_embedding_np, vec_np) / (user_norm * np.linalg.norm(vec_np) + 1e-10)
+    # -------------------------------
+    #   Invalidation Events handling
+    # -------------------------------
 
-        # use a heap to get the top 15 jobs based on cosine similarity
-        top_hits = heapq.nlargest(
-            15,
-            hits,
-            key=lambda hit: cosine_similarity(hit["_source"]["embedding"])
+    async def publish_invalidation_event(self, event_type: str, payload: dict) -> int:
+        """Record a change to data that API processes cache, for their `InvalidationListener` to apply."""
+        version = time.time_ns()
+        await self.client.index(
+            index="invalidation_events",
+            document={
+                "type": event_type,
+                "version": version,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "payload": payload
+            },
+            refresh=True
         )
+        # Listeners poll every few seconds, a day of history is plenty
+        await self.client.delete_by_query(
+            index="invalidation_events",
+            query={"range": {"created_at": {"lt": "now-1d"}}},
+            conflicts="proceed"
+        )
+        return version
 
-        return [
-            BaseJob(id=hit["_id"], **{k: v for k, v in hit["_source"].items() if k != "embedding"})
-            for hit in top_hits
-        ]
+    async def get_invalidation_events(self, after_version: int, size: int = 100) -> list[dict]:
+        """Return the events published after `after_version`, oldest first."""
+        try:
+            response = await self.client.search(
+                index="invalidation_events",
+                query={"range": {"version": {"gt": after_version}}},
+                sort=[{"version": {"order": "asc"}}],
+                size=size
+            )
+        except NotFoundError:
+            return []
+        return [hit["_source"] for hit in response["hits"]["hits"]]
+
+    async def get_latest_invalidation_version(self) -> int:
+        """Version of the latest published event, 0 if there is none."""
+        try:
+            response = await self.client.search(
+                index="invalidation_events",
+                sort=[{"version": {"order": "desc"}}],
+                _source=["version"],
+                size=1
+            )
+        except NotFoundError:
+            return 0
+        hits = response["hits"]["hits"]
+        return hits[0]["_source"]["version"] if hits else 0
 
 
     # ----------------------------------
     #  Webscraping Metadata handling
     # ----------------------------------
 
+    @single_flight("es.get_metadata")
     async def get_metadata(self, doc_id: str, index: str = "scraper_metadata") -> dict:
         """Retrieve webscraping metadata by document ID."""
         if await self.client.exists(index=index, id=doc_id):
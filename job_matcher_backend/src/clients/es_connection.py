@@ -0,0 +1,99 @@
+import asyncio
+import os
+import sys
+import aiohttp
+from elasticsearch import AsyncElasticsearch
+from elastic_transport import AiohttpHttpNode
+
+ES_CONNECTIONS_PER_NODE = int(os.getenv("ES_CONNECTIONS_PER_NODE", "32"))
+ES_KEEPALIVE_TIMEOUT = float(os.getenv("ES_KEEPALIVE_TIMEOUT", "60"))
+ES_HTTP_COMPRESS = os.getenv("ES_HTTP_COMPRESS", "true").lower() == "true"
+ES_REQUEST_TIMEOUT = float(os.getenv("ES_REQUEST_TIMEOUT", "30"))
+ES_MAX_RETRIES = int(os.getenv("ES_MAX_RETRIES", "3"))
+ES_RETRY_ON_TIMEOUT = os.getenv("ES_RETRY_ON_TIMEOUT", "true").lower() == "true"
+# Same rule as elastic_transport: Python versions before the SSL transport leak fix need aiohttp to close them
+ES_CLEANUP_CLOSED = (3, 13, 0) <= sys.version_info < (3, 13, 1) or sys.version_info < (3, 12, 7)
+
+
+class PooledAiohttpNode(AiohttpHttpNode):
+    """
+    aiohttp node whose connection pool keeps idle connections alive for `ES_KEEPALIVE_TIMEOUT`
+    seconds and counts in-flight requests. A request holds one pooled connection while it runs,
+    so in-flight requests beyond `connections_per_node` are waiting for a connection;
+    `saturated` counts requests that started waiting because the pool was fully busy.
+    """
+    def __init__(self, config):
+        super().__init__(config)
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests = 0
+        self.saturated = 0
+
+    def _create_aiohttp_session(self):
+        """
+        The session of AiohttpHttpNode, plus the keep-alive timeout, which NodeConfig has no option for.
+        This overrides a private method of elastic-transport, so the version is pinned in requirements.txt
+        and test_es_connection checks the override still matches the parent when upgrading.
+        """
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        self.session = aiohttp.ClientSession(
+            headers=self.headers,
+            skip_auto_headers=("accept", "accept-encoding", "user-agent"),
+            auto_decompress=True,
+            loop=self._loop,
+            cookie_jar=aiohttp.DummyCookieJar(),
+            connector=aiohttp.TCPConnector(
+                limit_per_host=self._connections_per_node,
+                keepalive_timeout=ES_KEEPALIVE_TIMEOUT,
+                use_dns_cache=True,
+                enable_cleanup_closed=ES_CLEANUP_CLOSED,
+                ssl=self._ssl_context or False
+            )
+        )
+
+    async def perform_request(self, *args, **kwargs):
+        self.requests += 1
+        if self.in_flight >= self._connections_per_node:
+            self.saturated += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            return await super().perform_request(*args, **kwargs)
+        finally:
+            self.in_flight -= 1
+
+
+def create_es_client(url: str = None) -> AsyncElasticsearch:
+    """
+    Build the AsyncElasticsearch client shared by the API and the cron jobs:
+    a keep-alive connection pool sized by `ES_CONNECTIONS_PER_NODE`, gzip-compressed request bodies,
+    a request timeout, and retries on timeouts and on overload responses.
+    """
+    return AsyncElasticsearch(
+        url or os.getenv('ELASTICSEARCH_URL'),
+        node_class=PooledAiohttpNode,
+        connections_per_node=ES_CONNECTIONS_PER_NODE,
+        http_compress=ES_HTTP_COMPRESS,
+        request_timeout=ES_REQUEST_TIMEOUT,
+        max_retries=ES_MAX_RETRIES,
+        retry_on_timeout=ES_RETRY_ON_TIMEOUT,
+        retry_on_status=(429, 502, 503, 504)
+    )
+
+
+def pool_stats(client: AsyncElasticsearch) -> dict:
+    """Connection pool utilization summed over the client's nodes."""
+    nodes = [node for node in client.transport.node_pool.all() if isinstance(node, PooledAiohttpNode)]
+    capacity = sum(node.config.connections_per_node for node in nodes)
+    active = sum(min(node.in_flight, node.config.connections_per_node) for node in nodes)
+    return {
+        "nodes": len(nodes),
+        "connections": capacity,
+        "active": active,
+        "waiting": sum(node.in_flight for node in nodes) - active,
+        "peak_in_flight": max((node.peak_in_flight for node in nodes), default=0),
+        "utilization": active / capacity if capacity else 0.0,
+        "requests": sum(node.requests for node in nodes),
+        "saturated": sum(node.saturated for node in nodes)
+    }
@@ -0,0 +1,151 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from typing import Optional
+from urllib.parse import urlsplit
+import aiohttp
+
+SCRAPER_RATE_LIMIT = float(os.getenv("SCRAPER_RATE_LIMIT", "5"))
+SCRAPER_BURST = int(os.getenv("SCRAPER_BURST", "10"))
+SCRAPER_MAX_PER_HOST = int(os.getenv("SCRAPER_MAX_PER_HOST", "8"))
+SCRAPER_MAX_RETRIES = int(os.getenv("SCRAPER_MAX_RETRIES", "3"))
+SCRAPER_BACKOFF_BASE = float(os.getenv("SCRAPER_BACKOFF_BASE", "0.5"))
+SCRAPER_BACKOFF_MAX = 30.0
+SCRAPER_REQUEST_TIMEOUT = float(os.getenv("SCRAPER_REQUEST_TIMEOUT", "15"))
+SCRAPER_KEEPALIVE_TIMEOUT = 30.0
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Rate limiter allowing `rate` acquisitions per second on average and bursts of up to `capacity`.
+    Waiters are served in arrival order.
+    """
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> float:
+        """Take a token, waiting for one if needed, and return the seconds waited."""
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+
+class AsyncHttpClient:
+    """
+    Shared aiohttp client for the scrapers: one keep-alive connection pool, a token bucket per
+    rate-limited host, at most `max_per_host` requests in flight per host, and retries with
+    jittered exponential backoff on connection errors, timeouts and overload responses.
+    The session is created on first use, inside the running event loop.
+    """
+    def __init__(self, headers: Optional[dict] = None, rate_limits: Optional[dict] = None,
+                 max_per_host: int = SCRAPER_MAX_PER_HOST, max_retries: int = SCRAPER_MAX_RETRIES,
+                 backoff_base: float = SCRAPER_BACKOFF_BASE, timeout: float = SCRAPER_REQUEST_TIMEOUT):
+        self.headers = headers or {}
+        self.max_per_host = max_per_host
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.timeout = timeout
+
+        # Host -> TokenBucket, hosts without one are only limited by concurrency
+        self._buckets = {host: TokenBucket(rate, burst) for host, (rate, burst) in (rate_limits or {}).items()}
+        self._host_slots = {}
+        self._session = None
+
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.throttled_seconds = 0.0
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                connector=aiohttp.TCPConnector(
+                    limit_per_host=self.max_per_host,
+                    keepalive_timeout=SCRAPER_KEEPALIVE_TIMEOUT,
+                    use_dns_cache=True
+                )
+            )
+        return self._session
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Full-jitter exponential backoff, never shorter than the server's Retry-After."""
+        delay = random.uniform(0, min(SCRAPER_BACKOFF_MAX, self.backoff_base * 2 ** attempt))
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, min(SCRAPER_BACKOFF_MAX, float(retry_after)))
+        return delay
+
+    async def get_json(self, url: str, params: Optional[dict] = None) -> Optional[dict]:
+        """
+        GET a JSON document, returning None on 404.
+        Other client errors raise at once, retryable failures once the retries are used up.
+        """
+        host = urlsplit(url).hostname
+        slots = self._host_slots.setdefault(host, asyncio.Semaphore(self.max_per_host))
+        bucket = self._buckets.get(host)
+
+        for attempt in range(self.max_retries + 1):
+            if bucket:
+                self.throttled_seconds += await bucket.acquire()
+            retry_after = None
+            try:
+                async with slots:
+                    self.requests += 1
+                    async with self._get_session().get(url, params=params) as response:
+                        if response.status == 404:
+                            return None
+                        if response.status not in RETRY_STATUSES:
+                            response.raise_for_status()
+                            body = await response.read()
+                            return json.loads(body.decode("utf-8", errors="replace"))
+                        retry_after = response.headers.get("Retry-After")
+                        error = aiohttp.ClientResponseError(
+                            response.request_info, response.history, status=response.status, message=response.reason
+                        )
+            except aiohttp.ClientResponseError:
+                self.failures += 1
+                raise
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = e
+
+            if attempt == self.max_retries:
+                self.failures += 1
+                raise error
+            self.retries += 1
+            delay = self._backoff(attempt, retry_after)
+            logging.warning(f"Retrying {url} in {delay:.2f}s after {error!r}")
+            await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "failures": self.failures,
+            "throttled_seconds": round(self.throttled_seconds, 3)
+        }
+
+    async def close(self):
+        """Close the connection pool, logging how the client was used."""
+        if self._session and not self._session.closed:
+            logging.info(f"Closing HTTP client, stats: {self.stats()}")
+            await self._session.close()
+        self._session = None
@@ -0,0 +1,65 @@
+import asyncio
+import logging
+import os
+
+INVALIDATION_POLL_INTERVAL = float(os.getenv("INVALIDATION_POLL_INTERVAL", "10"))
+
+# Event types published by the cron jobs
+JOBS_REMOVED = "jobs_removed"
+
+
+class InvalidationListener:
+    """
+    Polls the invalidation events the cron jobs publish to Elasticsearch and hands each one
+    to the handlers subscribed to its type, so in-process caches drop what changed underneath them.
+    Events published before the listener started are skipped: the caches were empty then.
+    """
+    def __init__(self, es_client, poll_interval: float = INVALIDATION_POLL_INTERVAL):
+        self.es_client = es_client
+        self.poll_interval = poll_interval
+        self.received = 0
+
+        self._handlers = {}
+        self._version = None
+        self._task = None
+
+    def subscribe(self, event_type: str, handler):
+        """Call `handler(payload)` for every event of the given type."""
+        self._handlers.setdefault(event_type, []).append(handler)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def poll(self) -> int:
+        """Apply the events published since the last poll and return how many there were."""
+        if self._version is None:
+            self._version = await self.es_client.get_latest_invalidation_version()
+            return 0
+
+        events = await self.es_client.get_invalidation_events(self._version)
+        for event in events:
+            for handler in self._handlers.get(event["type"], []):
+                try:
+                    handler(event.get("payload", {}))
+                except Exception as e:
+                    logging.error(f"❌ Invalidation handler for {event['type']} failed: {e}")
+            self._version = event["version"]
+        self.received += len(events)
+        return len(events)
+
+    async def _run(self):
+        while True:
+            try:
+                await self.poll()
+            except Exception as e:
+                logging.error(f"❌ Failed to poll invalidation events: {e}")
+            await asyncio.sleep(self.poll_interval)
@@ -0,0 +1,91 @@
+import os
+import time
+from collections import OrderedDict
+import numpy as np
+
+MATCH_CONTEXT_CACHE_SIZE = int(os.getenv("MATCH_CONTEXT_CACHE_SIZE", "10000"))
+MATCH_CONTEXT_TTL = float(os.getenv("MATCH_CONTEXT_TTL", "300"))
+
+
+class MatchContext:
+    """
+    What job matching needs about a user: the profile embedding, the sequence number of the profile
+    document it was read from and the applied job IDs.
+    `ranking` holds a live KNN ranking of `ranking_depth` jobs computed from them, so the pages
+    of a user without stored recommendations, or past their end, reuse it while the context is cached.
+    """
+    __slots__ = ("embedding", "applied_job_ids", "profile_seq_no", "ranking", "ranking_depth")
+
+    def __init__(self, embedding, applied_job_ids, profile_seq_no=None):
+        self.embedding = np.asarray(embedding, dtype=np.float32)
+        self.applied_job_ids = frozenset(applied_job_ids)
+        self.profile_seq_no = profile_seq_no
+        self.ranking = None
+        self.ranking_depth = 0
+
+
+class MatchContextCache:
+    """
+    In-process LRU cache of per-user match context with a TTL.
+    Writers invalidate a user's entry. A lookup reads the invalidation count as its generation
+    when it starts, and what it read is not cached if the user was invalidated since.
+    The last invalidation of at most `max_size` users is remembered; lookups that started
+    before a forgotten one are not cached, as it may have been their user's.
+    """
+    def __init__(self, max_size: int = MATCH_CONTEXT_CACHE_SIZE, ttl: float = MATCH_CONTEXT_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+        self._entries = OrderedDict()
+        self._clock = 0
+        # User -> clock of their last invalidation, oldest first
+        self._invalidated = OrderedDict()
+        self._forgotten = 0
+
+    def get(self, user_id: str):
+        """Return the cached context for a user, or None if missing or expired."""
+        entry = self._entries.get(user_id)
+        if entry is None or time.monotonic() - entry[1] > self.ttl:
+            if entry is not None:
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return entry[0]
+
+    def generation(self, user_id: str) -> int:
+        """Generation of a lookup starting now, to pass back to `put`."""
+        return self._clock
+
+    def put(self, user_id: str, context: MatchContext, generation: int):
+        """Cache a context, unless the user was invalidated since `generation` was read."""
+        if self.max_size <= 0 or generation < self._forgotten or self._invalidated.get(user_id, 0) > generation:
+            return
+        self._entries[user_id] = (context, time.monotonic())
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str):
+        """Drop a user's entry after their profile or applications changed."""
+        self._entries.pop(user_id, None)
+        self._clock += 1
+        self._invalidated.pop(user_id, None)
+        self._invalidated[user_id] = self._clock
+        while len(self._invalidated) > self.max_size:
+            _, self._forgotten = self._invalidated.popitem(last=False)
+        self.invalidations += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations
+        }
@@ -1,10 +1,16 @@
+from typing import Optional
 from openai import AsyncOpenAI
+from .single_flight import single_flight
 
 class OpenAIEmbeddingClient:
     """Client for generating text embeddings using the OpenAI API."""
-    def __init__(self):
-        self.client = AsyncOpenAI()
+    def __init__(self, client: Optional[AsyncOpenAI] = None):
+        self.client = client or AsyncOpenAI()
 
+    @single_flight("openai.embeddings")
     async def create(self, input):
-        """Returns a response that contains embedding for the given input text."""
+        """
+        Returns a response that contains embedding for the given input text.
+        Concurrent calls with the same input share one API request.
+        """
         return await self.client.embeddings.create(model="text-embedding-3-small", input=input)
\ No newline at end of file
@@ -1,12 +1,17 @@
 from openai import AsyncOpenAI
+from .single_flight import single_flight
 
 class OpenAIGPTClient:
     """Client for generating chat completions using the OpenAI GPT API."""
     def __init__(self):
         self.client = AsyncOpenAI()
 
+    @single_flight("openai.chat")
     async def create(self, messages, model="gpt-4o-mini", temperature=0.7):
-        """ Returns a chat completion response for the given messages."""
+        """
+        Returns a chat completion response for the given messages.
+        Concurrent calls with the same messages and settings share one API request.
+        """
         return await self.client.chat.completions.create(
             model=model,
             messages=messages,
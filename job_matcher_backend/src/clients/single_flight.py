@@ -0,0 +1,86 @@
+import asyncio
+import functools
+import json
+import os
+from pydantic import BaseModel
+
+# Comma-separated names of single-flight methods that should run every call
+SINGLE_FLIGHT_DISABLED = {name.strip() for name in os.getenv("SINGLE_FLIGHT_DISABLED", "").split(",") if name.strip()}
+
+
+class SingleFlight:
+    """
+    Shares one in-flight call between concurrent callers with the same key.
+    The first caller starts the call, later callers await the same result until it completes;
+    nothing is cached after that. Callers share the returned object and must not mutate it.
+    """
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._in_flight = {}
+
+    async def do(self, key, call):
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            self.calls += 1
+            future = asyncio.ensure_future(call())
+            self._in_flight[key] = future
+            future.add_done_callback(functools.partial(self._done, key))
+        # A cancelled caller must not cancel the call the others are waiting on
+        return await asyncio.shield(future)
+
+    def _done(self, key, future: asyncio.Future):
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+        if not future.cancelled():
+            # Mark the error as retrieved in case every caller was cancelled
+            future.exception()
+
+    def stats(self) -> dict:
+        requests = self.calls + self.coalesced
+        return {
+            "requests": requests,
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "coalescing_rate": self.coalesced / requests if requests else 0.0,
+            "in_flight": len(self._in_flight)
+        }
+
+
+_groups = {}
+
+
+def _json_default(value):
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    return str(value)
+
+
+def _default_key(args: tuple, kwargs: dict) -> str:
+    return json.dumps([args, kwargs], sort_keys=True, default=_json_default)
+
+
+def single_flight(name: str, key=None):
+    """
+    Decorate an async method so that concurrent calls on the same instance with the same
+    arguments share one in-flight call. `key` maps the call arguments to the coalescing key,
+    by default their JSON encoding. Methods named in SINGLE_FLIGHT_DISABLED are left as is.
+    """
+    def decorator(method):
+        if name in SINGLE_FLIGHT_DISABLED:
+            return method
+        group = _groups.setdefault(name, SingleFlight())
+
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            call_key = (id(self), key(*args, **kwargs) if key else _default_key(args, kwargs))
+            return await group.do(call_key, lambda: method(self, *args, **kwargs))
+        return wrapper
+    return decorator
+
+
+def single_flight_stats() -> dict:
+    """Coalescing metrics per single-flight method."""
+    return {name: group.stats() for name, group in _groups.items()}
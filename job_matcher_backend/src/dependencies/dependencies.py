@@ -1,4 +1,5 @@
 from src.clients.es_client import ElasticsearchClient
+from src.clients.invalidation_events import InvalidationListener, JOBS_REMOVED
 from src.clients.firestore.interviews_firestore import InterviewsManager
 from openai import AsyncOpenAI
 from src.user_profile.profile_manager import ProfileManager
@@ -6,8 +7,10 @@ from src.clients.openai_embedding_client import OpenAIEmbeddingClient
 from src.clients.openai_gpt_client import OpenAIGPTClient
 from src.preprocessor.preprocessor import TextPreprocessor
 from src.jobs_matcher.jobs_matcher import JobsMatcher
+from src.jobs_matcher.vector_index import JobVectorIndex, MATCHER_BACKEND
 from src.applied_jobs.applied_jobs_manager import AppliedJobsManager
 from src.user_profile.profile_structurer.profile_structurer import ProfileStructurer
+from src.jobs_processor.location_facets import LocationFacets
 
 es_client = ElasticsearchClient()
 embedding_client = OpenAIEmbeddingClient()
@@ -19,8 +22,19 @@ profile_structurer = ProfileStructurer()
 
 interviews_manager = InterviewsManager()
 profile_manager = ProfileManager(embedding_client, es_client, preprocessor, profile_structurer)
-jobs_matcher = JobsMatcher(embedding_client, es_client, preprocessor)
+vector_index = JobVectorIndex() if MATCHER_BACKEND == "memmap" else None
+jobs_matcher = JobsMatcher(embedding_client, es_client, preprocessor, vector_index)
 applied_jobs_manager = AppliedJobsManager(es_client)
+location_facets = LocationFacets(es_client)
+
+def apply_jobs_removed(payload: dict):
+    """Drop cached state made stale by the expired jobs removal."""
+    for user_id in payload.get("user_ids", []):
+        es_client.match_context_cache.invalidate(user_id)
+    location_facets.invalidate()
+
+invalidation_listener = InvalidationListener(es_client)
+invalidation_listener.subscribe(JOBS_REMOVED, apply_jobs_removed)
 
 def get_es_client():
     return es_client
@@ -38,4 +52,13 @@ def get_applied_jobs_manager():
     return applied_jobs_manager
 
 def get_jobs_matcher():
-    return jobs_matcher
\ No newline at end of file
+    return jobs_matcher
+
+def get_vector_index():
+    return vector_index
+
+def get_location_facets():
+    return location_facets
+
+def get_preprocessor():
+    return preprocessor
\ No newline at end of file
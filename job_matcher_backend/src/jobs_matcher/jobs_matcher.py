@@ -1,45 +1,126 @@
+import asyncio
+import os
+from datetime import date
 from io import BytesIO
-from ..clients.es_client import ElasticsearchClient
+from typing import Optional
+from ..clients.es_client import ElasticsearchClient, encode_cursor, decode_cursor, is_sort_values
+from ..clients.match_context_cache import MatchContext
 from ..clients.openai_embedding_client import OpenAIEmbeddingClient
 from ..cv_processor.cv_processor import CVProcessor
 from ..preprocessor.preprocessor import TextPreprocessor
-from ..types.types import MatchedJob
+from ..types.types import MatchedJob, RecommendedJob
+from .vector_index import JobVectorIndex
+from .recommendations_builder import RECOMMENDATIONS_TOP_N
+
+# Deepest a user's ranked list is extended with live KNN as they page through it
+MATCH_RANKING_MAX_JOBS = int(os.getenv("MATCH_RANKING_MAX_JOBS", "1000"))
 
 class JobsMatcher:
-    """ Match jobs based on CV embeddings using Elasticsearch KNN and OpenAI embeddings. """
-    def __init__(self, embedding_client: OpenAIEmbeddingClient, es_client: ElasticsearchClient, preprocessor: TextPreprocessor):
+    """
+    Match jobs based on CV embeddings using OpenAI embeddings and a KNN backend:
+    Elasticsearch KNN by default, or the in-process memory-mapped vector index when one is given.
+    """
+    def __init__(self, embedding_client: OpenAIEmbeddingClient, es_client: ElasticsearchClient, preprocessor: TextPreprocessor,
+                 vector_index: Optional[JobVectorIndex] = None):
         self.embedding_client = embedding_client
         self.es_client = es_client
         self.preprocessor = preprocessor
+        self.vector_index = vector_index
 
     async def process_cv(self, file_stream: BytesIO):
         """ Process the CV to generate its embedding """
         return await CVProcessor.process_file(file_stream, self.preprocessor, self.embedding_client)
 
-    async def find_matching_jobs(self, cv_embedding, top_k: int = 15, exclude_job_ids: list = None) -> list[MatchedJob]:
+    async def find_matching_jobs(self, cv_embedding, top_k: int = 15, exclude_job_ids: list = None,
+                                 model: type[MatchedJob] = MatchedJob) -> list[MatchedJob]:
         """ Find top K matching jobs based on the CV embedding """
-        if not cv_embedding:
+        if cv_embedding is None or not len(cv_embedding):
             raise ValueError("CV embedding not received for matching.")
-        
-        return await self.es_client.search_jobs_by_embedding(cv_embedding, k=top_k, exclude_job_ids=exclude_job_ids)
+
+        if self.vector_index:
+            matched_jobs = await self.vector_index.search_async(cv_embedding, k=top_k, exclude_job_ids=exclude_job_ids,
+                                                                model=model)
+            if matched_jobs is not None:
+                return matched_jobs
+
+        return await self.es_client.search_jobs_by_embedding(list(map(float, cv_embedding)), k=top_k,
+                                                             exclude_job_ids=exclude_job_ids, model=model)
 
     async def get_matching_jobs_by_file(self, file_stream: BytesIO, top_k: int = 15)-> list[MatchedJob]:
         """ Process the CV and find top K matching jobs """
         cv_embedding = await self.process_cv(file_stream)
         return await self.find_matching_jobs(cv_embedding, top_k)
-    
-    async def get_matching_jobs_with_user_id(self, user_id: str, top_k: int = 15) -> list[MatchedJob]:
-        """ Get matching jobs using a user ID to fetch its embedding """
-        cv_embedding = await self.es_client.get_user_embedding(user_id)
-        if not cv_embedding:
+
+    async def get_matching_jobs_page(self, user_id: str, page_size: int = 20,
+                                     cursor: Optional[str] = None) -> tuple[list[MatchedJob], Optional[str]]:
+        """
+        Get one page of matching jobs for a user ID, best match first, and the cursor of the next page.
+        Pages are slices of the user's ranked list: the recommendations precomputed after ingestion
+        from the current profile, or for new and updated profiles a live KNN ranking. Only `build_user_recommendations` stores rankings,
+        so a request never writes one computed from a profile that has since been updated.
+        When a page runs past the end of a full list, live KNN ranks `MATCH_RANKING_MAX_JOBS` deep once.
+        Live rankings are kept with the user's cached match context, so later pages read them
+        instead of ranking again, until the profile or applications change.
+        The cursor is the (score, job ID) of the last job returned, so it stays valid across rankings.
+        """
+        after = decode_cursor(cursor, lambda values: is_sort_values(values, ((int, float), str))) if cursor else None
+
+        context, recommendations = await asyncio.gather(
+            self.es_client.get_match_context(user_id),
+            self.es_client.get_user_recommendations(user_id)
+        )
+        if not context:
             raise ValueError("User embedding not found.")
-        
-        # Fetch applied job IDs for the user
-        applied_jobs_response = await self.es_client.get_user_applications(user_id)
-        applied_job_ids = [hit["_source"]["job_id"] for hit in applied_jobs_response["hits"]["hits"]]
-        
-        # Pass applied_job_ids to exclude them from the search results
-        return await self.find_matching_jobs(cv_embedding, top_k, exclude_job_ids=applied_job_ids)
+        if recommendations is not None:
+            recommendations, profile_seq_no = recommendations
+            # A batch run that overlapped a profile update may have stored a list for the old profile
+            if profile_seq_no != context.profile_seq_no:
+                recommendations = None
+
+        if context.ranking is not None:
+            ranking, depth = context.ranking, context.ranking_depth
+        elif recommendations is not None:
+            ranking, depth = recommendations, RECOMMENDATIONS_TOP_N
+        else:
+            ranking, depth = await self._rank_live(context, RECOMMENDATIONS_TOP_N)
+
+        jobs = self._jobs_after(self._available_jobs(ranking, context), after)
+        # A list shorter than asked for holds every job there is; a full one may continue past its end
+        if len(jobs) <= page_size and depth <= len(ranking) and depth < MATCH_RANKING_MAX_JOBS:
+            ranking, depth = await self._rank_live(context, MATCH_RANKING_MAX_JOBS)
+            jobs = self._jobs_after(self._available_jobs(ranking, context), after)
+
+        page = jobs[:page_size]
+        next_cursor = encode_cursor([page[-1].score, page[-1].id]) if len(jobs) > page_size else None
+        return page, next_cursor
+
+    async def _rank_live(self, context: MatchContext, top_n: int) -> tuple[list[dict], int]:
+        """
+        Rank the user's top N unapplied jobs with live KNN, as recommendation dicts, and keep the
+        ranking with the match context for the next pages. Returns the ranking and its depth.
+        """
+        ranked = await self.find_matching_jobs(context.embedding, top_n, exclude_job_ids=list(context.applied_job_ids),
+                                               model=RecommendedJob)
+        context.ranking, context.ranking_depth = [job.model_dump() for job in ranked], top_n
+        return context.ranking, top_n
+
+    @staticmethod
+    def _jobs_after(jobs: list[MatchedJob], after: Optional[list]) -> list[MatchedJob]:
+        """Sort jobs best match first, ties by ID, and keep those ranked after the cursor's (score, job ID)."""
+        jobs = sorted(jobs, key=lambda job: (-job.score, job.id))
+        if after is None:
+            return jobs
+        after_key = (-after[0], after[1])
+        return [job for job in jobs if (-job.score, job.id) > after_key]
+
+    @staticmethod
+    def _available_jobs(recommendations: list[dict], context: MatchContext) -> list[MatchedJob]:
+        """Recommended jobs the user has not applied to and that have not expired."""
+        today = date.today().isoformat()
+        return [
+            MatchedJob.from_source(job["id"], job) for job in recommendations
+            if job["id"] not in context.applied_job_ids and (job.get("expiration_date") or today) >= today
+        ]
 
     @staticmethod
     def print_results(results: dict):
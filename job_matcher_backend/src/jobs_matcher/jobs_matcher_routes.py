@@ -1,29 +1,37 @@
-from fastapi import UploadFile, File, Depends, APIRouter
+from typing import Optional
+from fastapi import UploadFile, File, Depends, APIRouter, Query
 from fastapi.responses import JSONResponse
 from io import BytesIO
 from ..clients.firebase.verify_token import get_current_user
 from ..dependencies.dependencies import get_jobs_matcher
+from ..types.responses import ModelJSONResponse
 
 router = APIRouter(
     prefix="/match_jobs",
-    tags=["Jobs Matcher"]
+    tags=["Jobs Matcher"],
+    default_response_class=ModelJSONResponse
 )
 
 @router.get("/by_profile")
 async def get_job_matches_by_profile(
+    page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
     user_id: str = Depends(get_current_user),
     jobs_matcher = Depends(get_jobs_matcher)
 ):
-    """Get matching jobs for the current user's profile."""
+    """Get a page of matching jobs for the current user's profile."""
     try:
-        matched_jobs = await jobs_matcher.get_matching_jobs_with_user_id(user_id, top_k=20)
-        if not matched_jobs:
+        matched_jobs, next_cursor = await jobs_matcher.get_matching_jobs_page(user_id, page_size, cursor)
+        if not matched_jobs and not cursor:
             return JSONResponse(content={"error": "No matching jobs found"}, status_code=404)
-        return {
+        return ModelJSONResponse({
             "message": "Job matching successful",
-            "jobs": [job.model_dump() for job in matched_jobs]
-        }
-    
+            "jobs": matched_jobs,
+            "next_cursor": next_cursor
+        })
+
+    except ValueError as e:
+        return JSONResponse(content={"error": "Failed to match jobs", "details": str(e)}, status_code=400)
     except Exception as e:
         return JSONResponse(content={"error": "Failed to match jobs", "details": str(e)}, status_code=500)
 
@@ -47,10 +55,10 @@ async def get_job_matches_by_cv_upload(
         if not matched_jobs:
             return JSONResponse(content={"error": "No matching jobs found"}, status_code=404)
 
-        return {
+        return ModelJSONResponse({
             "message": "Job matching successful",
-            "jobs": [job.model_dump() for job in matched_jobs]
-        }
+            "jobs": matched_jobs
+        })
 
     except Exception as e:
         return JSONResponse(content={"error": "Failed to process file", "details": str(e)}, status_code=500)
\ No newline at end of file
@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import numpy as np
+
+from ..clients.es_client import ElasticsearchClient
+from ..scoring.vector_scoring import normalize, top_k_rows
+from ..types.types import BaseJob
+from .vector_index import EMBEDDING_DIMS
+
+RECOMMENDATIONS_TOP_N = int(os.getenv("RECOMMENDATIONS_TOP_N", "100"))
+RECOMMENDATIONS_USER_BLOCK = 256
+
+
+async def load_job_matrix(es_client: ElasticsearchClient):
+    """
+    Load every job with an embedding: the slim job documents stored in recommendations
+    and a (jobs, dims) matrix of normalized float32 rows.
+    """
+    source_fields = [f for f in BaseJob.model_fields.keys() if f != "id"] + ["expiration_date", "embedding"]
+    jobs, rows = [], []
+    async for job_id, source in es_client.scan_jobs(source_fields):
+        embedding = source.pop("embedding", None)
+        if not embedding:
+            continue
+        jobs.append({"id": job_id, **source})
+        # Converted per hit so the scan never holds more than one job as Python floats
+        rows.append(normalize(np.asarray(embedding, dtype=np.float32)))
+    matrix = np.stack(rows) if rows else np.empty((0, EMBEDDING_DIMS), dtype=np.float32)
+    return jobs, matrix
+
+
+async def load_applied_job_ids(es_client: ElasticsearchClient) -> dict[str, set[str]]:
+    """The IDs of the jobs every user has applied to, by user ID."""
+    applied = defaultdict(set)
+    async for user_id, job_id in es_client.scan_applied_job_ids():
+        applied[user_id].add(job_id)
+    return applied
+
+
+async def build_user_recommendations(es_client: ElasticsearchClient, top_n: int = RECOMMENDATIONS_TOP_N) -> dict:
+    """
+    Compute the top N jobs of every user profile and store them in `user_recommendations`.
+    Similarities are computed for blocks of users at once as one matrix product against all jobs.
+    Scores use the Elasticsearch cosine scale, (1 + cos) / 2, so they match live KNN results.
+    Jobs a user has already applied to are left out of their list.
+    Each list records the sequence number of the profile it was computed from, so a list written
+    after the profile changed during the run is ignored by matching.
+    Recommendations of users whose profile no longer exists are removed at the end of the run.
+    """
+    generated_at = datetime.now(timezone.utc).isoformat()
+    # Make writes from the ingestion run that just finished visible to the scan
+    await es_client.client.indices.refresh(index="jobs")
+    jobs, job_matrix = await load_job_matrix(es_client)
+    applied = await load_applied_job_ids(es_client)
+    job_rows = {job["id"]: row for row, job in enumerate(jobs)}
+
+    writes = []
+    async with es_client.bulk_writer("user_recommendations") as writer:
+        users, block = [], []
+        async for user_id, embedding, profile_seq_no in es_client.scan_user_embeddings():
+            users.append((user_id, profile_seq_no))
+            block.append(normalize(np.asarray(embedding, dtype=np.float32)))
+            if len(block) == RECOMMENDATIONS_USER_BLOCK:
+                writes.extend(await _write_block(writer, users, block, jobs, job_matrix, top_n, generated_at,
+                                                 applied, job_rows))
+                users, block = [], []
+        if block:
+            writes.extend(await _write_block(writer, users, block, jobs, job_matrix, top_n, generated_at,
+                                             applied, job_rows))
+
+    results = await asyncio.gather(*writes, return_exceptions=True)
+    failed = [result for result in results if isinstance(result, Exception)]
+    for error in failed[:10]:
+        logging.error(f"❌ Failed to store recommendations: {error}")
+
+    response = await es_client.client.delete_by_query(
+        index="user_recommendations",
+        query={"range": {"generated_at": {"lt": generated_at}}},
+        conflicts="proceed",
+        refresh=True
+    )
+
+    stats = {
+        "users": len(results) - len(failed),
+        "jobs": len(jobs),
+        "failed": len(failed),
+        "removed": response.get("deleted", 0)
+    }
+    logging.info(f"✅ User recommendations refreshed: {stats}")
+    return stats
+
+
+async def _write_block(writer, users: list, block: list, jobs: list, job_matrix: np.ndarray,
+                       top_n: int, generated_at: str, applied: dict, job_rows: dict) -> list[asyncio.Future]:
+    scores = (1.0 + np.stack(block) @ job_matrix.T) / 2.0
+    for row, (user_id, _) in enumerate(users):
+        applied_rows = [job_rows[job_id] for job_id in applied.get(user_id, ()) if job_id in job_rows]
+        scores[row, applied_rows] = -np.inf
+    writes = []
+    for (user_id, profile_seq_no), user_scores, indices in zip(users, scores, top_k_rows(scores, top_n)):
+        document = {
+            "user_id": user_id,
+            "generated_at": generated_at,
+            "profile_seq_no": profile_seq_no,
+            "jobs": [{**jobs[i], "score": float(user_scores[i])} for i in indices if np.isfinite(user_scores[i])]
+        }
+        writes.append(await writer.index(user_id, document))
+    return writes
+
+
+async def refresh_user_recommendations():
+    """Recompute the recommendations of every user."""
+    es_client = ElasticsearchClient()
+    try:
+        await build_user_recommendations(es_client)
+    finally:
+        await es_client.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(refresh_user_recommendations())
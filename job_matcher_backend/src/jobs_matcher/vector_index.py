@@ -0,0 +1,316 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+
+from ..clients.es_client import ElasticsearchClient
+from ..scoring.vector_scoring import normalize, stack_normalized, top_k
+from ..types.types import BaseJob, MatchedJob
+
+MATCHER_BACKEND = os.getenv("JOBS_MATCHER_BACKEND", "elasticsearch")
+VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", "./vector_index")
+VECTOR_INDEX_DTYPE = os.getenv("VECTOR_INDEX_DTYPE", "float32")
+EMBEDDING_DIMS = 1536
+EMBEDDINGS_BATCH_SIZE = 500
+INT8_SCORING_BLOCK = 4096
+
+
+class JobVectorIndex:
+    """
+    In-process KNN index over the job embeddings, used as an alternative to Elasticsearch KNN.
+    Rows are L2-normalized when written, so cosine similarity is a single matrix-vector product.
+    Vectors live in a memory-mapped file next to a JSON file with the job fields needed for MatchedJob.
+    Searches may run in worker threads while another thread loads a new version, so a version is
+    swapped in and read under a lock.
+    """
+    def __init__(self, directory: str = VECTOR_INDEX_DIR, dtype: str = VECTOR_INDEX_DTYPE):
+        if dtype not in ("float32", "int8"):
+            raise ValueError(f"Unsupported vector index dtype: {dtype}")
+        self.directory = directory
+        self.dtype = dtype
+        self.manifest_path = os.path.join(directory, "manifest.json")
+
+        self._manifest_mtime = None
+        self._version = None
+        self._vectors = None
+        self._scales = None
+        self._jobs = []
+        self._row_by_id = {}
+        self._lock = threading.Lock()
+
+    # -------------------------------
+    #     Loading
+    # -------------------------------
+
+    def load(self) -> bool:
+        """Load the latest index version from disk. Returns False if no index was built yet."""
+        try:
+            return self._load()
+        except FileNotFoundError:
+            # The version was replaced twice while loading it and its files are gone; the manifest now names a newer one
+            try:
+                return self._load()
+            except FileNotFoundError:
+                return self.is_ready()
+
+    def _load(self) -> bool:
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return False
+
+        count = manifest["count"]
+        if count:
+            vectors = np.memmap(
+                os.path.join(self.directory, manifest["vectors_file"]),
+                dtype=manifest["dtype"],
+                mode="r",
+                shape=(count, manifest["dims"])
+            )
+        else:
+            vectors = np.empty((0, manifest["dims"]), dtype=manifest["dtype"])
+        scales = None
+        if manifest["dtype"] == "int8":
+            scales = np.load(os.path.join(self.directory, manifest["scales_file"]))
+        with open(os.path.join(self.directory, manifest["jobs_file"])) as f:
+            jobs = json.load(f)
+
+        row_by_id = {job["id"]: row for row, job in enumerate(jobs)}
+        with self._lock:
+            self._vectors = vectors
+            self._scales = scales
+            self._jobs = jobs
+            self._row_by_id = row_by_id
+            self._version = manifest["version"]
+            self._manifest_mtime = mtime
+        return True
+
+    def reload_if_changed(self) -> bool:
+        """Pick up a version written by another process (e.g. the ingestion cron). Costs one stat call."""
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            return self.is_ready()
+        if mtime != self._manifest_mtime:
+            return self.load()
+        return True
+
+    def is_ready(self) -> bool:
+        """Check whether an index version is loaded."""
+        return self._vectors is not None
+
+    def __len__(self):
+        return len(self._jobs)
+
+    # -------------------------------
+    #     Search
+    # -------------------------------
+
+    def search(self, embedding, k: int = 15, exclude_job_ids: list = None,
+               model: type[MatchedJob] = MatchedJob) -> list[MatchedJob]:
+        """
+        Exact top-k cosine search over all jobs, excluding the jobs the user has already applied to.
+        Scores use the same (1 + cosine) / 2 scale as the Elasticsearch cosine similarity.
+        The scan is CPU-bound and reads every row, so async callers use `search_async`.
+        """
+        self.reload_if_changed()
+        with self._lock:
+            vectors, scales, jobs, row_by_id = self._vectors, self._scales, self._jobs, self._row_by_id
+        if vectors is None or not len(jobs) or k <= 0:
+            return []
+
+        scores = self._cosine_scores(vectors, scales, normalize(embedding))
+
+        if exclude_job_ids:
+            rows = [row_by_id[job_id] for job_id in exclude_job_ids if job_id in row_by_id]
+            scores[rows] = -np.inf
+
+        matched_jobs = []
+        for row in top_k(scores, k):
+            score = scores[row]
+            if score == -np.inf:
+                break
+            job = jobs[row]
+            matched_jobs.append(model.from_source(job["id"], job, score=float((1.0 + score) / 2.0)))
+        return matched_jobs
+
+    async def search_async(self, embedding, k: int = 15, exclude_job_ids: list = None,
+                           model: type[MatchedJob] = MatchedJob) -> Optional[list[MatchedJob]]:
+        """
+        `search` in a worker thread, so the scan (and loading a new version) never blocks the event loop.
+        Returns None if no index version is built yet.
+        """
+        def run():
+            if not self.reload_if_changed():
+                return None
+            return self.search(embedding, k=k, exclude_job_ids=exclude_job_ids, model=model)
+        return await asyncio.to_thread(run)
+
+    @staticmethod
+    def _cosine_scores(vectors: np.ndarray, scales: Optional[np.ndarray], query: np.ndarray) -> np.ndarray:
+        """Cosine similarity of a normalized query against every row."""
+        if scales is None:
+            return vectors @ query
+
+        # int8 rows are scored in blocks so the upcast never materializes the whole matrix
+        scores = np.empty(len(vectors), dtype=np.float32)
+        for start in range(0, len(vectors), INT8_SCORING_BLOCK):
+            block = vectors[start:start + INT8_SCORING_BLOCK].astype(np.float32)
+            scores[start:start + INT8_SCORING_BLOCK] = block @ query
+        return scores * scales
+
+    # -------------------------------
+    #     Building / refreshing
+    # -------------------------------
+
+    async def refresh(self, es_client: ElasticsearchClient) -> dict:
+        """
+        Sync the index with the `jobs` index in Elasticsearch.
+        Only embeddings of jobs that are new or were written again since the last version are fetched,
+        compared by each row's document version; unchanged rows are copied from the current file
+        and deleted jobs are dropped.
+        """
+        self.load()
+        # Make writes from the ingestion run that just finished visible to the scan
+        await es_client.client.indices.refresh(index="jobs")
+
+        source_fields = [f for f in BaseJob.model_fields.keys() if f != "id"] + ["expiration_date"]
+        remote_jobs = {}
+        async for job_id, source, version in es_client.scan_jobs(source_fields, with_versions=True):
+            remote_jobs[job_id] = {"id": job_id, **source, "_version": version}
+
+        kept_ids, updated_ids, new_ids = [], [], []
+        for job_id, job in remote_jobs.items():
+            row = self._row_by_id.get(job_id)
+            if row is None:
+                new_ids.append(job_id)
+            elif self._jobs[row].get("_version") == job["_version"]:
+                kept_ids.append(job_id)
+            else:
+                updated_ids.append(job_id)
+
+        fetch_ids = updated_ids + new_ids
+        new_embeddings = {}
+        for start in range(0, len(fetch_ids), EMBEDDINGS_BATCH_SIZE):
+            batch = fetch_ids[start:start + EMBEDDINGS_BATCH_SIZE]
+            new_embeddings.update(await es_client.get_job_embeddings(batch))
+
+        added_ids = [job_id for job_id in fetch_ids if job_id in new_embeddings]
+        removed = len(self._jobs) - len(kept_ids) - len(updated_ids)
+
+        jobs = [remote_jobs[job_id] for job_id in kept_ids + added_ids]
+        vectors, scales = self._build_rows(kept_ids, [new_embeddings[job_id] for job_id in added_ids])
+        self._write_version(jobs, vectors, scales)
+
+        stats = {
+            "kept": len(kept_ids),
+            "updated": sum(job_id in new_embeddings for job_id in updated_ids),
+            "added": sum(job_id in new_embeddings for job_id in new_ids),
+            "removed": removed
+        }
+        logging.info(f"✅ Vector index refreshed: {stats}")
+        return stats
+
+    def _build_rows(self, kept_ids: list, new_embeddings: list):
+        """Assemble the row matrix from rows already on disk plus newly fetched embeddings."""
+        if self._scales is not None:
+            # Quantized rows are decoded so they can be re-quantized or stored as float32
+            kept = self._decoded_rows(kept_ids)
+        elif kept_ids:
+            kept = np.asarray(self._vectors[[self._row_by_id[job_id] for job_id in kept_ids]], dtype=np.float32)
+        else:
+            kept = np.empty((0, EMBEDDING_DIMS), dtype=np.float32)
+
+        added = stack_normalized(np.reshape(new_embeddings, (-1, EMBEDDING_DIMS)))
+        rows = np.concatenate([kept, added])
+
+        if self.dtype == "float32":
+            return rows, None
+
+        scales = np.abs(rows).max(axis=1) / 127.0 if len(rows) else np.empty(0, dtype=np.float32)
+        scales[scales == 0] = 1.0
+        codes = np.round(rows / scales[:, None]).astype(np.int8)
+        return codes, scales.astype(np.float32)
+
+    def _decoded_rows(self, job_ids: list) -> np.ndarray:
+        """Return existing rows as normalized float32 vectors."""
+        if not job_ids:
+            return np.empty((0, EMBEDDING_DIMS), dtype=np.float32)
+        rows = [self._row_by_id[job_id] for job_id in job_ids]
+        decoded = np.asarray(self._vectors[rows], dtype=np.float32)
+        if self._scales is not None:
+            decoded *= self._scales[rows][:, None]
+        return stack_normalized(decoded)
+
+    def _write_version(self, jobs: list, vectors: np.ndarray, scales: Optional[np.ndarray]):
+        """
+        Write a new index version and switch the manifest to it atomically.
+        The previous version's files are kept until the next version replaces this one, so readers
+        that read the old manifest can still open its files and switch on their next lookup.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        version = time.time_ns()
+        extension = "f32" if self.dtype == "float32" else "i8"
+        manifest = {
+            "version": version,
+            "dtype": self.dtype,
+            "dims": EMBEDDING_DIMS,
+            "count": len(jobs),
+            "vectors_file": f"vectors-{version}.{extension}",
+            "jobs_file": f"jobs-{version}.json",
+        }
+
+        if len(jobs):
+            mm = np.memmap(
+                os.path.join(self.directory, manifest["vectors_file"]),
+                dtype=self.dtype,
+                mode="w+",
+                shape=vectors.shape
+            )
+            mm[:] = vectors
+            mm.flush()
+            del mm
+        if scales is not None:
+            manifest["scales_file"] = f"scales-{version}.npy"
+            np.save(os.path.join(self.directory, manifest["scales_file"]), scales)
+        with open(os.path.join(self.directory, manifest["jobs_file"]), "w") as f:
+            json.dump(jobs, f)
+
+        tmp_manifest = f"{self.manifest_path}.tmp"
+        with open(tmp_manifest, "w") as f:
+            json.dump(manifest, f)
+        previous = self._version or version
+        os.replace(tmp_manifest, self.manifest_path)
+
+        self._remove_stale_files(previous)
+        self.load()
+
+    def _remove_stale_files(self, previous: int):
+        """Delete the files of the versions before `previous`, the one the new version just replaced."""
+        for name in os.listdir(self.directory):
+            if not name.startswith(("vectors-", "jobs-", "scales-")):
+                continue
+            version = name.split("-", 1)[1].split(".", 1)[0]
+            if version.isdigit() and int(version) < previous:
+                os.remove(os.path.join(self.directory, name))
+
+
+async def refresh_vector_index():
+    """Refresh the on-disk vector index from the jobs index."""
+    es_client = ElasticsearchClient()
+    try:
+        await JobVectorIndex().refresh(es_client)
+    finally:
+        await es_client.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(refresh_vector_index())
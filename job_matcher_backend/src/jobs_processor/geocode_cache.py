@@ -0,0 +1,120 @@
+import logging
+import os
+import sqlite3
+import time
+from typing import Optional
+from ..clients.single_flight import SingleFlight
+
+GEOCODE_CACHE_PATH = os.getenv("GEOCODE_CACHE_PATH", "./geocode_cache.sqlite3")
+# 2 decimals is a ~1 km grid, well below the size of a city
+GEOCODE_GRID_DECIMALS = int(os.getenv("GEOCODE_GRID_DECIMALS", "2"))
+# Coordinates without an address are looked up again after this many seconds
+GEOCODE_NEGATIVE_TTL = float(os.getenv("GEOCODE_NEGATIVE_TTL", "86400"))
+
+
+class GeocodeCache:
+    """
+    Reverse geocoding results keyed by coordinates rounded to a grid, persisted in a SQLite file.
+    The whole file is loaded into memory when a run starts and the new entries are written back
+    when it ends. Coordinates the geocoder has no address for are cached too, for `negative_ttl` seconds,
+    so they do not cost a request per job. Errors the geocoder raises are not cached, so the next job
+    in the cell tries again. Concurrent lookups of the same grid cell share one request.
+    """
+    def __init__(self, path: str = GEOCODE_CACHE_PATH, decimals: int = GEOCODE_GRID_DECIMALS,
+                 negative_ttl: float = GEOCODE_NEGATIVE_TTL):
+        self.path = path
+        self.decimals = decimals
+        self.negative_ttl = negative_ttl
+
+        # Key -> (location or None for no address, time it was resolved)
+        self._entries = {}
+        self._dirty = set()
+        self._loaded = False
+        self._in_flight = SingleFlight()
+
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def key(self, lat: float, lng: float) -> str:
+        return f"{lat:.{self.decimals}f},{lng:.{self.decimals}f}"
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path)
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS geocode ("
+            "key TEXT PRIMARY KEY, city TEXT, country TEXT, failed INTEGER NOT NULL, resolved_at REAL NOT NULL)"
+        )
+        return connection
+
+    def load(self):
+        """Read every cached entry into memory."""
+        with self._connect() as connection:
+            rows = connection.execute("SELECT key, city, country, failed, resolved_at FROM geocode").fetchall()
+        connection.close()
+        for key, city, country, failed, resolved_at in rows:
+            location = None if failed else {"city": city, "country": country}
+            self._entries[key] = (location, resolved_at)
+        self._loaded = True
+        logging.info(f"Loaded {len(rows)} geocoded locations from {self.path}")
+
+    def save(self):
+        """Write the entries resolved since the last save back to the file."""
+        if not self._dirty:
+            return
+        rows = []
+        for key in self._dirty:
+            location, resolved_at = self._entries[key]
+            rows.append((key, location and location["city"], location and location["country"],
+                         int(location is None), resolved_at))
+        with self._connect() as connection:
+            connection.executemany("INSERT OR REPLACE INTO geocode VALUES (?, ?, ?, ?, ?)", rows)
+        connection.close()
+        self._dirty.clear()
+        logging.info(f"Saved {len(rows)} geocoded locations, cache stats: {self.stats()}")
+
+    async def resolve(self, lat: float, lng: float, geocode) -> Optional[dict]:
+        """
+        Return the location of the coordinates' grid cell, calling `geocode(lat, lng)` on a miss.
+        None means the geocoder has no address for them, now or recently; its errors are raised.
+        """
+        if not self._loaded:
+            self.load()
+        key = self.key(lat, lng)
+        entry = self._entries.get(key)
+        if entry is not None:
+            location, resolved_at = entry
+            if location is not None:
+                self.hits += 1
+                return dict(location)
+            if time.time() - resolved_at < self.negative_ttl:
+                self.negative_hits += 1
+                return None
+
+        self.misses += 1
+        location = await self._in_flight.do(key, lambda: self._geocode(key, lat, lng, geocode))
+        return dict(location) if location else None
+
+    async def _geocode(self, key: str, lat: float, lng: float, geocode) -> Optional[dict]:
+        try:
+            location = await geocode(lat, lng)
+        except Exception:
+            self.errors += 1
+            raise
+        self._entries[key] = (location, time.time())
+        self._dirty.add(key)
+        return location
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "lookups": lookups,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "geocode_requests": self._in_flight.calls,
+            "hit_rate": (self.hits + self.negative_hits) / lookups if lookups else 0.0
+        }
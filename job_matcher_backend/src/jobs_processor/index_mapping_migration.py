@@ -0,0 +1,41 @@
+import logging
+import argparse
+import asyncio
+from ..clients.es_client import ElasticsearchClient
+
+logging.basicConfig(level=logging.INFO)
+es_client = ElasticsearchClient()
+
+
+async def migrate_index_mappings(reindex: bool):
+    """
+    Report the indices whose mapping differs from the one the code expects and,
+    with `reindex`, rebuild them behind an alias from their stored documents.
+    """
+    try:
+        drift = await es_client.ensure_indices_exist(reindex=reindex)
+        if not drift:
+            logging.info("✅ All index mappings are up to date.")
+            return
+        for index, changes in drift.items():
+            logging.info(f"{index}: {', '.join(changes)}")
+        if reindex:
+            logging.info(f"✅ Reindexed {len(drift)} indices.")
+        else:
+            logging.info("Run again with --reindex to rebuild them.")
+    finally:
+        await es_client.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Index mapping drift check and migration")
+    parser.add_argument(
+        "--reindex",
+        action="store_true",
+        help="Rebuild the outdated indices behind an alias instead of only reporting them"
+    )
+    args = parser.parse_args()
+
+    asyncio.run(migrate_index_mappings(args.reindex))
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,62 @@
 import logging
 from datetime import datetime
 from ..clients.es_client import ElasticsearchClient
+from ..clients.invalidation_events import JOBS_REMOVED
+from ..jobs_matcher.vector_index import JobVectorIndex, MATCHER_BACKEND
 import asyncio
 
 logging.basicConfig(level=logging.INFO)
 es_client = ElasticsearchClient()
 
 async def remove_expired_jobs():
-    """Delete jobs from Elasticsearch where expiration_date < today."""
-    today = datetime.today().strftime("%Y-%m-%d")
-    query = {
-        "range": {
-            "expiration_date": {"lt": today}
+    """
+    Remove jobs where expiration_date < today, then the applications pointing at them.
+    Partitions of past months are dropped whole; only the current month's partition
+    needs a delete by query, so the vector index is not left with tombstones to merge away.
+    The delete runs as a sliced background task that is polled until it completes.
+    """
+    try:
+        today = datetime.today().strftime("%Y-%m-%d")
+        query = {
+            "range": {
+                "expiration_date": {"lt": today}
+            }
         }
-    }
-    
-    logging.info(f"Removing expired jobs with expiration_date < {today}")
-    result = await es_client.client.delete_by_query(
-        index="jobs",
-        body={"query": query}
-    )
-    logging.info(f"Deleted {result['deleted']} expired jobs.")
-
-    await es_client.client.close()
+
+        if await es_client.jobs_partitioned():
+            partitions = await es_client.expired_job_partitions(today)
+            index = es_client.jobs_partition(today)
+        else:
+            # Legacy single index, before the partition migration
+            partitions = []
+            index = "jobs"
+
+        # IDs are collected first so the applications can be removed with the jobs
+        removed_ids, user_ids = [], []
+        if partitions:
+            removed_ids = await es_client.scan_job_ids(",".join(partitions))
+            await es_client.drop_job_partitions(partitions)
+            logging.info(f"Dropped {len(partitions)} expired job partitions: {partitions}")
+            # Cascaded before the delete by query, which may fail after the partitions are gone
+            user_ids = await es_client.delete_applications_for_jobs(removed_ids)
+
+        expired_ids = await es_client.scan_job_ids(index, query)
+        logging.info(f"Removing expired jobs with expiration_date < {today} from {index}")
+        result = await es_client.delete_jobs_by_query(index, query)
+        removed_ids = removed_ids + expired_ids
+        logging.info(f"Deleted {result.get('deleted', 0)} expired jobs, {len(removed_ids)} in total.")
+
+        user_ids = sorted(set(user_ids) | set(await es_client.delete_applications_for_jobs(expired_ids)))
+
+        await es_client.store_location_facets()
+        logging.info("Updated location facets.")
+
+        await es_client.publish_invalidation_event(JOBS_REMOVED, {"job_count": len(removed_ids), "user_ids": user_ids})
+
+        if MATCHER_BACKEND == "memmap":
+            await JobVectorIndex().refresh(es_client)
+    finally:
+        await es_client.close()
 
 if __name__ == "__main__":
     asyncio.run(remove_expired_jobs())
\ No newline at end of file
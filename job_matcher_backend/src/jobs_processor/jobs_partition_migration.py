@@ -0,0 +1,70 @@
+import logging
+import asyncio
+from datetime import datetime
+from ..clients.es_client import ElasticsearchClient, JOBS_ALIAS, JOBS_PARTITION_PREFIX, JOBS_UNDATED_PARTITION
+
+logging.basicConfig(level=logging.INFO)
+es_client = ElasticsearchClient()
+
+# Routes each job to the partition of its expiration month, undated jobs stay in the default destination
+PARTITION_SCRIPT = f"""
+if (ctx._source.expiration_date != null) {{
+    String date = ctx._source.expiration_date;
+    ctx._index = '{JOBS_PARTITION_PREFIX}' + date.substring(0, 4) + '.' + date.substring(5, 7);
+}}
+"""
+
+
+async def migrate_jobs_to_partitions():
+    """
+    Move the legacy single `jobs` index into expiration month partitions behind the `jobs` alias.
+    Stored documents, embeddings included, are copied with a reindex; the legacy index is then
+    replaced by the alias in one atomic step. Run it while no ingestion run is writing jobs.
+    """
+    if await es_client.client.indices.exists_alias(name=JOBS_ALIAS):
+        logging.info("✅ Jobs are already partitioned.")
+        return
+    if not await es_client.client.indices.exists(index=JOBS_ALIAS):
+        await es_client.ensure_jobs_partitions()
+        logging.info("✅ No legacy jobs index, created the partitioned layout.")
+        return
+
+    # The alias name is taken by the legacy index until the swap, so partitions are created without it
+    await es_client.client.indices.put_index_template(
+        name=JOBS_ALIAS, **es_client.jobs_index_template(with_alias=False)
+    )
+    response = await es_client.client.options(request_timeout=None).reindex(
+        source={"index": JOBS_ALIAS},
+        dest={"index": JOBS_UNDATED_PARTITION, "op_type": "create"},
+        script={"lang": "painless", "source": PARTITION_SCRIPT},
+        conflicts="proceed",
+        refresh=True,
+        wait_for_completion=True
+    )
+    for failure in response.get("failures", []):
+        logging.error(f"❌ Failed to copy job: {failure}")
+    if response.get("failures"):
+        logging.error("❌ Some jobs could not be copied, the legacy index is kept.")
+        return
+
+    # The current month's partition always exists, so the alias is never left without an index
+    current = es_client.jobs_partition(datetime.today().strftime("%Y-%m-%d"))
+    await es_client.create_jobs_partition(current)
+
+    partitions = list(await es_client.client.indices.get(index=f"{JOBS_PARTITION_PREFIX}*"))
+    await es_client.client.indices.update_aliases(actions=[
+        {"add": {"indices": partitions, "alias": JOBS_ALIAS}},
+        {"remove_index": {"index": JOBS_ALIAS}}
+    ])
+    await es_client.ensure_jobs_partitions()
+    logging.info(f"✅ Copied {response.get('created', 0)} jobs into {len(partitions)} partitions: {sorted(partitions)}")
+
+
+async def main():
+    try:
+        await migrate_jobs_to_partitions()
+    finally:
+        await es_client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,13 +1,18 @@
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import argparse
 import asyncio
 from datetime import datetime
 
 from ..clients.openai_embedding_client import OpenAIEmbeddingClient
+from ..clients.embedding_batcher import EmbeddingBatcher
 from ..clients.es_client import ElasticsearchClient
+from ..jobs_matcher.vector_index import JobVectorIndex, MATCHER_BACKEND
+from ..jobs_matcher.recommendations_builder import build_user_recommendations
 from ..preprocessor.preprocessor import TextPreprocessor
+from .work_queue import WorkQueue, DONE, FAILED
 from .utils import (
+    http_client,
+    geocode_cache,
     get_latest_job_id,
     process_job,
     generate_job_id,
@@ -20,145 +25,204 @@ MAX_INITIAL_JOBS = 100
 DEPARTMENT_ID = 57
 MAX_CONCURRENT = 10
 
+ALL_QUEUE = "ejobs"
+DEPARTMENT_QUEUE = f"ejobs_dept{DEPARTMENT_ID}"
+
+JOB_INDEXED = "indexed"
+JOB_SKIPPED = "skipped"
+JOB_FAILED = "failed"
+
 embedding_client = OpenAIEmbeddingClient()
+embedding_batcher = EmbeddingBatcher(embedding_client)
 es_client = ElasticsearchClient()
 text_preprocessor = TextPreprocessor()
+work_queue = WorkQueue()
 
 
-async def process_single_job(job_id, semaphore):
-    """Process and index a single job by job ID."""
+async def process_single_job(job_id, semaphore, writer):
+    """
+    Process a single job by job ID and queue it for bulk indexing.
+    Returns the job ID with "indexed", "skipped" for postings that are gone or unusable,
+    or "failed" for errors worth retrying in a later run.
+    """
     async with semaphore:
-        job = await asyncio.to_thread(process_job, job_id)
+        try:
+            job = await process_job(job_id)
+        except Exception as e:
+            logging.error(f"❌ Failed to fetch job {job_id}: {e}")
+            return job_id, JOB_FAILED
         if not job:
-            return None, job_id
+            return job_id, JOB_SKIPPED
 
         try:
             embedding_description = clean_html_for_embedding(job["description"])
             embedding_input = f"{job['job_title']}\n{embedding_description}\n{job['meta_tags']}"
             preprocessed_description = await text_preprocessor.preprocess_job(embedding_input)
-            embedding_response = await embedding_client.create(preprocessed_description)
-            job["embedding"] = embedding_response.data[0].embedding
-            job.pop("meta_tags", None)
-            doc_id = generate_job_id(job)
-            await es_client.index_job(doc_id, job)
-            logging.info(f"✅ Indexed job {job['site_id']} | {job['job_title']}")
-            return job_id, None
         except Exception as e:
-            logging.error(f"❌ Failed to process/index job {job.get('site_id')}: {e}")
-            return None, job_id
+            logging.error(f"❌ Failed to process job {job.get('site_id')}: {e}")
+            return job_id, JOB_FAILED
+
+    # Embed and index outside the semaphore: the slot goes to the next job while this one
+    # waits for its embedding batch and bulk flush
+    try:
+        job["embedding"] = await embedding_batcher.embed(preprocessed_description)
+        job.pop("meta_tags", None)
+        doc_id = generate_job_id(job)
+        partition = await es_client.jobs_write_index(job.get("expiration_date"))
+        indexed = await writer.index(doc_id, job, index=partition)
+    except Exception as e:
+        logging.error(f"❌ Failed to process job {job.get('site_id')}: {e}")
+        return job_id, JOB_FAILED
+
+    try:
+        await indexed
+        logging.info(f"✅ Indexed job {job['site_id']} | {job['job_title']}")
+        return job_id, JOB_INDEXED
+    except Exception as e:
+        logging.error(f"❌ Failed to index job {job.get('site_id')}: {e}")
+        return job_id, JOB_FAILED
+
+
+def log_run_results(mode, results, already_indexed=0):
+    """Log how many jobs of a run were indexed and which ones were skipped or failed."""
+    skipped = [job_id for job_id, status in results if status == JOB_SKIPPED]
+    failed = [job_id for job_id, status in results if status == JOB_FAILED]
+    logging.info(
+        f"Run '{mode}': {len(results) - len(skipped) - len(failed)} indexed, {len(skipped)} skipped, "
+        f"{len(failed)} failed, {already_indexed} already indexed"
+    )
+    if skipped:
+        logging.info(f"Skipped job IDs: {skipped}")
+    if failed:
+        logging.info(f"Failed job IDs: {failed}")
+
+
+async def claim_unindexed_jobs(queue, limit=None):
+    """
+    Claim up to `limit` jobs whose postings are not indexed yet. Only the claimed jobs are checked
+    against the index, and the ones found there are marked done, so no job is checked twice and
+    the checks do not grow with the backlog. Returns the claimed jobs and how many were already indexed.
+    """
+    claimed, known = [], 0
+    while True:
+        batch = work_queue.claim(queue, None if limit is None else limit - len(claimed))
+        if not batch:
+            break
+        indexed = await es_client.get_indexed_site_ids([item["job_id"] for item in batch])
+        work_queue.mark(queue, indexed, DONE)
+        known += len(indexed)
+        claimed.extend(item for item in batch if item["job_id"] not in indexed)
+        if limit is None or len(claimed) >= limit:
+            break
+    return claimed, known
 
 
-async def process_and_index_new_jobs():
-    """Process and index new jobs from ejobs.ro in parallel."""
+async def run_queued_jobs(queue, mode, force_merge=False, limit=None):
+    """
+    Claim jobs from a work queue and process them, skipping the postings that are already
+    indexed. Failed jobs go back to the queue for a later run.
+    """
+    claimed, known = await claim_unindexed_jobs(queue, limit)
+    if not claimed:
+        # Opening the bulk writer would toggle refresh on every partition for nothing
+        logging.info("No new jobs to process.")
+        logging.info(f"Queue '{queue}': {work_queue.counts(queue)}")
+        return
+    logging.info(f"Scraping {len(claimed)} queued jobs, {known} claimed ones were already indexed")
+
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT)
+    async with es_client.bulk_writer("jobs", force_merge=force_merge) as writer:
+        tasks = [process_single_job(item["job_id"], semaphore, writer) for item in claimed]
+        results = await asyncio.gather(*tasks)
+    work_queue.mark(queue, [job_id for job_id, status in results if status != JOB_FAILED], DONE)
+    work_queue.mark(queue, [job_id for job_id, status in results if status == JOB_FAILED], FAILED)
+
+    log_run_results(mode, results, known)
+    logging.info(f"Queue '{queue}': {work_queue.counts(queue)}")
+
+
+async def process_and_index_new_jobs(force_merge=False):
+    """
+    Process and index new jobs from ejobs.ro in parallel.
+    Every posting ID since the checkpoint is queued, and each run works through up to MAX_DAILY_JOBS
+    of them, oldest first. The checkpoint only advances past IDs that are done or out of retries,
+    so a backlog drains over several runs and an interrupted run resumes where it stopped.
+    """
     metadata = await es_client.get_metadata("last_ejobs")
     last_indexed_id = metadata.get("id")
-    last_indexed_creation_date = metadata.get("creation_date")
 
-    latest_job_id, latest_job_creation_date = await asyncio.to_thread(get_latest_job_id)
-    if not latest_job_id:
+    latest = await get_latest_job_id()
+    if not latest:
         logging.error("❌ Failed to fetch latest job ID from ejobs.ro")
         return
+    latest_job_id, latest_job_creation_date = latest
 
     if last_indexed_id is None:
         logging.warning(
             f"⚠️ No last_ejobs_indexed_id found. Will process last {MAX_INITIAL_JOBS} jobs."
         )
         last_indexed_id = max(0, latest_job_id - MAX_INITIAL_JOBS)
-    elif last_indexed_id >= latest_job_id:
-        logging.info(
-            f"✅ No new jobs to process. Last indexed job ID {last_indexed_id} is up to date."
-        )
-        return
-
-    newest_scraped_id = latest_job_id
-    newest_scraped_creation_date = latest_job_creation_date
-
-    MAX_DAILY_JOBS = 50
-    job_ids = list(range(latest_job_id, last_indexed_id, -1))
-    if len(job_ids) > MAX_DAILY_JOBS:
-        logging.info(f"⚠️ Limiting job processing to {MAX_DAILY_JOBS} jobs")
-        job_ids = job_ids[:MAX_DAILY_JOBS]
-    logging.info(
-        f"Scraping {len(job_ids)} jobs from ID {job_ids[0]} down to {job_ids[-1]}"
-    )
-
-    semaphore = asyncio.Semaphore(MAX_CONCURRENT)
-    tasks = [process_single_job(job_id, semaphore) for job_id in job_ids]
-
-    results = await asyncio.gather(*tasks)
 
-    await es_client.update_metadata(
-        "last_ejobs",
-        {"id": newest_scraped_id, "creation_date": newest_scraped_creation_date}
+    queued = work_queue.enqueue(
+        ALL_QUEUE,
+        [(job_id, job_id, None) for job_id in range(last_indexed_id + 1, latest_job_id + 1)]
     )
-    logging.info(f"✅ Updated metadata: last_ejobs = {newest_scraped_id}")
+    logging.info(f"Queued {queued} new job IDs up to {latest_job_id}")
 
+    MAX_DAILY_JOBS = 50
+    await run_queued_jobs(ALL_QUEUE, "all", force_merge, limit=MAX_DAILY_JOBS)
 
-async def process_single_department_job(job_summary,semaphore):
-    """Process and index a single job from a department."""
-    async with semaphore:
-        job_id = job_summary["id"]
-        job = await asyncio.to_thread(process_job, job_id)
-        if not job:
-            logging.info(f"Skipping job {job_id}: not found or empty.")
-            return None, job_id
-
-        try:
-            embedding_description = clean_html_for_embedding(job["description"])
-            embedding_input = f"{job['job_title']}\n{embedding_description}\n{job['meta_tags']}"
-            preprocessed_description = await text_preprocessor.preprocess_job(embedding_input)
-            embedding_response = await embedding_client.create(preprocessed_description)
-            job["embedding"] = embedding_response.data[0].embedding
-            job.pop("meta_tags", None)
-            doc_id = generate_job_id(job)
-            await es_client.index_job(doc_id, job)
-            logging.info(f"✅ Indexed job {job['site_id']} | {job['job_title']}")
-            return job_id, None
-        except Exception as e:
-            logging.error(f"❌ Failed to index job {job.get('site_id')}: {e}")
-            return None, job_id
+    checkpoint = work_queue.checkpoint(ALL_QUEUE)
+    if checkpoint and checkpoint["job_id"] > last_indexed_id:
+        # Only the latest posting's date is known here, an earlier checkpoint keeps the stored one
+        creation_date = (
+            latest_job_creation_date if checkpoint["job_id"] == latest_job_id else metadata.get("creation_date")
+        )
+        await es_client.update_metadata(
+            "last_ejobs",
+            {"id": checkpoint["job_id"], "creation_date": creation_date}
+        )
+        work_queue.prune(ALL_QUEUE, checkpoint["position"])
+        logging.info(f"✅ Updated metadata: last_ejobs = {checkpoint['job_id']}")
 
 
-async def process_and_index_jobs_from_department():
-    """Process and index new jobs from a specific department in parallel."""
+async def process_and_index_jobs_from_department(force_merge=False):
+    """
+    Process and index new jobs from a specific department in parallel, through the work queue
+    ordered by creation date; the checkpoint date only advances past resolved jobs.
+    """
     metadata = await es_client.get_metadata("last_ejobs_dept57")
-    last_indexed_id = metadata.get("id")
     last_indexed_creation_date = metadata.get("creation_date")
 
-    if last_indexed_id is None:
+    if last_indexed_creation_date is None:
         logging.warning(
             "⚠️ No last_ejobs_dept57_indexed_id found. Fetching last 300 jobs."
         )
-        last_indexed_id = 0
 
-    jobs = await asyncio.to_thread(fetch_new_jobs_from_department, DEPARTMENT_ID, last_indexed_creation_date, 300)
+    jobs = await fetch_new_jobs_from_department(DEPARTMENT_ID, last_indexed_creation_date, 300)
     logging.info(
         f"Total new jobs fetched for department {DEPARTMENT_ID}: {len(jobs)}"
     )
 
-    if not jobs:
-        logging.info("No new jobs to process.")
-        return
-    
     def parse_dt(job):
         return datetime.fromisoformat(job["creationDate"].replace("Z", "+00:00"))
-    newest_job = max(jobs, key=parse_dt)
-    newest_job_id = newest_job["id"]
-    newest_job_creation_date = newest_job["creationDate"]
-
-    semaphore = asyncio.Semaphore(MAX_CONCURRENT)
-    tasks = [process_single_department_job(job_summary, semaphore) for job_summary in jobs]
+    work_queue.enqueue(
+        DEPARTMENT_QUEUE,
+        [(job["id"], parse_dt(job).timestamp(), job["creationDate"]) for job in jobs]
+    )
 
-    results = await asyncio.gather(*tasks)
+    await run_queued_jobs(DEPARTMENT_QUEUE, "department", force_merge)
 
-    await es_client.update_metadata(
-        "last_ejobs_dept57",
-        {"id": newest_job_id, "creation_date": newest_job_creation_date
-    })
-    
-    logging.info(
-        f"✅ Updated metadata: last_ejobs_dept57 = {newest_job_id}, {newest_job_creation_date}"
-    )
+    checkpoint = work_queue.checkpoint(DEPARTMENT_QUEUE)
+    if checkpoint and checkpoint["payload"] != last_indexed_creation_date:
+        await es_client.update_metadata(
+            "last_ejobs_dept57",
+            {"id": checkpoint["job_id"], "creation_date": checkpoint["payload"]}
+        )
+        work_queue.prune(DEPARTMENT_QUEUE, checkpoint["position"])
+        logging.info(
+            f"✅ Updated metadata: last_ejobs_dept57 = {checkpoint['job_id']}, {checkpoint['payload']}"
+        )
 
 def main():
     parser = argparse.ArgumentParser(description="Job processing options")
@@ -168,18 +232,43 @@ def main():
         default="both",
         help="Which job processing to run: all (default), department, or both"
     )
+    parser.add_argument(
+        "--force-merge",
+        action="store_true",
+        help="Force merge the jobs index after indexing (useful after large backfills)"
+    )
     args = parser.parse_args()
 
     async def run_all():
-        if args.mode == "all":
-            await process_and_index_new_jobs()
-        elif args.mode == "both":
-            await process_and_index_new_jobs()
-            await process_and_index_jobs_from_department()
-        elif args.mode == "department":
-            await process_and_index_jobs_from_department()
-        
-        await es_client.client.close()
+        try:
+            # New partitions must be created from the template, not with dynamic mappings
+            await es_client.ensure_jobs_partitions()
+            geocode_cache.load()
+
+            try:
+                if args.mode == "all":
+                    await process_and_index_new_jobs(args.force_merge)
+                elif args.mode == "both":
+                    await process_and_index_new_jobs(args.force_merge)
+                    await process_and_index_jobs_from_department(args.force_merge)
+                elif args.mode == "department":
+                    await process_and_index_jobs_from_department(args.force_merge)
+            finally:
+                await embedding_batcher.close()
+                logging.info(f"Preprocessing cache stats: {text_preprocessor.cache.stats()}")
+                # Locations resolved before a failure still save requests on the next run
+                geocode_cache.save()
+
+            await es_client.store_location_facets()
+            logging.info("✅ Updated location facets")
+
+            if MATCHER_BACKEND == "memmap":
+                await JobVectorIndex().refresh(es_client)
+
+            await build_user_recommendations(es_client)
+        finally:
+            await http_client.close()
+            await es_client.close()
 
     asyncio.run(run_all())
 
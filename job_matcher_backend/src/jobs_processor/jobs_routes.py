@@ -1,24 +1,40 @@
+from typing import Optional
 from fastapi import APIRouter, Depends, Query, HTTPException
 from fastapi.responses import JSONResponse
 from ..clients.firebase.verify_token import get_current_user
-from ..dependencies.dependencies import get_es_client
+from ..clients.es_client import KEYWORD_SEARCH_SIZE, SUGGEST_SIZE
+from ..dependencies.dependencies import get_es_client, get_location_facets
 from ..types.types import SearchRequest, BaseJob
+from ..types.responses import ModelJSONResponse
 
 router = APIRouter(
     prefix="/search_jobs",
-    tags=["Job Search"]
+    tags=["Job Search"],
+    default_response_class=ModelJSONResponse
 )
 
 @router.get("/countries")
-async def get_countries(es_client = Depends(get_es_client)):
-    countries = await es_client.get_jobs_countries()
+async def get_countries(location_facets = Depends(get_location_facets)):
+    countries = await location_facets.get_countries()
     return countries
 
 @router.get("/cities")
-async def get_cities(country: str = Query(...), es_client = Depends(get_es_client)):
-    cities = await es_client.get_jobs_cities(country)
+async def get_cities(country: str = Query(...), location_facets = Depends(get_location_facets)):
+    cities = await location_facets.get_cities(country)
     return cities
 
+@router.get("/suggest", response_model=list[str])
+async def suggest_job_titles(
+    q: str = Query(..., min_length=1, max_length=100),
+    size: int = Query(SUGGEST_SIZE, ge=1, le=20),
+    es_client = Depends(get_es_client)
+):
+    """Job titles completing the typed prefix, for the search box typeahead."""
+    try:
+        return await es_client.suggest_job_titles(q, size)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/{job_id}")
 async def get_job(
     job_id: str,
@@ -28,17 +44,26 @@ async def get_job(
         job = await es_client.get_job(job_id)
         if not job:
             return JSONResponse(content={"error": "Job not found"}, status_code=404)
-        return {"job": job}
+        return ModelJSONResponse({"job": job})
     except Exception as e:
         return JSONResponse(content={"error": "Failed to retrieve job", "details": str(e)}, status_code=500)
     
 @router.post("", response_model=list[BaseJob])
 async def job_search(
     request: SearchRequest,
+    page_size: int = Query(KEYWORD_SEARCH_SIZE, ge=1, le=100),
+    cursor: Optional[str] = None,
     user_id: str = Depends(get_current_user),
     es_client = Depends(get_es_client)
 ):
+    """Search jobs; the cursor of the next page, if any, is returned in the X-Next-Cursor header."""
     try:
-        return await es_client.search_jobs_by_keyword_with_similarity(request, user_id)
+        jobs, next_cursor = await es_client.search_jobs_by_keyword_with_similarity(
+            request, user_id, page_size=page_size, cursor=cursor
+        )
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+        return ModelJSONResponse(jobs, headers=headers)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
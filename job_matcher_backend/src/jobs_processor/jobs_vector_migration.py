@@ -0,0 +1,37 @@
+import logging
+import argparse
+import asyncio
+from ..clients.es_client import ElasticsearchClient, VECTOR_INDEX_TYPES
+
+logging.basicConfig(level=logging.INFO)
+es_client = ElasticsearchClient()
+
+
+async def migrate_jobs_vectors(index_type: str, force_merge: bool):
+    """Switch the jobs embedding field to a quantized HNSW index type."""
+    try:
+        logging.info(f"Migrating jobs embeddings to {index_type}")
+        result = await es_client.migrate_jobs_vector_index_type(index_type, force_merge=force_merge)
+        logging.info(f"✅ Jobs embeddings are indexed as {result}")
+    finally:
+        await es_client.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Jobs vector quantization migration")
+    parser.add_argument(
+        "--type",
+        choices=VECTOR_INDEX_TYPES,
+        required=True,
+        help="Target index_options type for the jobs embedding field"
+    )
+    parser.add_argument(
+        "--no-force-merge",
+        action="store_true",
+        help="Skip the force merge that rewrites existing segments in the new format"
+    )
+    args = parser.parse_args()
+
+    asyncio.run(migrate_jobs_vectors(args.type, not args.no_force_merge))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import asyncio
+import logging
+import os
+import time
+from ..clients.es_client import ElasticsearchClient
+
+FACETS_VERSION_CHECK_INTERVAL = float(os.getenv("FACETS_VERSION_CHECK_INTERVAL", "30"))
+
+
+class LocationFacets:
+    """
+    In-process copy of the country -> cities facet tree materialized by the jobs processor.
+    Reads are served from memory; the stored version is checked at most every
+    `check_interval` seconds and the tree is reloaded only when it changed.
+    """
+    def __init__(self, es_client: ElasticsearchClient, check_interval: float = FACETS_VERSION_CHECK_INTERVAL):
+        self.es_client = es_client
+        self.check_interval = check_interval
+
+        self._version = None
+        self._checked_at = None
+        self._countries = []
+        self._cities = {}
+        self._lock = asyncio.Lock()
+
+    async def get_countries(self) -> list[str]:
+        """Return all countries with job postings, most jobs first."""
+        await self._ensure_fresh()
+        return self._countries
+
+    async def get_cities(self, country: str) -> list[str]:
+        """Return all cities with job postings for a country, most jobs first."""
+        await self._ensure_fresh()
+        return self._cities.get(country, [])
+
+    def invalidate(self):
+        """Check the stored version on the next read instead of waiting for the check interval."""
+        self._checked_at = None
+
+    async def _ensure_fresh(self):
+        if self._is_checked_recently():
+            return
+        async with self._lock:
+            # Concurrent requests wait for the first one to finish the check
+            if self._is_checked_recently():
+                return
+            version = await self.es_client.get_location_facets_version()
+            if version is None:
+                logging.info("No materialized location facets found, building them now.")
+                self._load(await self.es_client.store_location_facets())
+            elif version != self._version:
+                self._load(await self.es_client.get_metadata("location_facets"))
+            self._checked_at = time.monotonic()
+
+    def _is_checked_recently(self) -> bool:
+        return self._checked_at is not None and time.monotonic() - self._checked_at < self.check_interval
+
+    def _load(self, document: dict):
+        facets = document.get("facets", [])
+        self._countries = [facet["country"] for facet in facets]
+        self._cities = {facet["country"]: [city["city"] for city in facet["cities"]] for facet in facets}
+        self._version = document.get("version")
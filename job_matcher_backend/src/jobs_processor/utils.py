@@ -1,12 +1,15 @@
-import requests
+import asyncio
 import logging
 import hashlib
-import json
 from typing import List, Dict, Optional
 from datetime import datetime
+from urllib.parse import urlsplit
 import os
 import html
+import aiohttp
 from bs4 import BeautifulSoup
+from ..clients.http_client import AsyncHttpClient, SCRAPER_RATE_LIMIT, SCRAPER_BURST
+from .geocode_cache import GeocodeCache
 
 GOOGLE_GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
 GOOGLE_MAPS_API_KEY = os.getenv("GOOGLE_MAPS_API_KEY")
@@ -21,8 +24,12 @@ HEADERS = {
     "Referer": "https://www.ejobs.ro/",
 }
 
-session = requests.Session()
-session.headers.update(HEADERS)
+# ejobs.ro requests share the politeness budget; geocoding is only limited by concurrency
+http_client = AsyncHttpClient(
+    headers=HEADERS,
+    rate_limits={urlsplit(API_BASE).hostname: (SCRAPER_RATE_LIMIT, SCRAPER_BURST)}
+)
+geocode_cache = GeocodeCache()
 
 def clean_html_for_embedding(html_text: str) -> str:
     """Clean HTML and return plain text for embedding."""
@@ -42,33 +49,40 @@ def clean_html(raw_text):
     """Unescape and strip HTML entities from text."""
     return html.unescape(raw_text).strip()
 
-def get_location_from_coords(lat: float, lng: float) -> dict:
-    """Return a dict with city and country based on lat/lng."""
+async def get_location_from_coords(lat: float, lng: float) -> dict:
+    """Return a dict with city and country based on lat/lng, geocoding only on a cache miss."""
     try:
-        params = {"latlng": f"{lat},{lng}", "key": GOOGLE_MAPS_API_KEY}
-        response = requests.get(GOOGLE_GEOCODE_URL, params=params, timeout=10)
-        response.raise_for_status()
-
-        data = response.json()
-        if data.get("status") != "OK":
-            logging.warning(f"Geocoding API status not OK: {data.get('status')}")
-            return {"city": "Unknown", "country": "Unknown"}
-
-        components = data["results"][0]["address_components"]
-
-        city = next(
-            (c["long_name"] for c in components if "locality" in c["types"]),
-            "Unknown"
-        )
-        country = next(
-            (c["long_name"] for c in components if "country" in c["types"]),
-            "Unknown"
-        )
-        return {"city": city, "country": country}
-
+        location = await geocode_cache.resolve(lat, lng, geocode_coords)
     except Exception as e:
         logging.error(f"Geocoding failed: {e}")
-        return {"city": "Unknown", "country": "Unknown"}
+        location = None
+    return location or {"city": "Unknown", "country": "Unknown"}
+
+async def geocode_coords(lat: float, lng: float) -> Optional[dict]:
+    """
+    Reverse geocode lat/lng with the Google Geocoding API.
+    Returns None when Google has no address for the coordinates; errors that may pass,
+    like network failures or OVER_QUERY_LIMIT, raise so that they are not cached.
+    """
+    params = {"latlng": f"{lat},{lng}", "key": GOOGLE_MAPS_API_KEY}
+    data = await http_client.get_json(GOOGLE_GEOCODE_URL, params=params) or {}
+    status = data.get("status")
+    if status == "ZERO_RESULTS" or (status == "OK" and not data.get("results")):
+        return None
+    if status != "OK":
+        raise RuntimeError(f"Geocoding API status {status}: {data.get('error_message', '')}")
+
+    components = data["results"][0]["address_components"]
+
+    city = next(
+        (c["long_name"] for c in components if "locality" in c["types"]),
+        "Unknown"
+    )
+    country = next(
+        (c["long_name"] for c in components if "country" in c["types"]),
+        "Unknown"
+    )
+    return {"city": city, "country": country}
 
 
 def generate_job_id(job: dict) -> str:
@@ -77,31 +91,24 @@ def generate_job_id(job: dict) -> str:
     return hashlib.sha256(unique_data.encode("utf-8")).hexdigest()
 
 
-def get_latest_job_id() -> Optional[int]:
+async def get_latest_job_id() -> Optional[int]:
     """Fetch the ID of the most recent job posting."""
     try:
-        response = session.get(f"{API_BASE}?page=1&pageSize=1&sort=date")
-        response.raise_for_status()
-        decoded_data = response.content.decode("utf-8", errors="replace")
-
-        latest_job = json.loads(decoded_data)["jobs"][0]
+        data = await http_client.get_json(API_BASE, params={"page": 1, "pageSize": 1, "sort": "date"})
+        latest_job = data["jobs"][0]
         return latest_job["id"], latest_job.get("creationDate")
     except Exception as e:
         logging.error(f"Failed to get latest job ID: {str(e)}")
         return None
     
-def process_job(job_id: int) -> Optional[Dict]:
+async def process_job(job_id: int) -> Optional[Dict]:
     """Fetch and process a single job posting."""
     try:
-        response = session.get(f"{API_BASE}/{job_id}")
-        
-        if response.status_code == 404:
+        job_data = await http_client.get_json(f"{API_BASE}/{job_id}")
+
+        if job_data is None:
             logging.info(f"❌ Job {job_id} not found (404)")
             return None
-        response.raise_for_status()
-
-        decoded_data = response.content.decode("utf-8", errors="replace")
-        job_data = json.loads(decoded_data)
         
         # Check expiration date
         if expiration_date := job_data.get("expirationDate"):
@@ -158,7 +165,7 @@ def process_job(job_id: int) -> Optional[Dict]:
             lat = location_data.get("latitude")
             lng = location_data.get("longitude")
             if lat and lng:
-                location = get_location_from_coords(lat, lng)
+                location = await get_location_from_coords(lat, lng)
                 logging.info(f"Geocoded location for {job_id}: {location}")
         
         return {
@@ -173,12 +180,15 @@ def process_job(job_id: int) -> Optional[Dict]:
             "date_uploaded": job_data.get("creationDate"),
         }
         
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        # Fetch failures are retried by a later run, unlike postings that cannot be indexed
+        raise
     except Exception as e:
         logging.error(f"❌ Error processing job {job_id}: {str(e)}")
         return None
     
 
-def fetch_new_jobs_from_department(department_id: int, last_indexed_creation_date: Optional[int], max_jobs: int = 300, page_size: int = 40) -> List[Dict]:
+async def fetch_new_jobs_from_department(department_id: int, last_indexed_creation_date: Optional[int], max_jobs: int = 300, page_size: int = 40) -> List[Dict]:
     """Fetch only jobs newer than last_indexed_id filtered by department."""
     jobs = []
     page = 1
@@ -189,12 +199,10 @@ def fetch_new_jobs_from_department(department_id: int, last_indexed_creation_dat
         last_dt = None
 
     while True:
-        url = f"https://api.ejobs.ro/jobs?page={page}&pageSize={page_size}&filters.departments={department_id}&sort=date"
+        params = {"page": page, "pageSize": page_size, "filters.departments": department_id, "sort": "date"}
         logging.info(f"Fetching jobs from department {department_id}, page {page}")
         try:
-            response = session.get(url)
-            response.raise_for_status()
-            data = response.json()
+            data = await http_client.get_json(API_BASE, params=params) or {}
             page_jobs = data.get("jobs", [])
             if not page_jobs:
                 logging.info("No more jobs found on this page.")
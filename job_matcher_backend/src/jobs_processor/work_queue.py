@@ -0,0 +1,129 @@
+import json
+import os
+import sqlite3
+import time
+from typing import Optional
+
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", "./job_queue.sqlite3")
+# A job claimed by a run that died is handed out again once its lease expires
+JOB_QUEUE_LEASE_TIMEOUT = float(os.getenv("JOB_QUEUE_LEASE_TIMEOUT", "1800"))
+JOB_QUEUE_MAX_ATTEMPTS = int(os.getenv("JOB_QUEUE_MAX_ATTEMPTS", "3"))
+
+PENDING = "pending"
+IN_PROGRESS = "in_progress"
+DONE = "done"
+FAILED = "failed"
+
+
+class WorkQueue:
+    """
+    Persistent per-job work queue of the ingestion runs, in a SQLite file.
+    Each named queue holds jobs ordered by a position (the posting ID, or its creation time), in one of
+    the states pending, in_progress, done or failed. Claimed jobs are leased; failed ones are claimed
+    again until they used up `max_attempts`. The checkpoint is the last job of the longest prefix
+    that is resolved, done or out of attempts, so it never moves past work that may still succeed.
+    """
+    def __init__(self, path: str = JOB_QUEUE_PATH, lease_timeout: float = JOB_QUEUE_LEASE_TIMEOUT,
+                 max_attempts: int = JOB_QUEUE_MAX_ATTEMPTS):
+        self.path = path
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=30)
+        if not self._initialized:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "queue TEXT NOT NULL, job_id INTEGER NOT NULL, position REAL NOT NULL, payload TEXT, "
+                "state TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, lease_until REAL, "
+                "PRIMARY KEY (queue, job_id))"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS jobs_position ON jobs (queue, position)")
+            connection.commit()
+            self._initialized = True
+        return connection
+
+    def _claimable(self) -> tuple[str, tuple]:
+        return (
+            "(state = ? OR (state = ? AND lease_until < ?) OR (state = ? AND attempts < ?))",
+            (PENDING, IN_PROGRESS, time.time(), FAILED, self.max_attempts)
+        )
+
+    def enqueue(self, queue: str, items: list[tuple]) -> int:
+        """Add `(job_id, position, payload)` items as pending, keeping the state of jobs already queued."""
+        with self._connect() as connection:
+            before = connection.total_changes
+            connection.executemany(
+                "INSERT OR IGNORE INTO jobs (queue, job_id, position, payload, state) VALUES (?, ?, ?, ?, ?)",
+                [(queue, job_id, position, json.dumps(payload), PENDING) for job_id, position, payload in items]
+            )
+            added = connection.total_changes - before
+        connection.close()
+        return added
+
+    def claim(self, queue: str, limit: Optional[int] = None) -> list[dict]:
+        """Lease up to `limit` claimable jobs, first positions first, and return them."""
+        condition, params = self._claimable()
+        connection = self._connect()
+        connection.isolation_level = None
+        try:
+            # An immediate transaction keeps two runs from claiming the same jobs
+            connection.execute("BEGIN IMMEDIATE")
+            rows = connection.execute(
+                f"SELECT job_id, payload FROM jobs WHERE queue = ? AND {condition} ORDER BY position, job_id LIMIT ?",
+                (queue, *params, -1 if limit is None else limit)
+            ).fetchall()
+            connection.executemany(
+                "UPDATE jobs SET state = ?, attempts = attempts + 1, lease_until = ? WHERE queue = ? AND job_id = ?",
+                [(IN_PROGRESS, time.time() + self.lease_timeout, queue, job_id) for job_id, _ in rows]
+            )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        finally:
+            connection.close()
+        return [{"job_id": job_id, "payload": json.loads(payload)} for job_id, payload in rows]
+
+    def mark(self, queue: str, job_ids, state: str):
+        """Move jobs to `done` or `failed`, releasing their lease."""
+        with self._connect() as connection:
+            connection.executemany(
+                "UPDATE jobs SET state = ?, lease_until = NULL WHERE queue = ? AND job_id = ?",
+                [(state, queue, job_id) for job_id in job_ids]
+            )
+        connection.close()
+
+    def checkpoint(self, queue: str) -> Optional[dict]:
+        """
+        Return the last job before the first unresolved one, as a dict with its `job_id`, `position`
+        and `payload`, or None if the first queued job is unresolved or the queue is empty.
+        """
+        with self._connect() as connection:
+            unresolved = connection.execute(
+                "SELECT MIN(position) FROM jobs WHERE queue = ? AND NOT (state = ? OR (state = ? AND attempts >= ?))",
+                (queue, DONE, FAILED, self.max_attempts)
+            ).fetchone()[0]
+            query = "SELECT job_id, position, payload FROM jobs WHERE queue = ?"
+            params = (queue,)
+            if unresolved is not None:
+                query += " AND position < ?"
+                params += (unresolved,)
+            row = connection.execute(query + " ORDER BY position DESC, job_id DESC LIMIT 1", params).fetchone()
+        connection.close()
+        if row is None:
+            return None
+        return {"job_id": row[0], "position": row[1], "payload": json.loads(row[2])}
+
+    def prune(self, queue: str, position: float):
+        """Drop the resolved jobs up to a checkpoint's position."""
+        with self._connect() as connection:
+            connection.execute("DELETE FROM jobs WHERE queue = ? AND position <= ?", (queue, position))
+        connection.close()
+
+    def counts(self, queue: str) -> dict:
+        with self._connect() as connection:
+            rows = connection.execute("SELECT state, COUNT(*) FROM jobs WHERE queue = ? GROUP BY state", (queue,)).fetchall()
+        connection.close()
+        return dict(rows)
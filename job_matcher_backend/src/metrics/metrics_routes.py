@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Depends
+from ..clients.single_flight import single_flight_stats
+from ..dependencies.dependencies import get_es_client, get_preprocessor
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["Metrics"]
+)
+
+@router.get("")
+async def get_metrics(es_client = Depends(get_es_client), preprocessor = Depends(get_preprocessor)):
+    """Runtime metrics of the shared clients and caches."""
+    return {
+        "elasticsearch_pool": es_client.pool_stats(),
+        "match_context_cache": es_client.match_context_cache.stats(),
+        "preprocess_cache": preprocessor.cache.stats(),
+        "single_flight": single_flight_stats()
+    }
@@ -0,0 +1,94 @@
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+from typing import Optional
+
+PREPROCESS_CACHE_PATH = os.getenv("PREPROCESS_CACHE_PATH", "./preprocess_cache.sqlite3")
+PREPROCESS_CACHE_MAX_ENTRIES = int(os.getenv("PREPROCESS_CACHE_MAX_ENTRIES", "50000"))
+
+
+class PreprocessingCache:
+    """
+    Persistent cache of GPT preprocessing outputs in a SQLite file, shared by the API and the cron jobs.
+    Entries are addressed by the prompt version, the model, the sampling temperature and the SHA-256 of
+    the input text, so a new prompt or model never reads outputs of the old one, and deterministic runs
+    never read outputs sampled at a higher temperature. Past `max_entries` the least recently used
+    tenth is evicted. Cache errors are logged and treated as misses; preprocessing never fails on them.
+    """
+    def __init__(self, path: str = PREPROCESS_CACHE_PATH, max_entries: int = PREPROCESS_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._initialized = False
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(prompt_version: str, model: str, temperature: float, text: str) -> str:
+        return f"{prompt_version}:{model}:t{float(temperature)}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=5)
+        if not self._initialized:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS preprocessed (key TEXT PRIMARY KEY, output TEXT NOT NULL, last_used REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS preprocessed_last_used ON preprocessed (last_used)")
+            self._initialized = True
+        return connection
+
+    def _get(self, key: str) -> Optional[str]:
+        with self._connect() as connection:
+            row = connection.execute("SELECT output FROM preprocessed WHERE key = ?", (key,)).fetchone()
+            if row:
+                connection.execute("UPDATE preprocessed SET last_used = ? WHERE key = ?", (time.time(), key))
+        connection.close()
+        return row[0] if row else None
+
+    def _put(self, key: str, output: str):
+        with self._connect() as connection:
+            connection.execute("INSERT OR REPLACE INTO preprocessed VALUES (?, ?, ?)", (key, output, time.time()))
+            (count,) = connection.execute("SELECT COUNT(*) FROM preprocessed").fetchone()
+            if count > self.max_entries:
+                # Evict a tenth at once so the count query does not run an eviction on every insert
+                evicted = count - self.max_entries + self.max_entries // 10
+                connection.execute(
+                    "DELETE FROM preprocessed WHERE key IN "
+                    "(SELECT key FROM preprocessed ORDER BY last_used LIMIT ?)",
+                    (evicted,)
+                )
+                self.evictions += evicted
+        connection.close()
+
+    async def get(self, key: str) -> Optional[str]:
+        """Return the cached output for `key`, None on a miss."""
+        try:
+            output = await asyncio.to_thread(self._get, key)
+        except sqlite3.Error as e:
+            logging.warning(f"Preprocessing cache read failed: {e}")
+            output = None
+        if output is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return output
+
+    async def put(self, key: str, output: str):
+        try:
+            await asyncio.to_thread(self._put, key, output)
+        except sqlite3.Error as e:
+            logging.warning(f"Preprocessing cache write failed: {e}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
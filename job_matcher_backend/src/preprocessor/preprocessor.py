@@ -1,13 +1,40 @@
+import os
+from typing import Optional
 from ..clients.openai_gpt_client import OpenAIGPTClient
+from .preprocessing_cache import PreprocessingCache
+
+PREPROCESS_MODEL = "gpt-4o-mini"
+# Temperature 0 makes the output, and so the embedding, of a new text reproducible
+PREPROCESS_DETERMINISTIC = os.getenv("PREPROCESS_DETERMINISTIC", "false").lower() == "true"
+PREPROCESS_TEMPERATURE = 0.0 if PREPROCESS_DETERMINISTIC else 0.7
+
+# Bump a version whenever its prompt changes, so cached outputs of the old prompt are not reused
+CV_PROMPT_VERSION = "cv-1"
+JOB_PROMPT_VERSION = "job-1"
 
 class TextPreprocessor:
     """
     Standardize CVs and job descriptions using GPT.
     Wrote the prompts in Romanian because in test cases it produced better results.
     The text will be embedded later, so it doesn't need to be necessarily in english.
+    Outputs are cached by prompt version, model, temperature and input text, so the same text is sent to GPT once.
     """
-    def __init__(self):
+    def __init__(self, cache: Optional[PreprocessingCache] = None):
         self.gpt_client = OpenAIGPTClient()
+        self.cache = cache or PreprocessingCache()
+
+    async def _complete(self, prompt_version: str, prompt: str, text: str) -> str:
+        """Run a preprocessing prompt on a text, or return its cached output."""
+        key = self.cache.key(prompt_version, PREPROCESS_MODEL, PREPROCESS_TEMPERATURE, text)
+        cached = await self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        messages = [{"role":"system", "content":prompt},{"role": "user", "content": text}]
+        response = await self.gpt_client.create(messages, model=PREPROCESS_MODEL, temperature=PREPROCESS_TEMPERATURE)
+        output = response.choices[0].message.content
+        await self.cache.put(key, output)
+        return output
 
     async def preprocess_cv(self, cv_raw: str) -> str:
         """Standardize CV text using GPT"""
@@ -29,9 +56,7 @@ class TextPreprocessor:
 
         CV brut:
         """
-        messages = [{"role":"system", "content":prompt},{"role": "user", "content": cv_raw}]
-        response = await self.gpt_client.create(messages, temperature=0.7)
-        return response.choices[0].message.content
+        return await self._complete(CV_PROMPT_VERSION, prompt, cv_raw)
     
     async def preprocess_job(self, job_raw: str) -> str:
         """Standardize job description using GPT"""
@@ -54,6 +79,4 @@ class TextPreprocessor:
 
         Descriere job:
         """
-        messages = [{"role":"system", "content":prompt},{"role": "user", "content": job_raw}]
-        response = await self.gpt_client.create(messages, temperature=0.7)
-        return response.choices[0].message.content
\ No newline at end of file
+        return await self._complete(JOB_PROMPT_VERSION, prompt, job_raw)
\ No newline at end of file
@@ -0,0 +1,55 @@
+import numpy as np
+
+# Batch cosine scoring shared by the rerankers: candidates are stacked into one contiguous
+# float32 matrix of unit rows, so scoring is a single matrix-vector product.
+
+EPSILON = 1e-10
+
+
+def normalize(vector) -> np.ndarray:
+    """Return the vector as a float32 unit vector."""
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / (np.linalg.norm(vector) + EPSILON)
+
+
+def stack_normalized(vectors) -> np.ndarray:
+    """Stack vectors into a contiguous (n, dims) float32 matrix of unit rows."""
+    matrix = np.array(vectors, dtype=np.float32, order="C")
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True) + EPSILON
+    return matrix
+
+
+def cosine_scores(matrix: np.ndarray, query) -> np.ndarray:
+    """Cosine similarity of the query against every row of a pre-normalized matrix."""
+    return matrix @ normalize(query)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    indices = np.argpartition(-scores, k - 1)[:k]
+    return indices[np.argsort(-scores[indices], kind="stable")]
+
+
+def top_k_rows(scores: np.ndarray, k: int) -> np.ndarray:
+    """Row-wise top k of a (queries, candidates) score matrix: column indices, best first."""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.intp)
+    indices = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, indices, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(indices, order, axis=1)
+
+
+def rank_by_cosine(query, vectors, k: int):
+    """
+    Rank candidate vectors by cosine similarity to the query.
+    Returns the indices of the top k candidates and their similarities, best first.
+    """
+    if not len(vectors):
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float32)
+    scores = cosine_scores(stack_normalized(vectors), query)
+    indices = top_k(scores, k)
+    return indices, scores[indices]
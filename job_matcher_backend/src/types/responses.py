@@ -0,0 +1,20 @@
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def _serialize_model(obj):
+    # Response models have no aliases or custom serializers, so their fields are the JSON object
+    if isinstance(obj, BaseModel):
+        return obj.__dict__
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class ModelJSONResponse(JSONResponse):
+    """
+    orjson response that serializes pydantic models found in the content directly.
+    Routes return it themselves, so the content skips FastAPI's response model
+    validation and `jsonable_encoder` pass.
+    """
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=_serialize_model, option=orjson.OPT_SERIALIZE_NUMPY)
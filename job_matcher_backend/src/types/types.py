@@ -12,9 +12,21 @@ class BaseJob(BaseModel):
     location: JobLocation
     date_uploaded: str
 
+    @classmethod
+    def from_source(cls, job_id: str, source: dict, **fields):
+        """
+        Build the model from an Elasticsearch `_source` in a single validation pass.
+        `_source` keys that are not model fields (e.g. `embedding`) are ignored.
+        """
+        return cls.model_validate({**source, **fields, "id": job_id})
+
 class MatchedJob(BaseJob):
     score: float
 
+class RecommendedJob(MatchedJob):
+    """A ranked job as stored in a user's recommendations, with the date it stops being shown."""
+    expiration_date: Optional[str] = None
+
 class AppliedJob(BaseJob):
     application_id: str
     applied_date: str
@@ -0,0 +1,194 @@
+from elasticsearch.exceptions import BadRequestError, ConflictError, NotFoundError
+
+# SHARED IN-MEMORY STAND-IN FOR THE ASYNC ELASTICSEARCH CLIENT
+#
+# Tests import the fakes with `from .conftest import FakeElasticsearch` and subclass them
+# only for the responses that are specific to what they test.
+
+
+def field_mapped(mappings: dict, path: str) -> bool:
+    """Whether a dotted field path, subfields included, is in a mapping."""
+    node = mappings
+    for name in path.split("."):
+        children = {**node.get("properties", {}), **node.get("fields", {})}
+        if name not in children:
+            return False
+        node = children[name]
+    return True
+
+
+class FakeIndices:
+    """The indices API over a set of index names, recording the changes asked of it."""
+    def __init__(self, indices=(), aliased=False, mappings=None, refresh_intervals=None):
+        self.indices = set(indices) | set(mappings or {}) | set(refresh_intervals or {})
+        self.aliased = aliased
+        self.mappings = dict(mappings or {})
+        self.refresh_intervals = dict(refresh_intervals or {})
+        self.templates = {}
+        self.alias_actions = []
+        self.settings = []
+        self.mapping_updates = []
+        self.field_mapping_requests = []
+        self.refreshed = []
+        self.merged = []
+
+    def resolve(self, index: str) -> list[str]:
+        """Indices an index name, wildcard, comma separated list or alias (any prefix of them) stands for."""
+        names = set()
+        for name in index.split(","):
+            if name in self.indices:
+                names.add(name)
+            else:
+                names.update(existing for existing in self.indices if existing.startswith(name.rstrip("*")))
+        return sorted(names)
+
+    async def exists(self, index):
+        return index in self.indices
+
+    async def exists_alias(self, name):
+        return self.aliased
+
+    async def create(self, index, **body):
+        if index in self.indices:
+            raise BadRequestError("resource_already_exists_exception", None, {})
+        self.indices.add(index)
+
+    async def get(self, index):
+        return {name: {} for name in self.resolve(index)}
+
+    async def get_alias(self, name):
+        return {index: {"aliases": {name: {}}} for index in self.resolve(name)}
+
+    async def update_aliases(self, actions):
+        self.alias_actions.append(actions)
+
+    async def put_index_template(self, name, **template):
+        self.templates[name] = template
+
+    async def get_mapping(self, index):
+        return {name: {"mappings": self.mappings[name]} for name in self.resolve(index)}
+
+    async def put_mapping(self, index, **body):
+        self.mapping_updates.append((index, body))
+        for name in self.resolve(index):
+            mappings = self.mappings.setdefault(name, {})
+            mappings.setdefault("properties", {}).update(body.get("properties", {}))
+            if "meta" in body:
+                mappings["_meta"] = body["meta"]
+
+    async def get_field_mapping(self, index, fields):
+        self.field_mapping_requests.append(fields)
+        return {
+            name: {"mappings": {field: {} for field in fields if field_mapped(self.mappings.get(name, {}), field)}}
+            for name in self.resolve(index)
+        }
+
+    async def get_settings(self, index, name):
+        return {
+            partition: {"settings": {"index": {"refresh_interval": interval}} if interval else {}}
+            for partition, interval in self.refresh_intervals.items()
+            if partition in self.resolve(index)
+        }
+
+    async def put_settings(self, index, settings):
+        self.settings.append((index, settings))
+        if "refresh_interval" in settings.get("index", {}):
+            for name in self.resolve(index):
+                self.refresh_intervals[name] = settings["index"]["refresh_interval"]
+
+    async def refresh(self, index):
+        self.refreshed.append(index)
+
+    async def forcemerge(self, index, max_num_segments):
+        self.merged.append(index)
+
+
+class FakeTasks:
+    """Reports a task as running for `polls` calls, then completed with its entry in `results` or `result`."""
+    def __init__(self, result=None, polls=0):
+        self.result = result or {"response": {}}
+        self.results = {}
+        self.polls = polls
+        self.calls = 0
+
+    async def get(self, task_id):
+        self.calls += 1
+        if self.calls <= self.polls:
+            return {"completed": False, "task": {"status": {"total": 10, "deleted": 4}}}
+        return {"completed": True, **self.results.get(task_id, self.result)}
+
+
+class FakeElasticsearch:
+    """
+    Keeps documents by ID and answers `terms` queries with `terms` aggregations over them;
+    other searches get `search_response`, which tests override. Requests are recorded.
+    """
+    def __init__(self, documents=None, indices=(), aliased=False, mappings=None, refresh_intervals=None):
+        self.documents = dict(documents or {})
+        self.indices = FakeIndices(indices, aliased, mappings, refresh_intervals)
+        self.tasks = FakeTasks()
+        self.requests = []
+        self.gets = []
+        self.deletes = []
+        self.reindexed = []
+        self.opened = []
+        self.closed = []
+
+    def options(self, **kwargs):
+        return self
+
+    async def index(self, index, id, document, op_type="index", **kwargs):
+        if op_type == "create" and id in self.documents:
+            raise ConflictError("version_conflict_engine_exception", None, {})
+        self.documents[id] = document
+        return {"_id": id, "result": "created"}
+
+    async def exists(self, index, id):
+        return id in self.documents
+
+    async def get(self, index, id, _source_includes=None):
+        self.gets.append(_source_includes)
+        if id not in self.documents:
+            raise NotFoundError("not_found", None, {})
+        source = self.documents[id]
+        if _source_includes:
+            source = {field: source[field] for field in _source_includes if field in source}
+        return {"_source": source}
+
+    async def search(self, **kwargs):
+        self.requests.append(kwargs)
+        if "terms" in kwargs.get("query", {}) and "aggs" in kwargs:
+            return self.terms_aggregation(kwargs["query"]["terms"], kwargs["aggs"])
+        return self.search_response(**kwargs)
+
+    def terms_aggregation(self, terms: dict, aggs: dict) -> dict:
+        (field, values), = terms.items()
+        matched = [document for document in self.documents.values() if document.get(field) in values]
+        aggregations = {}
+        for name, aggregation in aggs.items():
+            counts = {}
+            for document in matched:
+                key = document.get(aggregation["terms"]["field"])
+                counts[key] = counts.get(key, 0) + 1
+            aggregations[name] = {"buckets": [{"key": key, "doc_count": count} for key, count in counts.items()]}
+        return {"hits": {"hits": []}, "aggregations": aggregations}
+
+    def search_response(self, **kwargs) -> dict:
+        return {"hits": {"hits": []}}
+
+    async def delete_by_query(self, **kwargs):
+        self.deletes.append(kwargs)
+        return {"task": f"node:{len(self.deletes)}"}
+
+    async def reindex(self, **kwargs):
+        self.reindexed.append(kwargs)
+        if kwargs.get("wait_for_completion") is False:
+            return {"task": f"node:{len(self.reindexed)}"}
+        return {"created": 0, "failures": []}
+
+    async def open_point_in_time(self, index, keep_alive):
+        self.opened.append(index)
+        return {"id": f"pit_{len(self.opened)}"}
+
+    async def close_point_in_time(self, id):
+        self.closed.append(id)
@@ -0,0 +1,58 @@
+import argparse
+import base64
+import hashlib
+import numpy as np
+from aiohttp import web
+
+# FAKE OPENAI EMBEDDINGS SERVER FOR LOCAL INGESTION RUNS AND TESTS
+#
+# Serves POST /v1/embeddings with deterministic unit vectors derived from each input's hash,
+# so the pipeline can run without an API key:
+#   python -m tests.fake_embedding_server --port 8089
+#   OPENAI_BASE_URL=http://localhost:8089/v1 OPENAI_API_KEY=fake python -m src.jobs_processor.jobs_processor_parallel
+
+DIMENSIONS = 1536
+REQUESTS = web.AppKey("requests", list)
+
+
+def fake_embedding(text: str, dimensions: int = DIMENSIONS) -> np.ndarray:
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dimensions).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def create_app() -> web.Application:
+    """Embeddings app; `app[REQUESTS]` records the inputs of every request."""
+    app = web.Application()
+    app[REQUESTS] = []
+
+    async def embeddings(request):
+        body = await request.json()
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        app[REQUESTS].append(inputs)
+
+        data = []
+        for index, text in enumerate(inputs):
+            vector = fake_embedding(text, body.get("dimensions") or DIMENSIONS)
+            if body.get("encoding_format") == "base64":
+                embedding = base64.b64encode(vector.tobytes()).decode("ascii")
+            else:
+                embedding = vector.tolist()
+            data.append({"object": "embedding", "index": index, "embedding": embedding})
+        tokens = sum(len(text.split()) for text in inputs)
+        return web.json_response({
+            "object": "list",
+            "data": data,
+            "model": body["model"],
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens}
+        })
+
+    app.router.add_post("/v1/embeddings", embeddings)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake OpenAI embeddings server")
+    parser.add_argument("--port", type=int, default=8089)
+    args = parser.parse_args()
+    web.run_app(create_app(), port=args.port)
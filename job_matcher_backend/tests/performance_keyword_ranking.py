@@ -0,0 +1,73 @@
+import asyncio
+import json
+import sys
+import os
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.clients.es_client import ElasticsearchClient
+from src.types.types import SearchRequest, LocationFilter
+
+# BENCHMARK FOR KEYWORD SEARCH SIMILARITY RANKING: CLIENT-SIDE VS ELASTICSEARCH-SIDE
+
+# Results are printed per ranking mode: response payload size, latency and overlap with the client-side top 15
+
+USER_ID = ""  # leave empty to use the first profile in user_profiles
+
+QUERIES = [
+    SearchRequest(query=""),
+    SearchRequest(query="Developer"),
+    SearchRequest(query="Inginer"),
+    SearchRequest(query="Sofer", location=LocationFilter(country="Romania")),
+]
+
+es_client = ElasticsearchClient()
+
+
+async def get_benchmark_embedding():
+    if USER_ID:
+        return await es_client.get_user_embedding(USER_ID)
+    response = await es_client.client.search(index="user_profiles", size=1, _source=["embedding"])
+    hits = response["hits"]["hits"]
+    return hits[0]["_source"]["embedding"] if hits else None
+
+
+async def run_mode(request: SearchRequest, embedding: list, ranking: str, n: int):
+    body = es_client.build_keyword_search_body(request, embedding, ranking)
+    durations = []
+    payload_size = 0
+    ids = []
+    for _ in range(n):
+        start = time.perf_counter()
+        response = await es_client.client.search(index="jobs", body=body)
+        hits = response["hits"]["hits"]
+        if ranking == "client" and hits:
+            hits = es_client._rank_hits_by_similarity(hits, embedding)
+        durations.append(time.perf_counter() - start)
+        payload_size = len(json.dumps(response.body))
+        ids = [hit["_id"] for hit in hits[:15]]
+    return durations, payload_size, ids
+
+
+async def main(n=20):
+    embedding = await get_benchmark_embedding()
+    if not embedding:
+        print("No user embedding found, nothing to rank.")
+        return
+
+    for request in QUERIES:
+        print(f"Query: '{request.query}' | Location: {request.location}")
+        _, _, baseline_ids = await run_mode(request, embedding, "client", 1)
+        for ranking in ["client", "rescore", "knn"]:
+            durations, payload_size, ids = await run_mode(request, embedding, ranking, n)
+            overlap = len(set(ids) & set(baseline_ids)) / len(baseline_ids) if baseline_ids else 1.0
+            print(
+                f"  {ranking:8} | payload: {payload_size / 1024:8.1f} KB | "
+                f"Min: {min(durations) * 1000:7.2f}ms, Max: {max(durations) * 1000:7.2f}ms, "
+                f"Avg: {sum(durations) / len(durations) * 1000:7.2f}ms | overlap with client: {overlap:.2f}"
+            )
+        print("-" * 40)
+
+    await es_client.client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
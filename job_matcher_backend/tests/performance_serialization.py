@@ -0,0 +1,78 @@
+import sys
+import os
+import time
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.types.types import BaseJob, MatchedJob, AppliedJob
+from src.types.responses import ModelJSONResponse
+
+# BENCHMARK FOR RESPONSE MODEL SERIALIZATION: DUMP AND RE-ENCODE VS FAST PATH
+
+# Builds and serializes a response from synthetic Elasticsearch hits, the way the routes did before
+# (model_validate -> model_dump / re-validate -> jsonable_encoder -> json) and with the fast path
+# (one from_source validation -> orjson), and prints the per-hit overhead for each result size
+
+RESULT_SIZES = [20, 100, 1000]
+N_RUNS = 50
+
+
+def make_hits(n: int) -> list:
+    return [{
+        "_id": f"job-{i}",
+        "_score": 1.0 - i / (n + 1),
+        "_source": {
+            "job_title": f"Software Developer {i}",
+            "company": "Company SRL",
+            "location": {"country": "Romania", "city": "Bucuresti"},
+            "date_uploaded": "2025-04-01"
+        }
+    } for i in range(n)]
+
+
+def previous_path(hits: list) -> bytes:
+    matched = [MatchedJob.model_validate({"id": hit["_id"], "score": hit["_score"], **hit["_source"]}) for hit in hits]
+    applied = [
+        AppliedJob.model_validate({**job.model_dump(), "application_id": "app", "applied_date": "2025-04-02"})
+        for job in [BaseJob.model_validate({"id": hit["_id"], **hit["_source"]}) for hit in hits]
+    ]
+    content = {"jobs": [job.model_dump() for job in matched], "applications": applied}
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def fast_path(hits: list) -> bytes:
+    matched = [MatchedJob.from_source(hit["_id"], hit["_source"], score=hit["_score"]) for hit in hits]
+    applied = [
+        AppliedJob.model_validate({**dict(job), "application_id": "app", "applied_date": "2025-04-02"})
+        for job in [BaseJob.from_source(hit["_id"], hit["_source"]) for hit in hits]
+    ]
+    content = {"jobs": matched, "applications": applied}
+    return ModelJSONResponse(content).body
+
+
+def measure(path, hits: list) -> list:
+    path(hits)  # warm up
+    durations = []
+    for _ in range(N_RUNS):
+        start = time.perf_counter()
+        path(hits)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def main():
+    for size in RESULT_SIZES:
+        hits = make_hits(size)
+        print(f"{size} results:")
+        for name, path in [("previous", previous_path), ("fast path", fast_path)]:
+            durations = measure(path, hits)
+            avg = sum(durations) / len(durations)
+            print(
+                f"  {name:10} | Min: {min(durations) * 1000:.3f}ms | Max: {max(durations) * 1000:.3f}ms | "
+                f"Avg: {avg * 1000:.3f}ms | Per hit: {avg / size * 1e6:.2f}us"
+            )
+        print("-" * 40)
+
+
+if __name__ == "__main__":
+    main()
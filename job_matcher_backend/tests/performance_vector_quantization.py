@@ -0,0 +1,141 @@
+import asyncio
+import math
+import sys
+import os
+import time
+import numpy as np
+from elasticsearch.helpers import async_bulk
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.clients.es_client import ElasticsearchClient, VECTOR_INDEX_TYPES
+from src.scoring.vector_scoring import stack_normalized, cosine_scores, top_k
+from test_knn_matcher import average_precision, compute_ndcg
+
+# BENCHMARK FOR QUANTIZED JOB VECTOR INDEX OPTIONS
+
+# Copies the job embeddings into one temporary index per quantization type and reports
+# recall@k / MAP / NDCG against exact brute force, query latency and vector memory.
+
+TOP_K = 10
+NUM_QUERIES = 50
+RESCORE_OVERSAMPLE = 3
+BENCH_INDEX_PREFIX = "jobs_quantization_bench"
+
+es_client = ElasticsearchClient()
+
+
+def estimated_vector_memory(index_type: str, num_vectors: int, dims: int = 1536) -> int:
+    """Off-heap memory needed to keep the vectors searchable, per the Elasticsearch sizing guide."""
+    if index_type == "int8_hnsw":
+        return num_vectors * (dims + 4)
+    if index_type == "int4_hnsw":
+        return num_vectors * (math.ceil(dims / 2) + 4)
+    if index_type == "bbq_hnsw":
+        return num_vectors * (math.ceil(dims / 8) + 8)
+    return num_vectors * 4 * dims
+
+
+async def load_job_vectors():
+    ids, vectors = [], []
+    async for job_id, source in es_client.scan_jobs(["embedding"]):
+        if source.get("embedding"):
+            ids.append(job_id)
+            vectors.append(source["embedding"])
+    return ids, vectors
+
+
+async def load_queries(vectors):
+    response = await es_client.client.search(index="user_profiles", size=NUM_QUERIES, _source=["embedding"])
+    queries = [hit["_source"]["embedding"] for hit in response["hits"]["hits"] if hit["_source"].get("embedding")]
+    if len(queries) < NUM_QUERIES:
+        # Pad with job vectors so the benchmark also runs on a fresh database
+        rng = np.random.default_rng(0)
+        picks = rng.choice(len(vectors), size=min(NUM_QUERIES - len(queries), len(vectors)), replace=False)
+        queries.extend(vectors[i] for i in picks)
+    return queries
+
+
+async def build_index(index_type: str, ids: list, vectors: list) -> str:
+    index = f"{BENCH_INDEX_PREFIX}_{index_type}"
+    if await es_client.client.indices.exists(index=index):
+        await es_client.client.indices.delete(index=index)
+    await es_client.client.indices.create(
+        index=index,
+        mappings={"properties": {"embedding": es_client.jobs_embedding_mapping(index_type)}}
+    )
+    await async_bulk(
+        es_client.client,
+        ({"_index": index, "_id": job_id, "_source": {"embedding": vector}} for job_id, vector in zip(ids, vectors))
+    )
+    await es_client.client.indices.refresh(index=index)
+    await es_client.client.indices.forcemerge(index=index, max_num_segments=1)
+    return index
+
+
+async def disk_usage(index: str) -> int:
+    response = await es_client.client.indices.disk_usage(index=index, run_expensive_tasks=True)
+    return response[index]["fields"].get("embedding", {}).get("total_in_bytes", 0)
+
+
+async def run_queries(index: str, queries: list, truth: list, rescore: bool):
+    durations, recalls, maps, ndcgs = [], [], [], []
+    for query, expected in zip(queries, truth):
+        knn_k = TOP_K * RESCORE_OVERSAMPLE if rescore else TOP_K
+        body = {
+            "knn": {
+                "field": "embedding",
+                "query_vector": query,
+                "k": knn_k,
+                "num_candidates": es_client.knn_num_candidates(knn_k)
+            },
+            "_source": False,
+            "size": TOP_K
+        }
+        if rescore:
+            body["rescore"] = es_client.exact_cosine_rescore(query, knn_k)
+
+        start = time.perf_counter()
+        response = await es_client.client.search(index=index, body=body)
+        durations.append(time.perf_counter() - start)
+
+        found = [hit["_id"] for hit in response["hits"]["hits"]]
+        recalls.append(len(set(found) & set(expected)) / len(expected))
+        maps.append(average_precision(found, expected))
+        ndcgs.append(compute_ndcg(found, expected, k=TOP_K))
+    return durations, recalls, maps, ndcgs
+
+
+async def main():
+    ids, vectors = await load_job_vectors()
+    if not ids:
+        print("No job embeddings found.")
+        return
+    queries = await load_queries(vectors)
+
+    # Exact top-k by brute force
+    matrix = stack_normalized(vectors)
+    truth = [[ids[i] for i in top_k(cosine_scores(matrix, query), TOP_K)] for query in queries]
+
+    print(f"{len(ids)} job vectors, {len(queries)} queries, k={TOP_K}")
+    for index_type in VECTOR_INDEX_TYPES:
+        index = await build_index(index_type, ids, vectors)
+        disk = await disk_usage(index)
+        memory = estimated_vector_memory(index_type, len(ids))
+        print(f"{index_type}: vector memory ~{memory / 1024 / 1024:.1f} MB, embedding disk usage {disk / 1024 / 1024:.1f} MB")
+
+        for rescore in ([False, True] if index_type != "hnsw" else [False]):
+            durations, recalls, maps, ndcgs = await run_queries(index, queries, truth, rescore)
+            label = f"rescore x{RESCORE_OVERSAMPLE}" if rescore else "no rescore"
+            print(
+                f"  {label:12} | Recall@{TOP_K}: {np.mean(recalls):.3f} | MAP: {np.mean(maps):.3f} | "
+                f"NDCG@{TOP_K}: {np.mean(ndcgs):.3f} | "
+                f"Avg: {np.mean(durations) * 1000:.2f}ms, p95: {np.percentile(durations, 95) * 1000:.2f}ms"
+            )
+
+        await es_client.client.indices.delete(index=index)
+        print("-" * 40)
+
+    await es_client.client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
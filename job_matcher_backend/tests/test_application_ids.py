@@ -0,0 +1,141 @@
+import asyncio
+import pytest
+from src.applied_jobs import migrate_application_ids as migration
+from src.clients.es_client import ElasticsearchClient, generate_application_id
+from .conftest import FakeElasticsearch
+
+# TESTS FOR APPLICATIONS KEYED BY (user_id, job_id)
+
+
+def application(user_id, job_id, applied_date="2026-01-01T00:00:00"):
+    return {"user_id": user_id, "job_id": job_id, "applied_date": applied_date}
+
+
+def test_application_id_is_stable_per_user_and_job():
+    assert generate_application_id("user", "job_1") == generate_application_id("user", "job_1")
+    assert generate_application_id("user", "job_1") != generate_application_id("user", "job_2")
+    assert generate_application_id("user", "job_1") != generate_application_id("other", "job_1")
+    # The separator keeps concatenations of different pairs apart
+    assert generate_application_id("ab", "c") != generate_application_id("a", "bc")
+
+
+def test_applying_twice_keeps_one_application():
+    client = FakeElasticsearch()
+    es_client = ElasticsearchClient(client=client)
+
+    asyncio.run(es_client.index_applied_job(application("user", "job_1")))
+    with pytest.raises(ValueError, match="already applied"):
+        asyncio.run(es_client.index_applied_job(application("user", "job_1", "2026-02-01T00:00:00")))
+
+    assert list(client.documents) == [generate_application_id("user", "job_1")]
+    assert client.documents[generate_application_id("user", "job_1")]["applied_date"] == "2026-01-01T00:00:00"
+
+
+def test_is_applied_checks_the_application_id():
+    client = FakeElasticsearch({generate_application_id("user", "job_1"): application("user", "job_1")})
+    es_client = ElasticsearchClient(client=client)
+
+    assert asyncio.run(es_client.is_applied_job("user", "job_1")) is True
+    assert asyncio.run(es_client.is_applied_job("user", "job_2")) is False
+    assert asyncio.run(es_client.is_applied_job("other", "job_1")) is False
+
+
+def test_migration_rekeys_and_merges_duplicates(monkeypatch):
+    client = FakeElasticsearch({
+        "random_2": application("user", "job_1", "2026-02-01T00:00:00"),
+        "random_1": application("user", "job_1", "2026-01-01T00:00:00"),
+        "random_3": application("user", "job_2"),
+        generate_application_id("user", "job_3"): application("user", "job_3"),
+    })
+
+    async def async_scan(es, index, query, preserve_order):
+        hits = sorted(client.documents.items(), key=lambda item: item[1]["applied_date"])
+        for doc_id, source in hits:
+            yield {"_id": doc_id, "_source": source}
+
+    async def async_bulk(es, actions, raise_on_error):
+        done, errors = 0, []
+        for action in actions:
+            if action["_op_type"] == "create":
+                if action["_id"] in client.documents:
+                    errors.append({"create": {"_id": action["_id"], "status": 409}})
+                    continue
+                client.documents[action["_id"]] = action["_source"]
+            else:
+                del client.documents[action["_id"]]
+            done += 1
+        return done, errors
+
+    monkeypatch.setattr(migration, "es_client", ElasticsearchClient(client=client))
+    monkeypatch.setattr(migration, "async_scan", async_scan)
+    monkeypatch.setattr(migration, "async_bulk", async_bulk)
+
+    asyncio.run(migration.migrate_application_ids())
+
+    assert set(client.documents) == {
+        generate_application_id("user", job_id) for job_id in ("job_1", "job_2", "job_3")
+    }
+    # The earliest of the duplicate applications is the one kept
+    assert client.documents[generate_application_id("user", "job_1")]["applied_date"] == "2026-01-01T00:00:00"
+
+
+def test_migration_keeps_old_documents_whose_copy_failed(monkeypatch):
+    client = FakeElasticsearch({"random_1": application("user", "job_1")})
+    deleted = []
+
+    async def async_scan(es, index, query, preserve_order):
+        for doc_id, source in list(client.documents.items()):
+            yield {"_id": doc_id, "_source": source}
+
+    async def async_bulk(es, actions, raise_on_error):
+        actions = list(actions)
+        if actions and actions[0]["_op_type"] == "create":
+            return 0, [{"create": {"_id": action["_id"], "status": 500}} for action in actions]
+        deleted.extend(action["_id"] for action in actions)
+        return len(actions), []
+
+    monkeypatch.setattr(migration, "es_client", ElasticsearchClient(client=client))
+    monkeypatch.setattr(migration, "async_scan", async_scan)
+    monkeypatch.setattr(migration, "async_bulk", async_bulk)
+
+    asyncio.run(migration.migrate_application_ids())
+
+    assert deleted == []
+    assert list(client.documents) == ["random_1"]
+
+
+class FakeApplicationsClient(FakeElasticsearch):
+    """Serves the user's applications, newest first, and the jobs that still exist."""
+    def __init__(self, applications, jobs):
+        super().__init__()
+        self.applications = applications
+        self.jobs = jobs
+
+    def search_response(self, index, body):
+        if index == "user_applied_jobs":
+            return {"hits": {"hits": [
+                {"_id": app_id, "_source": source, "sort": [source["applied_date"], source["job_id"]]}
+                for app_id, source in self.applications.items()
+            ]}}
+        job_ids = body["query"]["terms"]["_id"]
+        return {"hits": {"hits": [
+            {"_id": job_id, "_source": self.jobs[job_id]} for job_id in job_ids if job_id in self.jobs
+        ]}}
+
+
+def test_enriched_applications_carry_the_job_and_report_deleted_ones():
+    job = {"job_title": "Developer", "company": "Company", "date_uploaded": "2026-01-01",
+           "location": {"country": "Romania", "city": "Iasi"}}
+    client = FakeApplicationsClient(
+        {"app_1": application("user", "job_1", "2026-02-01T00:00:00"), "app_2": application("user", "deleted_job")},
+        {"job_1": job}
+    )
+
+    results, next_page, stale = asyncio.run(ElasticsearchClient(client=client).get_enriched_applications("user", 10))
+
+    (applied,) = results
+    assert applied.model_dump() == {
+        "id": "job_1", **job, "application_id": "app_1", "applied_date": "2026-02-01T00:00:00"
+    }
+    assert next_page is None
+    assert stale == ["app_2"]
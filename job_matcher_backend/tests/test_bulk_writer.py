@@ -0,0 +1,103 @@
+import asyncio
+import json
+from types import SimpleNamespace
+import pytest
+from elastic_transport import JsonSerializer
+from src.clients.es_bulk_writer import BulkWriter, restore_disabled_refresh
+from .conftest import FakeElasticsearch
+
+# TESTS FOR THE BULK WRITER
+
+
+class FakeResponse:
+    def __init__(self, body):
+        self.body = body
+
+
+class FakeClient(FakeElasticsearch):
+    """Bulk API that rejects documents with `"bad": true` and fails whole requests once `down` is set."""
+    def __init__(self, intervals):
+        super().__init__(refresh_intervals=intervals)
+        self.transport = SimpleNamespace(serializers=SimpleNamespace(get_serializer=lambda mimetype: JsonSerializer()))
+        self.down = False
+        self.bulk_requests = 0
+
+    async def bulk(self, operations, **kwargs):
+        self.bulk_requests += 1
+        if self.down:
+            raise ConnectionError("Elasticsearch is unreachable")
+        lines = [json.loads(line) for line in operations]
+        items = []
+        for header, document in zip(lines[::2], lines[1::2]):
+            doc_id = header["index"]["_id"]
+            if document.get("bad"):
+                items.append({"index": {"_id": doc_id, "status": 400, "error": {"type": "mapper_parsing_exception"}}})
+            else:
+                items.append({"index": {"_id": doc_id, "status": 201}})
+        return FakeResponse({"items": items})
+
+
+def test_futures_resolve_per_document():
+    client = FakeClient({"jobs-2026.10": None})
+
+    async def run():
+        async with BulkWriter(client, "jobs", chunk_size=2) as writer:
+            good = await writer.index("1", {"job_title": "Developer"})
+            bad = await writer.index("2", {"bad": True})
+            last = await writer.index("3", {"job_title": "Tester"})
+        return writer, await asyncio.gather(good, bad, last, return_exceptions=True)
+
+    writer, (good, bad, last) = asyncio.run(run())
+
+    assert good == "1" and last == "3"
+    assert isinstance(bad, RuntimeError) and "mapper_parsing_exception" in str(bad)
+    assert (writer.indexed, writer.failed) == (2, 1)
+    assert client.bulk_requests == 2
+
+
+def test_failed_request_fails_every_future_of_its_chunk():
+    client = FakeClient({"jobs-2026.10": None})
+    client.down = True
+
+    async def run():
+        async with BulkWriter(client, "jobs", chunk_size=10) as writer:
+            futures = [await writer.index(str(i), {"job_title": "Developer"}) for i in range(3)]
+        return await asyncio.gather(*futures, return_exceptions=True)
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(result, ConnectionError) for result in results)
+
+
+def test_refresh_is_restored_per_index_when_the_run_fails():
+    client = FakeClient({"jobs-2026.10": None, "jobs-2026.11": "5s"})
+
+    async def run():
+        async with BulkWriter(client, "jobs") as writer:
+            await writer.index("1", {"job_title": "Developer"})
+            assert set(client.indices.refresh_intervals.values()) == {"-1"}
+            raise RuntimeError("ingestion failed")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(run())
+
+    assert client.indices.refresh_intervals == {"jobs-2026.10": None, "jobs-2026.11": "5s"}
+    assert client.indices.refreshed == ["jobs"]
+
+
+def test_refresh_left_disabled_is_recovered():
+    client = FakeClient({"jobs-2026.10": "-1", "jobs-2026.11": "5s"})
+
+    async def run():
+        async with BulkWriter(client, "jobs"):
+            pass
+
+    asyncio.run(run())
+    # The earlier run's -1 is not taken for the interval to restore
+    assert client.indices.refresh_intervals == {"jobs-2026.10": None, "jobs-2026.11": "5s"}
+
+    client.indices.refresh_intervals["jobs-2026.11"] = "-1"
+    restored = asyncio.run(restore_disabled_refresh(client, "jobs"))
+
+    assert restored == ["jobs-2026.11"]
+    assert client.indices.refresh_intervals == {"jobs-2026.10": None, "jobs-2026.11": None}
@@ -0,0 +1,88 @@
+import asyncio
+import numpy as np
+from aiohttp import web
+from openai import AsyncOpenAI
+from src.clients.embedding_batcher import EmbeddingBatcher, estimate_tokens
+from src.clients.openai_embedding_client import OpenAIEmbeddingClient
+from .fake_embedding_server import create_app, fake_embedding, REQUESTS
+
+# TESTS FOR THE EMBEDDING BATCHER
+
+
+async def start_server():
+    app = create_app()
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    client = OpenAIEmbeddingClient(AsyncOpenAI(base_url=f"http://127.0.0.1:{port}/v1", api_key="fake"))
+    return app, runner, client
+
+
+def run_batcher(texts, **options):
+    async def run():
+        app, runner, client = await start_server()
+        batcher = EmbeddingBatcher(client, **options)
+        try:
+            vectors = await asyncio.gather(*[batcher.embed(text) for text in texts])
+            await batcher.close()
+            return vectors, app[REQUESTS]
+        finally:
+            await client.client.close()
+            await runner.cleanup()
+    return asyncio.run(run())
+
+
+def test_concurrent_texts_share_requests_and_get_their_own_vectors():
+    texts = [f"job description {i}" for i in range(25)]
+
+    vectors, requests = run_batcher(texts, max_items=10, max_wait=0.01)
+
+    assert sorted(len(inputs) for inputs in requests) == [5, 10, 10]
+    for text, vector in zip(texts, vectors):
+        np.testing.assert_allclose(vector, fake_embedding(text), rtol=1e-6)
+
+
+def test_token_budget_splits_batches():
+    texts = ["a" * 300] * 3 + ["b" * 30]
+    budget = estimate_tokens("a" * 300) * 2
+
+    _, requests = run_batcher(texts, max_tokens=budget, max_wait=0.01)
+
+    assert [len(inputs) for inputs in requests] == [2, 2]
+    assert all(sum(estimate_tokens(text) for text in inputs) <= budget for inputs in requests)
+
+
+def test_failed_batch_fails_each_caller():
+    class FailingClient:
+        async def create(self, input):
+            raise RuntimeError("rate limited")
+
+    async def run():
+        batcher = EmbeddingBatcher(FailingClient(), max_wait=0.01)
+        return await asyncio.gather(batcher.embed("one"), batcher.embed("two"), return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in asyncio.run(run()))
+
+
+def test_texts_missing_from_a_short_response_fail():
+    class ShortClient:
+        async def create(self, input):
+            # Only the first text of the batch comes back
+            item = type("Item", (), {"index": 0, "embedding": [1.0, 0.0]})()
+            return type("Response", (), {"data": [item]})()
+
+    async def run():
+        batcher = EmbeddingBatcher(ShortClient(), max_wait=0.01)
+        results = await asyncio.wait_for(
+            asyncio.gather(batcher.embed("one"), batcher.embed("two"), batcher.embed("three"), return_exceptions=True),
+            timeout=5
+        )
+        await batcher.close()
+        return results
+
+    first, second, third = asyncio.run(run())
+
+    assert first == [1.0, 0.0]
+    assert isinstance(second, RuntimeError) and isinstance(third, RuntimeError)
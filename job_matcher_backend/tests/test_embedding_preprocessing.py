@@ -2,6 +2,7 @@ import numpy as np
 from src.clients.openai_embedding_client import OpenAIEmbeddingClient
 from src.clients.openai_gpt_client import OpenAIGPTClient
 from src.cv_processor.cv_processor import CVProcessor
+from src.scoring.vector_scoring import normalize
 import asyncio
 
 # TEST FOR DIFFERENCE BETWEEN NORMAL EMBEDDING VS GPT-PREPROCESSED EMBEDDING
@@ -59,9 +60,7 @@ Descriere job:
 
 def cosine_similarity(vec1, vec2):
     """Calculate cosine similarity between two vectors"""
-    vec1 = np.array(vec1)
-    vec2 = np.array(vec2)
-    return np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
+    return float(np.dot(normalize(vec1), normalize(vec2)))
 
 
 
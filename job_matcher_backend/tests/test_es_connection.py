@@ -0,0 +1,36 @@
+import asyncio
+from elastic_transport import AiohttpHttpNode, NodeConfig
+from src.clients.es_connection import PooledAiohttpNode, ES_KEEPALIVE_TIMEOUT
+
+# TESTS FOR THE ELASTICSEARCH CONNECTION POOL
+
+
+def session_settings(node_class):
+    async def create():
+        node = node_class(NodeConfig("http", "localhost", 9200, connections_per_node=7))
+        node._create_aiohttp_session()
+        session = node.session
+        settings = {
+            "headers": dict(session.headers),
+            "skip_auto_headers": sorted(session.skip_auto_headers),
+            "auto_decompress": session.auto_decompress,
+            "cookie_jar": type(session.cookie_jar),
+            "limit_per_host": session.connector.limit_per_host,
+            "use_dns_cache": session.connector.use_dns_cache,
+            "cleanup_closed": not session.connector._cleanup_closed_disabled,
+            "keepalive_timeout": session.connector._keepalive_timeout,
+        }
+        await session.close()
+        return settings
+    return asyncio.run(create())
+
+
+def test_session_only_differs_from_elastic_transport_in_keepalive():
+    # Fails when an elastic-transport upgrade changes the session this node overrides
+    pooled = session_settings(PooledAiohttpNode)
+    upstream = session_settings(AiohttpHttpNode)
+
+    assert pooled.pop("keepalive_timeout") == ES_KEEPALIVE_TIMEOUT
+    upstream.pop("keepalive_timeout")
+    assert pooled == upstream
+    assert pooled["limit_per_host"] == 7
@@ -0,0 +1,65 @@
+import asyncio
+import pytest
+from src.jobs_processor.geocode_cache import GeocodeCache
+
+# TESTS FOR THE GEOCODING CACHE
+
+
+class FakeGeocoder:
+    def __init__(self, locations):
+        self.locations = locations
+        self.calls = []
+
+    async def __call__(self, lat, lng):
+        self.calls.append((lat, lng))
+        await asyncio.sleep(0.01)
+        if self.locations is None:
+            raise RuntimeError("Geocoding API status OVER_QUERY_LIMIT")
+        return self.locations.get((round(lat), round(lng)))
+
+
+def test_nearby_coordinates_share_one_request_and_persist(tmp_path):
+    geocoder = FakeGeocoder({(44, 26): {"city": "Bucharest", "country": "Romania"}})
+    cache = GeocodeCache(path=str(tmp_path / "geocode.sqlite3"), decimals=2)
+
+    async def run():
+        return await asyncio.gather(*[cache.resolve(44.4268 + i * 0.0001, 26.1025, geocoder) for i in range(5)])
+
+    locations = asyncio.run(run())
+
+    assert locations == [{"city": "Bucharest", "country": "Romania"}] * 5
+    assert len(geocoder.calls) == 1
+    cache.save()
+
+    reloaded = GeocodeCache(path=str(tmp_path / "geocode.sqlite3"), decimals=2)
+    assert asyncio.run(reloaded.resolve(44.4271, 26.1020, geocoder)) == {"city": "Bucharest", "country": "Romania"}
+    assert len(geocoder.calls) == 1
+    assert reloaded.stats()["hit_rate"] == 1.0
+
+
+def test_failures_are_cached_until_the_negative_ttl_expires(tmp_path):
+    geocoder = FakeGeocoder({})
+    cache = GeocodeCache(path=str(tmp_path / "geocode.sqlite3"), negative_ttl=3600)
+
+    assert asyncio.run(cache.resolve(10.0, 10.0, geocoder)) is None
+    assert asyncio.run(cache.resolve(10.0, 10.0, geocoder)) is None
+    assert len(geocoder.calls) == 1
+    assert cache.stats()["negative_hits"] == 1
+
+    cache.negative_ttl = 0
+    asyncio.run(cache.resolve(10.0, 10.0, geocoder))
+    assert len(geocoder.calls) == 2
+
+
+
+def test_errors_are_not_cached(tmp_path):
+    geocoder = FakeGeocoder(None)
+    cache = GeocodeCache(path=str(tmp_path / "geocode.sqlite3"))
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(cache.resolve(44.43, 26.10, geocoder))
+    geocoder.locations = {(44, 26): {"city": "Bucharest", "country": "Romania"}}
+
+    assert asyncio.run(cache.resolve(44.43, 26.10, geocoder)) == {"city": "Bucharest", "country": "Romania"}
+    assert len(geocoder.calls) == 2
+    assert cache.stats()["errors"] == 1
@@ -0,0 +1,102 @@
+import asyncio
+import time
+import pytest
+from aiohttp import web, ClientResponseError
+from src.clients.http_client import AsyncHttpClient, TokenBucket
+
+# TESTS FOR THE SCRAPER HTTP CLIENT
+
+
+async def serve(handler):
+    app = web.Application()
+    app.router.add_get("/{path:.*}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+def test_retries_overload_responses_then_returns_json():
+    calls = []
+
+    async def handler(request):
+        calls.append(request.path)
+        if len(calls) < 3:
+            return web.Response(status=503)
+        return web.json_response({"jobs": [{"id": 1}]})
+
+    async def run():
+        runner, base = await serve(handler)
+        client = AsyncHttpClient(backoff_base=0.01)
+        try:
+            return await client.get_json(f"{base}/jobs"), client.stats()
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    data, stats = asyncio.run(run())
+
+    assert data == {"jobs": [{"id": 1}]}
+    assert stats["requests"] == 3 and stats["retries"] == 2
+
+
+def test_not_found_returns_none_and_client_errors_are_not_retried():
+    async def handler(request):
+        return web.Response(status=404 if request.path == "/missing" else 403)
+
+    async def run():
+        runner, base = await serve(handler)
+        client = AsyncHttpClient(backoff_base=0.01)
+        try:
+            missing = await client.get_json(f"{base}/missing")
+            with pytest.raises(ClientResponseError):
+                await client.get_json(f"{base}/forbidden")
+            return missing, client.stats()
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    missing, stats = asyncio.run(run())
+
+    assert missing is None
+    assert stats["requests"] == 2 and stats["retries"] == 0
+
+
+def test_token_bucket_spaces_requests_after_the_burst():
+    bucket = TokenBucket(rate=50, capacity=2)
+
+    async def run():
+        start = time.monotonic()
+        for _ in range(6):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    # The burst takes 2 tokens at once, the other 4 come every 20ms
+    assert 0.07 <= asyncio.run(run()) < 0.5
+
+
+def test_per_host_limit_caps_concurrent_requests():
+    in_flight = []
+    peak = []
+
+    async def handler(request):
+        in_flight.append(1)
+        peak.append(len(in_flight))
+        await asyncio.sleep(0.02)
+        in_flight.pop()
+        return web.json_response({})
+
+    async def run():
+        runner, base = await serve(handler)
+        client = AsyncHttpClient(max_per_host=3)
+        try:
+            await asyncio.gather(*[client.get_json(f"{base}/jobs/{i}") for i in range(10)])
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    asyncio.run(run())
+
+    assert max(peak) == 3
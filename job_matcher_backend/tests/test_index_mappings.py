@@ -0,0 +1,135 @@
+import asyncio
+import pytest
+from src.clients import es_client as es_client_module
+from src.clients.es_client import ElasticsearchClient, mapping_drift, mapping_version, with_mapping_version
+from .conftest import FakeElasticsearch
+
+# TESTS FOR INDEX MAPPING VERSIONS AND DRIFT
+
+
+def test_mapping_version_ignores_meta_and_key_order():
+    mappings = {"properties": {"user_id": {"type": "keyword"}, "date_created": {"type": "date"}}}
+    reordered = {"properties": {"date_created": {"type": "date"}, "user_id": {"type": "keyword"}}}
+
+    assert mapping_version(mappings) == mapping_version(reordered) == mapping_version(with_mapping_version(mappings))
+    assert mapping_version(mappings) != mapping_version({"properties": {"user_id": {"type": "text"}}})
+
+
+def test_mapping_drift_reports_changed_vector_options():
+    expected = ElasticsearchClient.index_definitions()["user_profiles"]["mappings"]
+    live = {"properties": {
+        "date_created": {"type": "date"},
+        "embedding": {"type": "dense_vector", "dims": 1536, "index": True, "similarity": "cosine",
+                      "index_options": {"type": "hnsw", "m": 16, "ef_construction": 100}},
+        "structured_profile": {"type": "object", "enabled": False},
+        "user_id": {"type": "keyword"},
+        "dynamic_field": {"type": "keyword"}
+    }}
+
+    assert mapping_drift(expected, live) == ["properties.embedding.index_options.type: hnsw -> int8_hnsw"]
+
+
+def test_unstamped_index_with_current_mapping_is_stamped_not_reported():
+    body = ElasticsearchClient.index_definitions()["user_applied_jobs"]
+    unstamped = {key: value for key, value in body["mappings"].items() if key != "_meta"}
+    outdated = {"properties": {"job_id": {"type": "text"}}}
+    live = {"user_applied_jobs": {"mappings": unstamped}, "user_applied_jobs.v0": {"mappings": outdated}}
+    es_client = ElasticsearchClient(client=FakeElasticsearch())
+
+    drift = asyncio.run(es_client._check_mappings(live, body, False, lambda index: ("user_applied_jobs", [])))
+
+    assert list(drift) == ["user_applied_jobs.v0"]
+    assert es_client.client.indices.mapping_updates == [("user_applied_jobs", {"meta": body["mappings"]["_meta"]})]
+
+
+def jobs_client(types):
+    """Jobs partitions behind the read alias, each mapped with the given embedding index type."""
+    # Partitions were created with the hnsw template, so they keep its version stamp
+    meta = with_mapping_version(ElasticsearchClient.jobs_mapping("hnsw"))["_meta"]
+    return FakeElasticsearch(aliased=True, mappings={
+        name: {**ElasticsearchClient.jobs_mapping(kind), "_meta": meta} for name, kind in types.items()
+    })
+
+
+def index_types(client):
+    return {
+        name: mappings["properties"]["embedding"]["index_options"]["type"]
+        for name, mappings in client.indices.mappings.items()
+    }
+
+
+def test_vector_migration_updates_every_lagging_partition(monkeypatch):
+    monkeypatch.setattr(es_client_module, "JOBS_VECTOR_INDEX_TYPE", "int8_hnsw")
+    client = jobs_client({"jobs-2026.01": "int8_hnsw", "jobs-2026.02": "hnsw", "jobs-undated": "hnsw"})
+
+    result = asyncio.run(ElasticsearchClient(client=client).migrate_jobs_vector_index_type("int8_hnsw"))
+
+    assert result == "int8_hnsw"
+    assert set(index_types(client).values()) == {"int8_hnsw"}
+    assert client.indices.merged == ["jobs-2026.02,jobs-undated"]
+    template_embedding = client.indices.templates["jobs"]["template"]["mappings"]["properties"]["embedding"]
+    assert template_embedding["index_options"]["type"] == "int8_hnsw"
+
+    # Once every partition is migrated there is nothing left to do
+    client.indices.merged.clear()
+    asyncio.run(ElasticsearchClient(client=client).migrate_jobs_vector_index_type("int8_hnsw"))
+    assert client.indices.merged == []
+
+
+def test_vector_migration_rejects_a_partition_already_quantized_further(monkeypatch):
+    monkeypatch.setattr(es_client_module, "JOBS_VECTOR_INDEX_TYPE", "int8_hnsw")
+    client = jobs_client({"jobs-2026.01": "hnsw", "jobs-2026.02": "int4_hnsw"})
+
+    with pytest.raises(ValueError, match="jobs-2026.02"):
+        asyncio.run(ElasticsearchClient(client=client).migrate_jobs_vector_index_type("int8_hnsw"))
+    assert index_types(client) == {"jobs-2026.01": "hnsw", "jobs-2026.02": "int4_hnsw"}
+
+
+def test_vector_migration_requires_the_configured_type(monkeypatch):
+    monkeypatch.setattr(es_client_module, "JOBS_VECTOR_INDEX_TYPE", "hnsw")
+    client = jobs_client({"jobs-2026.01": "hnsw"})
+
+    with pytest.raises(ValueError, match="JOBS_VECTOR_INDEX_TYPE=int8_hnsw"):
+        asyncio.run(ElasticsearchClient(client=client).migrate_jobs_vector_index_type("int8_hnsw"))
+    assert index_types(client) == {"jobs-2026.01": "hnsw"}
+
+
+def test_migrated_partition_matches_the_template_of_the_configured_type():
+    client = jobs_client({"jobs-2026.01": "int8_hnsw"})
+    live = asyncio.run(client.indices.get_mapping("jobs"))
+    template = ElasticsearchClient.jobs_index_template("int8_hnsw")["template"]
+
+    drift = asyncio.run(ElasticsearchClient(client=client)._check_mappings(
+        live, {"mappings": template["mappings"]}, True, lambda index: (index, [])
+    ))
+
+    assert drift == {}
+    assert [index for index, _ in client.indices.mapping_updates] == ["jobs-2026.01"]
+
+
+def test_reindex_reuses_a_copy_left_by_a_failed_run():
+    body = ElasticsearchClient.index_definitions()["user_profiles"]
+    target = f"user_profiles.v{body['mappings']['_meta']['mapping_version']}"
+    client = FakeElasticsearch(indices=["user_profiles_old", target])
+
+    result = asyncio.run(ElasticsearchClient(client=client).reindex_behind_alias("user_profiles_old", "user_profiles", body))
+
+    assert result == target
+    assert len(client.reindexed) == 2
+    assert client.indices.alias_actions[-1] == [
+        {"add": {"index": target, "aliases": ["user_profiles"]}},
+        {"remove_index": {"index": "user_profiles_old"}}
+    ]
+
+
+def test_failed_reindex_lifts_the_write_block():
+    body = ElasticsearchClient.index_definitions()["user_profiles"]
+    client = FakeElasticsearch(indices=["user_profiles_old"])
+    # The second copy pass, once writes are blocked, fails
+    client.tasks.results["node:2"] = {"response": {"failures": [{"id": "doc"}]}}
+
+    with pytest.raises(RuntimeError, match="Failed to copy"):
+        asyncio.run(ElasticsearchClient(client=client).reindex_behind_alias("user_profiles_old", "user_profiles", body))
+
+    assert client.indices.settings[-1] == ("user_profiles_old", {"index.blocks.write": False})
+    assert client.indices.alias_actions == []
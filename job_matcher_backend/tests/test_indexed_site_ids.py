@@ -0,0 +1,31 @@
+import asyncio
+from src.clients import es_client as es_client_module
+from src.clients.es_client import ElasticsearchClient
+from .conftest import FakeElasticsearch
+
+# TESTS FOR THE ALREADY-INDEXED POSTINGS PRE-CHECK
+
+
+def indexed_client(site_ids):
+    return FakeElasticsearch({f"job_{site_id}": {"site_id": site_id} for site_id in site_ids})
+
+
+def checked_batches(client):
+    return [request["query"]["terms"]["site_id"] for request in client.requests]
+
+
+def test_known_postings_are_resolved_in_batches(monkeypatch):
+    monkeypatch.setattr(es_client_module, "SITE_ID_CHECK_BATCH", 4)
+    client = indexed_client({"101", "105", "109"})
+
+    known = asyncio.run(ElasticsearchClient(client=client).get_indexed_site_ids(list(range(100, 110))))
+
+    assert known == {101, 105, 109}
+    assert [len(batch) for batch in checked_batches(client)] == [4, 4, 2]
+
+
+def test_no_candidates_skip_elasticsearch():
+    client = indexed_client(set())
+
+    assert asyncio.run(ElasticsearchClient(client=client).get_indexed_site_ids([])) == set()
+    assert client.requests == []
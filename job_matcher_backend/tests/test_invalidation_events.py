@@ -0,0 +1,49 @@
+import asyncio
+from src.clients.invalidation_events import InvalidationListener, JOBS_REMOVED
+
+# TESTS FOR THE INVALIDATION EVENT LISTENER
+
+
+class FakeEventStore:
+    def __init__(self, events):
+        self.events = events
+
+    async def get_latest_invalidation_version(self):
+        return max((event["version"] for event in self.events), default=0)
+
+    async def get_invalidation_events(self, after_version, size=100):
+        return [event for event in self.events if event["version"] > after_version][:size]
+
+
+def test_listener_skips_old_events_and_dispatches_new_ones():
+    store = FakeEventStore([{"type": JOBS_REMOVED, "version": 1, "payload": {"user_ids": ["old"]}}])
+    listener = InvalidationListener(store)
+    invalidated = []
+    listener.subscribe(JOBS_REMOVED, lambda payload: invalidated.extend(payload["user_ids"]))
+
+    async def run():
+        await listener.poll()
+        store.events.append({"type": JOBS_REMOVED, "version": 2, "payload": {"user_ids": ["user_1", "user_2"]}})
+        store.events.append({"type": "other", "version": 3, "payload": {}})
+        received = await listener.poll()
+        return received, await listener.poll()
+
+    assert asyncio.run(run()) == (2, 0)
+    assert invalidated == ["user_1", "user_2"]
+
+
+def test_failing_handler_does_not_stop_the_others():
+    store = FakeEventStore([])
+    listener = InvalidationListener(store)
+    calls = []
+    listener.subscribe(JOBS_REMOVED, lambda payload: 1 / 0)
+    listener.subscribe(JOBS_REMOVED, lambda payload: calls.append(payload))
+
+    async def run():
+        await listener.poll()
+        store.events.append({"type": JOBS_REMOVED, "version": 5, "payload": {"job_count": 3}})
+        await listener.poll()
+
+    asyncio.run(run())
+
+    assert calls == [{"job_count": 3}]
@@ -0,0 +1,78 @@
+import asyncio
+from src.clients.es_client import ElasticsearchClient
+from src.types.types import SearchRequest
+from .conftest import FakeElasticsearch
+
+# TESTS FOR JOB TITLE TYPEAHEAD
+
+
+class FakeClient(FakeElasticsearch):
+    """Two jobs partitions; the later one lacks the job title subfields unless `subfields` is set."""
+    def __init__(self, titles, subfields=True):
+        older = ElasticsearchClient.jobs_mapping()
+        newer = ElasticsearchClient.jobs_mapping()
+        if not subfields:
+            newer["properties"]["job_title"] = {"type": "text"}
+        super().__init__(mappings={"jobs-2026.10": older, "jobs-2026.11": newer})
+        self.titles = titles
+
+    def search_response(self, **kwargs):
+        if "query" in kwargs:
+            return {"hits": {"hits": [{"_source": {"job_title": text}} for text in self.titles]}}
+        return {"suggest": {"job_titles": [{"options": [{"text": text} for text in self.titles]}]}}
+
+
+def test_suggest_returns_only_titles():
+    client = FakeClient(["Software Developer", "Software Engineer"])
+    es_client = ElasticsearchClient(client=client)
+
+    titles = asyncio.run(es_client.suggest_job_titles("soft", size=2))
+
+    assert titles == ["Software Developer", "Software Engineer"]
+    assert client.requests[0]["size"] == 0 and client.requests[0]["_source"] is False
+    assert client.requests[0]["suggest"]["job_titles"]["completion"]["field"] == "job_title.suggest"
+
+
+def test_blank_prefix_skips_elasticsearch():
+    client = FakeClient([])
+
+    assert asyncio.run(ElasticsearchClient(client=client).suggest_job_titles("  ")) == []
+    assert client.requests == []
+
+
+def test_keyword_search_matches_indexed_title_prefixes():
+    template = ElasticsearchClient.jobs_index_template()["template"]
+    title = template["mappings"]["properties"]["job_title"]["fields"]["prefix"]
+    body = ElasticsearchClient(client=FakeClient([])).build_keyword_search_body(SearchRequest(query="soft dev"))
+
+    assert {title["analyzer"], title["search_analyzer"]} <= set(template["settings"]["analysis"]["analyzer"])
+    assert body["query"]["bool"]["must"] == [
+        {"match": {"job_title.prefix": {"query": "soft dev", "operator": "and"}}}
+    ]
+
+
+
+def test_indices_without_subfields_fall_back_to_phrase_prefix():
+    client = FakeClient(["Software Developer", "Software Developer", "Software Engineer"], subfields=False)
+    es_client = ElasticsearchClient(client=client)
+
+    titles = asyncio.run(es_client.suggest_job_titles("soft", size=2))
+    body = es_client.build_keyword_search_body(
+        SearchRequest(query="soft dev"), title_prefix=asyncio.run(es_client.job_title_subfields())
+    )
+
+    assert titles == ["Software Developer", "Software Engineer"]
+    assert client.requests[0]["query"] == {"match_phrase_prefix": {"job_title": {"query": "soft"}}}
+    assert body["query"]["bool"]["must"] == [{"match_phrase_prefix": {"job_title": {"query": "soft dev"}}}]
+    # The missing mapping is not looked up again on every request
+    assert len(client.indices.field_mapping_requests) == 1
+
+
+def test_migrated_indices_are_checked_once():
+    client = FakeClient(["Software Developer"])
+    es_client = ElasticsearchClient(client=client)
+
+    for _ in range(3):
+        asyncio.run(es_client.suggest_job_titles("soft"))
+
+    assert len(client.indices.field_mapping_requests) == 1
@@ -0,0 +1,160 @@
+import asyncio
+import pytest
+from src.clients import es_client as es_client_module
+from src.clients.es_client import ElasticsearchClient
+from src.jobs_processor import jobs_expired_removal as removal
+from .conftest import FakeElasticsearch, FakeTasks
+
+# TESTS FOR THE REMOVAL OF EXPIRED JOBS AND THEIR APPLICATIONS
+
+
+def fake_client(task_result=None, indices=()):
+    client = FakeElasticsearch(indices=indices)
+    client.tasks = FakeTasks(task_result or {"response": {"deleted": 0}})
+    return client
+
+
+def delete_expired(client):
+    es_client = ElasticsearchClient(client=client)
+    return asyncio.run(es_client.delete_jobs_by_query("jobs-2026.10", {"range": {"expiration_date": {"lt": "2026-10-18"}}}))
+
+
+def test_delete_runs_as_a_background_sliced_task():
+    client = fake_client({"response": {"deleted": 10, "failures": []}})
+
+    result = delete_expired(client)
+
+    assert result["deleted"] == 10
+    assert client.deletes[0]["slices"] == "auto" and client.deletes[0]["wait_for_completion"] is False
+
+
+def test_task_is_polled_until_complete():
+    client = fake_client({"response": {"deleted": 10}})
+    client.tasks.polls = 2
+
+    result = asyncio.run(ElasticsearchClient(client=client).wait_for_task("node:1", poll_interval=0))
+
+    assert result == {"deleted": 10}
+    assert client.tasks.calls == 3
+
+
+def test_failed_task_raises():
+    with pytest.raises(RuntimeError, match="node:1 failed"):
+        delete_expired(fake_client({"error": {"type": "search_phase_execution_exception"}}))
+
+
+def test_delete_failures_raise():
+    failures = [{"id": "job_1", "cause": {"type": "es_rejected_execution_exception"}}]
+
+    with pytest.raises(RuntimeError, match="Failed to delete jobs from jobs-2026.10"):
+        delete_expired(fake_client({"response": {"deleted": 9, "failures": failures}}))
+
+
+def test_expired_partitions_leave_the_current_and_undated_ones():
+    client = fake_client(indices=["jobs-2026.08", "jobs-2026.09.v1a2b", "jobs-2026.11", "jobs-undated"])
+
+    partitions = asyncio.run(ElasticsearchClient(client=client).expired_job_partitions("2026-10-18"))
+
+    assert partitions == ["jobs-2026.08", "jobs-2026.09.v1a2b"]
+    # The current month's partition is created so the read alias never goes empty
+    assert "jobs-2026.10" in client.indices.indices
+
+    # A concurrent ingestion run may have created it first
+    assert asyncio.run(ElasticsearchClient(client=client).expired_job_partitions("2026-10-18")) == partitions
+
+
+def test_cascade_deletes_applications_and_returns_their_users(monkeypatch):
+    applications = [
+        {"_id": "app_1", "_source": {"user_id": "user_b"}},
+        {"_id": "app_2", "_source": {"user_id": "user_a"}},
+        {"_id": "app_3", "_source": {"user_id": "user_b"}},
+    ]
+    queried, bulked = [], []
+
+    async def async_scan(client, index, query, _source, size):
+        queried.append(query["query"]["terms"]["job_id"])
+        for hit in applications:
+            yield hit
+
+    async def async_bulk(client, actions, raise_on_error):
+        bulked.extend(actions)
+        return len(actions), []
+
+    monkeypatch.setattr(es_client_module, "async_scan", async_scan)
+    monkeypatch.setattr(es_client_module, "async_bulk", async_bulk)
+    es_client = ElasticsearchClient(client=fake_client())
+    invalidated = []
+    monkeypatch.setattr(es_client.match_context_cache, "invalidate", invalidated.append)
+
+    user_ids = asyncio.run(es_client.delete_applications_for_jobs(["job_1", "job_2"]))
+
+    assert user_ids == ["user_a", "user_b"]
+    assert queried == [["job_1", "job_2"]]
+    assert [action["_id"] for action in bulked] == ["app_1", "app_2", "app_3"]
+    assert sorted(invalidated) == ["user_a", "user_b"]
+    assert asyncio.run(es_client.delete_applications_for_jobs([])) == []
+
+
+class FakeRemovalStore:
+    """Stands in for the module's Elasticsearch client and fails the delete by query when asked."""
+    def __init__(self, fail_delete=False):
+        self.fail_delete = fail_delete
+        self.cascaded = []
+        self.events = []
+        self.closed = False
+
+    async def jobs_partitioned(self):
+        return True
+
+    async def expired_job_partitions(self, today):
+        return ["jobs-2020.01"]
+
+    def jobs_partition(self, today):
+        return "jobs-current"
+
+    async def scan_job_ids(self, index, query=None):
+        return ["dropped_job"] if index == "jobs-2020.01" else ["expired_job"]
+
+    async def drop_job_partitions(self, partitions):
+        pass
+
+    async def delete_jobs_by_query(self, index, query):
+        if self.fail_delete:
+            raise RuntimeError("Failed to delete jobs")
+        return {"deleted": 1}
+
+    async def delete_applications_for_jobs(self, job_ids):
+        self.cascaded.append(job_ids)
+        return [f"user_of_{job_id}" for job_id in job_ids]
+
+    async def store_location_facets(self):
+        pass
+
+    async def publish_invalidation_event(self, event_type, payload):
+        self.events.append(payload)
+
+    async def close(self):
+        self.closed = True
+
+
+def test_removal_cascades_dropped_and_deleted_jobs(monkeypatch):
+    store = FakeRemovalStore()
+    monkeypatch.setattr(removal, "es_client", store)
+
+    asyncio.run(removal.remove_expired_jobs())
+
+    assert store.cascaded == [["dropped_job"], ["expired_job"]]
+    assert store.events == [{"job_count": 2, "user_ids": ["user_of_dropped_job", "user_of_expired_job"]}]
+    assert store.closed
+
+
+def test_failed_removal_still_closes_the_client(monkeypatch):
+    store = FakeRemovalStore(fail_delete=True)
+    monkeypatch.setattr(removal, "es_client", store)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(removal.remove_expired_jobs())
+
+    # Applications of the dropped partitions are removed before the failing delete
+    assert store.cascaded == [["dropped_job"]]
+    assert store.closed
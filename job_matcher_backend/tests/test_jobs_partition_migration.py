@@ -0,0 +1,81 @@
+import asyncio
+from datetime import datetime
+from src.clients.es_client import ElasticsearchClient
+from src.jobs_processor import jobs_partition_migration as migration
+from .conftest import FakeElasticsearch
+
+# TESTS FOR THE MIGRATION OF THE LEGACY JOBS INDEX INTO PARTITIONS
+
+
+class FakeClient(FakeElasticsearch):
+    """Reindexes into the partitions given as `copied_into`, failing the copy when `failures` is set."""
+    def __init__(self, indices=(), aliased=False, copied_into=(), failures=()):
+        super().__init__(indices=indices, aliased=aliased)
+        self.copied_into = copied_into
+        self.failures = list(failures)
+
+    async def reindex(self, **kwargs):
+        self.reindexed.append(kwargs)
+        self.indices.indices.update(self.copied_into)
+        return {"created": len(self.copied_into), "failures": self.failures}
+
+
+def migrate(monkeypatch, client):
+    es_client = ElasticsearchClient(client=client)
+    ensured = []
+
+    async def ensure_jobs_partitions():
+        ensured.append(True)
+    es_client.ensure_jobs_partitions = ensure_jobs_partitions
+    monkeypatch.setattr(migration, "es_client", es_client)
+    asyncio.run(migration.migrate_jobs_to_partitions())
+    return ensured
+
+
+def test_partitioned_layout_is_left_alone(monkeypatch):
+    client = FakeClient(["jobs-2026.10"], aliased=True)
+
+    ensured = migrate(monkeypatch, client)
+
+    assert client.reindexed == [] and client.indices.alias_actions == []
+    assert client.indices.templates == {} and ensured == []
+
+
+def test_fresh_cluster_gets_the_partitioned_layout(monkeypatch):
+    client = FakeClient()
+
+    ensured = migrate(monkeypatch, client)
+
+    assert ensured == [True]
+    assert client.reindexed == []
+
+
+def test_legacy_index_is_copied_and_replaced_by_the_alias(monkeypatch):
+    client = FakeClient(["jobs"], copied_into=["jobs-undated", "jobs-2026.11"])
+
+    ensured = migrate(monkeypatch, client)
+
+    # Partitions created during the copy must not claim the alias the legacy index still holds
+    assert "aliases" not in client.indices.templates["jobs"]["template"]
+    (reindex,) = client.reindexed
+    assert reindex["source"] == {"index": "jobs"}
+    assert reindex["dest"] == {"index": "jobs-undated", "op_type": "create"}
+    assert reindex["script"]["source"] == migration.PARTITION_SCRIPT
+    assert reindex["conflicts"] == "proceed"
+
+    current = ElasticsearchClient.jobs_partition(datetime.today().strftime("%Y-%m-%d"))
+    (actions,) = client.indices.alias_actions
+    assert sorted(actions[0]["add"]["indices"]) == sorted({"jobs-undated", "jobs-2026.11", current})
+    assert actions[0]["add"]["alias"] == "jobs"
+    assert actions[1] == {"remove_index": {"index": "jobs"}}
+    assert ensured == [True]
+
+
+def test_failed_copy_keeps_the_legacy_index(monkeypatch):
+    client = FakeClient(["jobs"], copied_into=["jobs-undated"], failures=[{"id": "job_1", "cause": {}}])
+
+    ensured = migrate(monkeypatch, client)
+
+    assert len(client.reindexed) == 1
+    assert client.indices.alias_actions == []
+    assert ensured == []
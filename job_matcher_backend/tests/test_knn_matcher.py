@@ -95,7 +95,7 @@ async def main():
         expected_jobs_list = user["expected_jobs"]  # păstrează ordinea!
         expected_jobs_set = set(expected_jobs_list)
         try:
-            results = await matcher.get_matching_jobs_with_user_id(user_id, top_k=top_k)
+            results, _ = await matcher.get_matching_jobs_page(user_id, page_size=top_k)
         except Exception as e:
             print(f"User {user_id}: ERROR: {e}")
             continue
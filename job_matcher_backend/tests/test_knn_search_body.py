@@ -0,0 +1,77 @@
+import asyncio
+from src.clients.es_client import ElasticsearchClient
+from .conftest import FakeElasticsearch
+
+# TESTS FOR THE JOB MATCH KNN REQUEST
+
+
+class FakeClient(FakeElasticsearch):
+    def __init__(self, hits=()):
+        super().__init__()
+        self.hits = list(hits)
+
+    def search_response(self, **kwargs):
+        return {"hits": {"hits": self.hits}}
+
+    @property
+    def bodies(self):
+        return [request["body"] for request in self.requests]
+
+
+def hit(job_id, score):
+    return {
+        "_id": job_id, "_score": score,
+        "_source": {
+            "job_title": "Developer", "company": "Company", "date_uploaded": "2026-01-01",
+            "location": {"country": "Romania", "city": "Iasi"}
+        }
+    }
+
+
+def test_num_candidates_follow_k_and_recall_target():
+    assert ElasticsearchClient.knn_num_candidates(15, recall_target=0.95) == 300
+    assert ElasticsearchClient.knn_num_candidates(15, recall_target=0.9) == 150
+    # Clamped to [100, 10000], but never below k
+    assert ElasticsearchClient.knn_num_candidates(1, recall_target=0.95) == 100
+    assert ElasticsearchClient.knn_num_candidates(5000, recall_target=0.95) == 10000
+    assert ElasticsearchClient.knn_num_candidates(12000, recall_target=0.95) == 12000
+
+
+def test_excluded_jobs_are_filtered_inside_knn():
+    client = FakeClient([hit("job_1", 0.9), hit("job_2", 0.8)])
+    es_client = ElasticsearchClient(client=client)
+
+    jobs = asyncio.run(es_client.search_jobs_by_embedding([0.1] * 4, k=15, exclude_job_ids=["a", "a", "b"],
+                                                          rescore_oversample=0))
+
+    knn = client.bodies[0]["knn"]
+    assert knn["k"] == 15 and client.bodies[0]["size"] == 15
+    assert knn["num_candidates"] == ElasticsearchClient.knn_num_candidates(15)
+    assert sorted(knn["filter"]["bool"]["must_not"][0]["ids"]["values"]) == ["a", "b"]
+    assert "rescore" not in client.bodies[0]
+    assert [job.id for job in jobs] == ["job_1", "job_2"]
+
+
+def test_unfiltered_search_over_fetches_and_drops_excluded_jobs():
+    client = FakeClient([hit("a", 0.95), hit("job_1", 0.9), hit("job_2", 0.8)])
+    es_client = ElasticsearchClient(client=client)
+
+    jobs = asyncio.run(es_client.search_jobs_by_embedding([0.1] * 4, k=2, exclude_job_ids=["a", "b"],
+                                                          filtered=False, rescore_oversample=0))
+
+    body = client.bodies[0]
+    assert "filter" not in body["knn"]
+    assert body["size"] == 4 and body["knn"]["k"] == 4
+    assert [job.id for job in jobs] == ["job_1", "job_2"]
+
+
+def test_rescore_oversamples_knn_and_keeps_the_response_size():
+    client = FakeClient()
+    es_client = ElasticsearchClient(client=client)
+
+    asyncio.run(es_client.search_jobs_by_embedding([0.1] * 4, k=10, rescore_oversample=3))
+
+    body = client.bodies[0]
+    assert body["size"] == 10
+    assert body["knn"]["k"] == 30 and body["rescore"]["window_size"] == 30
+    assert body["knn"]["num_candidates"] == ElasticsearchClient.knn_num_candidates(30)
@@ -0,0 +1,89 @@
+import asyncio
+from src.clients.es_client import ElasticsearchClient
+from src.jobs_processor.location_facets import LocationFacets
+from .conftest import FakeElasticsearch
+
+# TESTS FOR THE MATERIALIZED LOCATION FACETS
+
+
+def bucket(key, count, cities=None):
+    result = {"key": key, "doc_count": count}
+    if cities is not None:
+        result["cities"] = {"buckets": [bucket(city, city_count) for city, city_count in cities]}
+    return result
+
+
+class FakeClient(FakeElasticsearch):
+    """Serves one country/city aggregation and a scraper_metadata index held in memory."""
+    def __init__(self, buckets):
+        super().__init__()
+        self.buckets = buckets
+
+    def search_response(self, **kwargs):
+        return {"aggregations": {"countries": {"buckets": self.buckets}}}
+
+
+def full_reads(client):
+    return sum(1 for fields in client.gets if fields is None)
+
+
+def test_aggregation_becomes_the_facet_tree():
+    client = FakeClient([
+        bucket("Romania", 3, [("Iasi", 2), ("Cluj", 1)]),
+        bucket("Germany", 1, [("Berlin", 1)])
+    ])
+
+    facets = asyncio.run(ElasticsearchClient(client=client).build_location_facets())
+
+    assert facets == [
+        {"country": "Romania", "count": 3, "cities": [{"city": "Iasi", "count": 2}, {"city": "Cluj", "count": 1}]},
+        {"country": "Germany", "count": 1, "cities": [{"city": "Berlin", "count": 1}]}
+    ]
+
+
+def test_missing_facets_are_built_and_stored():
+    client = FakeClient([bucket("Romania", 2, [("Iasi", 2)])])
+    facets = LocationFacets(ElasticsearchClient(client=client))
+
+    assert asyncio.run(facets.get_countries()) == ["Romania"]
+    assert asyncio.run(facets.get_cities("Romania")) == ["Iasi"]
+    assert asyncio.run(facets.get_cities("Germany")) == []
+    assert len(client.requests) == 1
+    assert client.documents["location_facets"]["facets"][0]["country"] == "Romania"
+
+
+def test_unchanged_version_is_not_reloaded():
+    client = FakeClient([bucket("Romania", 2, [("Iasi", 2)])])
+    es_client = ElasticsearchClient(client=client)
+    asyncio.run(es_client.store_location_facets())
+
+    within = LocationFacets(es_client, check_interval=3600)
+    for _ in range(3):
+        asyncio.run(within.get_countries())
+    assert full_reads(client) == 1
+    assert len(client.gets) == 2
+
+    client.gets.clear()
+    after = LocationFacets(es_client, check_interval=0)
+    for _ in range(3):
+        asyncio.run(after.get_countries())
+    # The version is checked on every read, the facets are read once
+    assert full_reads(client) == 1
+    assert len(client.gets) == 4
+    assert len(client.requests) == 1
+
+
+def test_new_version_is_loaded_after_invalidate():
+    client = FakeClient([bucket("Romania", 2, [("Iasi", 2)])])
+    es_client = ElasticsearchClient(client=client)
+    facets = LocationFacets(es_client, check_interval=3600)
+    assert asyncio.run(facets.get_countries()) == ["Romania"]
+
+    client.buckets = [bucket("Germany", 5, [("Berlin", 5)]), bucket("Romania", 2, [("Iasi", 2)])]
+    asyncio.run(es_client.store_location_facets())
+    # Within the check interval the old tree is still served
+    assert asyncio.run(facets.get_countries()) == ["Romania"]
+
+    facets.invalidate()
+    assert asyncio.run(facets.get_countries()) == ["Germany", "Romania"]
+    assert asyncio.run(facets.get_cities("Germany")) == ["Berlin"]
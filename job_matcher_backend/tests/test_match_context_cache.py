@@ -0,0 +1,87 @@
+import asyncio
+import time
+from src.clients import es_client as es_client_module
+from src.clients.es_client import ElasticsearchClient
+from src.clients.match_context_cache import MatchContext, MatchContextCache
+from .conftest import FakeElasticsearch
+
+# TESTS FOR THE PER-USER MATCH CONTEXT CACHE
+
+
+def make_context(job_ids=("job_1",)):
+    return MatchContext([0.1, 0.2, 0.3], job_ids)
+
+
+def test_hit_after_put_and_counters():
+    cache = MatchContextCache(max_size=10, ttl=60)
+    assert cache.get("user") is None
+
+    cache.put("user", make_context(), cache.generation("user"))
+    context = cache.get("user")
+
+    assert context.applied_job_ids == {"job_1"}
+    assert context.embedding.dtype.name == "float32"
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_invalidation_discards_in_flight_lookup():
+    cache = MatchContextCache(max_size=10, ttl=60)
+    generation = cache.generation("user")
+
+    # The user applies to a job while their context is being fetched
+    cache.invalidate("user")
+    cache.put("user", make_context(), generation)
+
+    assert cache.get("user") is None
+
+
+def test_ttl_and_lru_eviction():
+    cache = MatchContextCache(max_size=2, ttl=0.05)
+    for user in ["a", "b"]:
+        cache.put(user, make_context(), cache.generation(user))
+    cache.get("a")
+    cache.put("c", make_context(), cache.generation("c"))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+
+    time.sleep(0.06)
+    assert cache.get("a") is None
+
+
+
+def test_remembered_invalidations_are_bounded():
+    cache = MatchContextCache(max_size=2, ttl=60)
+    in_flight = cache.generation("user_0")
+    for i in range(100):
+        cache.invalidate(f"user_{i}")
+
+    assert len(cache._invalidated) == 2
+    # user_0's invalidation was forgotten, but the lookup that started before it is still discarded
+    cache.put("user_0", make_context(), in_flight)
+    assert cache.get("user_0") is None
+
+    cache.put("user_0", make_context(), cache.generation("user_0"))
+    assert cache.get("user_0") is not None
+
+
+class FakePagedClient(FakeElasticsearch):
+    """Serves `count` applications sorted like `get_user_applications`, honouring `search_after`."""
+    def __init__(self, count):
+        super().__init__()
+        self.hits = [{"_source": {"job_id": f"job_{i}"}, "sort": [count - i, f"job_{i}"]} for i in range(count)]
+
+    def search_response(self, index, body):
+        after = body.get("search_after")
+        start = [hit["sort"] for hit in self.hits].index(after) + 1 if after else 0
+        return {"hits": {"hits": self.hits[start:start + body["size"]]}}
+
+
+def test_applied_job_ids_are_read_past_one_page(monkeypatch):
+    monkeypatch.setattr(es_client_module, "APPLIED_JOB_IDS_PAGE_SIZE", 3)
+    client = FakePagedClient(7)
+
+    job_ids = asyncio.run(ElasticsearchClient(client=client).get_user_applied_job_ids("user"))
+
+    assert job_ids == [f"job_{i}" for i in range(7)]
+    assert [request["body"].get("search_after") for request in client.requests] == [None, [5, "job_2"], [2, "job_5"]]
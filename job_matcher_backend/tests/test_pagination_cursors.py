@@ -0,0 +1,280 @@
+import asyncio
+from datetime import date, timedelta
+import pytest
+from elasticsearch.exceptions import NotFoundError
+from src.applied_jobs.applied_jobs_manager import AppliedJobsManager
+from src.clients import es_client as es_client_module
+from src.clients.es_client import ElasticsearchClient, encode_cursor, decode_cursor
+from src.clients.match_context_cache import MatchContext
+from src.jobs_matcher import jobs_matcher as jobs_matcher_module
+from src.jobs_matcher.jobs_matcher import JobsMatcher
+from src.types.types import SearchRequest
+from .conftest import FakeElasticsearch
+
+# TESTS FOR CURSOR PAGINATION OF MATCHES AND KEYWORD SEARCH
+
+
+def job(job_id, score, expiration_date=None):
+    return {
+        "id": job_id, "job_title": f"Job {job_id}", "company": "Company",
+        "location": {"country": "Romania", "city": "Cluj"}, "date_uploaded": "2026-01-01",
+        "score": score, "expiration_date": expiration_date
+    }
+
+
+class FakeMatchStore:
+    """
+    Stands in for the Elasticsearch client of the matcher and records live KNN calls.
+    The match context stays cached until `invalidate`, like the in-process cache.
+    """
+    def __init__(self, recommendations, live_jobs, applied=(), recommendations_seq_no=1):
+        self.recommendations = recommendations
+        self.recommendations_seq_no = recommendations_seq_no
+        self.live_jobs = live_jobs
+        self.applied = applied
+        self.knn_calls = []
+        self.context = None
+
+    async def get_match_context(self, user_id):
+        if self.context is None:
+            self.context = MatchContext([1.0, 0.0], self.applied, profile_seq_no=1)
+        return self.context
+
+    def invalidate(self):
+        self.context = None
+
+    async def get_user_recommendations(self, user_id):
+        if self.recommendations is None:
+            return None
+        return self.recommendations, self.recommendations_seq_no
+
+    async def search_jobs_by_embedding(self, embedding, k, exclude_job_ids, model):
+        self.knn_calls.append((k, sorted(exclude_job_ids)))
+        jobs = [j for j in self.live_jobs if j["id"] not in exclude_job_ids][:k]
+        return [model.from_source(j["id"], j) for j in jobs]
+
+
+def matcher_for(store):
+    return JobsMatcher(None, store, None)
+
+
+def test_match_cursor_continues_and_ends():
+    jobs = [job(f"job_{i}", 1.0 - i / 100) for i in range(5)]
+    store = FakeMatchStore(jobs, [])
+    matcher = matcher_for(store)
+
+    first, cursor = asyncio.run(matcher.get_matching_jobs_page("user", page_size=3))
+    second, end = asyncio.run(matcher.get_matching_jobs_page("user", page_size=3, cursor=cursor))
+
+    assert [j.id for j in first] == ["job_0", "job_1", "job_2"]
+    assert [j.id for j in second] == ["job_3", "job_4"]
+    assert end is None
+    assert store.knn_calls == []
+
+
+def test_new_profile_ranking_excludes_applied_and_expired_jobs():
+    yesterday = (date.today() - timedelta(days=1)).isoformat()
+    live = [job("applied", 0.9), job("expired", 0.8, yesterday), job("open", 0.7)]
+    store = FakeMatchStore(None, live, applied=["applied"])
+
+    page, cursor = asyncio.run(matcher_for(store).get_matching_jobs_page("user"))
+
+    assert [j.id for j in page] == ["open"]
+    assert cursor is None
+    assert store.knn_calls[0][1] == ["applied"]
+    # Rankings are only stored by the batch run, never on a read
+    assert store.recommendations is None
+
+
+def test_new_profile_pages_reuse_one_live_ranking(monkeypatch):
+    monkeypatch.setattr(jobs_matcher_module, "RECOMMENDATIONS_TOP_N", 6)
+    jobs = [job(f"job_{i}", 1.0 - i / 100) for i in range(5)]
+    store = FakeMatchStore(None, jobs)
+    matcher = matcher_for(store)
+
+    first, cursor = asyncio.run(matcher.get_matching_jobs_page("user", page_size=3))
+    second, end = asyncio.run(matcher.get_matching_jobs_page("user", page_size=3, cursor=cursor))
+
+    assert [j.id for j in first + second] == [f"job_{i}" for i in range(5)]
+    assert end is None
+    assert [k for k, _ in store.knn_calls] == [6]
+
+    # A profile or applications change drops the cached context and its ranking
+    store.invalidate()
+    asyncio.run(matcher.get_matching_jobs_page("user", page_size=3))
+    assert [k for k, _ in store.knn_calls] == [6, 6]
+
+
+def test_recommendations_of_an_older_profile_are_ignored():
+    stale = [job("stale", 0.9)]
+    store = FakeMatchStore(stale, [job("fresh", 0.8)], recommendations_seq_no=0)
+
+    page, cursor = asyncio.run(matcher_for(store).get_matching_jobs_page("user"))
+
+    assert [j.id for j in page] == ["fresh"]
+    assert len(store.knn_calls) == 1
+
+
+def test_short_page_of_full_ranking_ranks_deeper(monkeypatch):
+    monkeypatch.setattr(jobs_matcher_module, "RECOMMENDATIONS_TOP_N", 4)
+    monkeypatch.setattr(jobs_matcher_module, "MATCH_RANKING_MAX_JOBS", 8)
+    jobs = [job(f"job_{i}", 1.0 - i / 100) for i in range(10)]
+    # Most of the stored ranking has been applied to since it was computed
+    store = FakeMatchStore(jobs[:4], jobs, applied=["job_0", "job_1", "job_2"])
+
+    page, cursor = asyncio.run(matcher_for(store).get_matching_jobs_page("user", page_size=3))
+
+    assert [j.id for j in page] == ["job_3", "job_4", "job_5"]
+    assert store.knn_calls == [(8, ["job_0", "job_1", "job_2"])]
+    assert store.recommendations == jobs[:4]
+    assert cursor is not None
+
+
+def test_deep_pages_rank_once_and_end_at_the_deepest_ranking(monkeypatch):
+    monkeypatch.setattr(jobs_matcher_module, "RECOMMENDATIONS_TOP_N", 4)
+    monkeypatch.setattr(jobs_matcher_module, "MATCH_RANKING_MAX_JOBS", 12)
+    jobs = [job(f"job_{i}", 1.0 - i / 100) for i in range(20)]
+    store = FakeMatchStore(jobs[:4], jobs)
+    matcher = matcher_for(store)
+
+    page, cursor = asyncio.run(matcher.get_matching_jobs_page(
+        "user", page_size=3, cursor=encode_cursor([jobs[5]["score"], "job_5"])
+    ))
+    pages = [page]
+    while cursor:
+        page, cursor = asyncio.run(matcher.get_matching_jobs_page("user", page_size=3, cursor=cursor))
+        pages.append(page)
+
+    assert [[j.id for j in page] for page in pages] == [
+        ["job_6", "job_7", "job_8"], ["job_9", "job_10", "job_11"]
+    ]
+    # Every later page reads the deep ranking kept with the match context
+    assert [k for k, _ in store.knn_calls] == [12]
+
+
+def test_exhausted_ranking_is_not_extended():
+    store = FakeMatchStore([job("job_0", 0.9)], [job("job_0", 0.9), job("job_1", 0.8)])
+
+    page, cursor = asyncio.run(matcher_for(store).get_matching_jobs_page("user"))
+
+    assert [j.id for j in page] == ["job_0"] and cursor is None
+    assert store.knn_calls == []
+
+
+def test_malformed_match_cursor_is_rejected():
+    store = FakeMatchStore([], [])
+    with pytest.raises(ValueError):
+        asyncio.run(matcher_for(store).get_matching_jobs_page("user", cursor=encode_cursor({"score": 1})))
+
+
+class FakeSearchClient(FakeElasticsearch):
+    """Serves `hits` by score, honouring `from`, `search_after` and points in time."""
+    def __init__(self, count):
+        super().__init__(mappings={"jobs-2026.10": ElasticsearchClient.jobs_mapping()})
+        self.hits = [
+            {"_id": f"job_{i}", "_score": 10.0 - i, "sort": [10.0 - i, i], "_source": job(f"job_{i}", 0)}
+            for i in range(count)
+        ]
+        self.expired = set()
+
+    def search_response(self, index=None, body=None):
+        if "pit" in body and body["pit"]["id"] in self.expired:
+            raise NotFoundError("search_context_missing_exception", None, {})
+        start = body.get("from", 0)
+        if "search_after" in body:
+            start = next(i for i, hit in enumerate(self.hits) if hit["sort"] == body["search_after"]) + 1
+        response = {"hits": {"hits": self.hits[start:start + body["size"]]}}
+        if "pit" in body:
+            response["pit_id"] = body["pit"]["id"]
+        return response
+
+
+def keyword_search(es_client, cursor=None, page_size=2):
+    async def no_context(user_id):
+        return None
+    es_client.get_match_context = no_context
+    return asyncio.run(es_client.search_jobs_by_keyword_with_similarity(
+        SearchRequest(query="job"), "user", page_size=page_size, cursor=cursor
+    ))
+
+
+def test_first_keyword_page_opens_no_point_in_time():
+    client = FakeSearchClient(5)
+
+    jobs, cursor = keyword_search(ElasticsearchClient(client=client))
+
+    assert [j.id for j in jobs] == ["job_0", "job_1"]
+    assert client.opened == []
+    assert decode_cursor(cursor) == {"pit": None, "from": 2}
+
+
+def test_keyword_cursor_continues_on_a_point_in_time_and_ends():
+    client = FakeSearchClient(5)
+    es_client = ElasticsearchClient(client=client)
+
+    _, cursor = keyword_search(es_client)
+    second, cursor = keyword_search(es_client, cursor)
+    third, end = keyword_search(es_client, cursor)
+
+    assert [j.id for j in second] == ["job_2", "job_3"]
+    assert [j.id for j in third] == ["job_4"]
+    assert end is None
+    assert client.opened == ["jobs"]
+    assert client.closed == ["pit_1"]
+
+
+def test_expired_keyword_cursor_is_rejected():
+    client = FakeSearchClient(5)
+    es_client = ElasticsearchClient(client=client)
+    _, cursor = keyword_search(es_client)
+    _, cursor = keyword_search(es_client, cursor)
+    client.expired.add("pit_1")
+
+    with pytest.raises(ValueError, match="expired"):
+        keyword_search(es_client, cursor)
+
+
+def test_ranked_keyword_cursor_ends_at_the_rerank_window(monkeypatch):
+    monkeypatch.setattr(es_client_module, "KEYWORD_RERANK_WINDOW", 3)
+    client = FakeSearchClient(5)
+    es_client = ElasticsearchClient(client=client)
+
+    async def context(user_id):
+        return MatchContext([1.0, 0.0], [])
+    es_client.get_match_context = context
+    request = SearchRequest(query="job")
+
+    first, cursor = asyncio.run(es_client.search_jobs_by_keyword_with_similarity(request, "user", "rescore", 2))
+    second, end = asyncio.run(es_client.search_jobs_by_keyword_with_similarity(request, "user", "rescore", 2, cursor))
+
+    assert [j.id for j in first] == ["job_0", "job_1"]
+    assert [j.id for j in second] == ["job_2"]
+    assert end is None
+
+
+@pytest.mark.parametrize("state", [
+    ["pit", 1],
+    {"offset": "10"},
+    {"offset": -15},
+    {"pit": None, "from": True},
+    {"pit": 5, "search_after": [1.0, 2]},
+    {"pit": "pit_1", "search_after": [1.0]},
+    {"pit": "pit_1", "search_after": [1.0, 2], "extra": 1},
+])
+def test_malformed_keyword_cursors_are_rejected(state):
+    client = FakeSearchClient(5)
+
+    with pytest.raises(ValueError, match="Invalid pagination cursor"):
+        keyword_search(ElasticsearchClient(client=client), encode_cursor(state))
+    assert client.opened == []
+
+
+def test_malformed_application_cursor_is_rejected():
+    class FailingStore:
+        async def get_enriched_applications(self, user_id, page_size, search_after):
+            raise AssertionError("Elasticsearch must not be queried")
+
+    manager = AppliedJobsManager(FailingStore())
+    for cursor in [encode_cursor({"applied_date": 1}), encode_cursor(["2026-01-01", "job_1"]), "%%%"]:
+        with pytest.raises(ValueError, match="Invalid pagination cursor"):
+            asyncio.run(manager.get_enriched_applications("user", 10, cursor))
@@ -0,0 +1,78 @@
+import asyncio
+from types import SimpleNamespace
+from src.preprocessor.preprocessing_cache import PreprocessingCache
+from src.preprocessor import preprocessor as preprocessor_module
+from src.preprocessor.preprocessor import TextPreprocessor
+
+# TESTS FOR THE GPT PREPROCESSING CACHE
+
+
+class FakeGPTClient:
+    def __init__(self):
+        self.calls = []
+        self.temperatures = []
+
+    async def create(self, messages, model="gpt-4o-mini", temperature=0.7):
+        self.calls.append(messages[1]["content"])
+        self.temperatures.append(temperature)
+        content = f"structured {len(self.calls)}: {messages[1]['content']}"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def make_preprocessor(path, max_entries=100):
+    preprocessor = TextPreprocessor(cache=PreprocessingCache(path=str(path), max_entries=max_entries))
+    preprocessor.gpt_client = FakeGPTClient()
+    return preprocessor
+
+
+def test_same_text_is_preprocessed_once_across_instances(tmp_path):
+    first = make_preprocessor(tmp_path / "cache.sqlite3")
+    output = asyncio.run(first.preprocess_job("Java developer"))
+
+    second = make_preprocessor(tmp_path / "cache.sqlite3")
+    assert asyncio.run(second.preprocess_job("Java developer")) == output
+    assert second.gpt_client.calls == []
+    assert second.cache.stats()["hit_rate"] == 1.0
+
+
+def test_prompt_version_separates_entries(tmp_path):
+    preprocessor = make_preprocessor(tmp_path / "cache.sqlite3")
+
+    async def run():
+        job = await preprocessor.preprocess_job("Java developer")
+        cv = await preprocessor.preprocess_cv("Java developer")
+        return job, cv
+
+    job, cv = asyncio.run(run())
+
+    assert job != cv
+    assert len(preprocessor.gpt_client.calls) == 2
+
+
+def test_deterministic_runs_do_not_reuse_sampled_outputs(tmp_path, monkeypatch):
+    sampled = make_preprocessor(tmp_path / "cache.sqlite3")
+    asyncio.run(sampled.preprocess_job("Java developer"))
+
+    monkeypatch.setattr(preprocessor_module, "PREPROCESS_TEMPERATURE", 0.0)
+    deterministic = make_preprocessor(tmp_path / "cache.sqlite3")
+    asyncio.run(deterministic.preprocess_job("Java developer"))
+    asyncio.run(deterministic.preprocess_job("Java developer"))
+
+    assert deterministic.gpt_client.temperatures == [0.0]
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = PreprocessingCache(path=str(tmp_path / "cache.sqlite3"), max_entries=10)
+
+    async def run():
+        for i in range(10):
+            await cache.put(f"key-{i}", f"output {i}")
+        await cache.get("key-0")
+        await cache.put("key-10", "output 10")
+        return [await cache.get(f"key-{i}") for i in range(11)]
+
+    outputs = asyncio.run(run())
+
+    assert outputs[0] == "output 0" and outputs[10] == "output 10"
+    assert outputs[1:3] == [None, None]
+    assert sum(output is not None for output in outputs) == 9
@@ -0,0 +1,103 @@
+import asyncio
+from contextlib import asynccontextmanager
+from src.jobs_matcher.recommendations_builder import build_user_recommendations
+from .conftest import FakeElasticsearch
+
+# TESTS FOR THE BATCH RECOMMENDATIONS OF EVERY USER
+
+
+class FakeClient(FakeElasticsearch):
+    """Holds `user_recommendations` by user ID and deletes by a `generated_at` range like Elasticsearch."""
+    async def delete_by_query(self, index, query, conflicts, refresh):
+        before = query["range"]["generated_at"]["lt"]
+        stale = [user_id for user_id, doc in self.documents.items() if doc["generated_at"] < before]
+        for user_id in stale:
+            del self.documents[user_id]
+        return {"deleted": len(stale)}
+
+
+class FakeWriter:
+    def __init__(self, client):
+        self.client = client
+
+    async def index(self, doc_id, document):
+        self.client.documents[doc_id] = document
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(doc_id)
+        return future
+
+
+class FakeStore:
+    """Stands in for the Elasticsearch client with in-memory jobs, profiles and applications."""
+    def __init__(self, jobs, users, applications=(), recommendations=None):
+        self.jobs = jobs
+        self.users = users
+        self.applications = applications
+        self.client = FakeClient(dict(recommendations or {}))
+
+    async def scan_jobs(self, source_fields):
+        for job_id, embedding in self.jobs.items():
+            yield job_id, {"job_title": f"Job {job_id}", "company": "Company", "embedding": embedding}
+
+    async def scan_user_embeddings(self):
+        for seq_no, (user_id, embedding) in enumerate(self.users.items()):
+            yield user_id, embedding, seq_no
+
+    async def scan_applied_job_ids(self):
+        for user_id, job_id in self.applications:
+            yield user_id, job_id
+
+    @asynccontextmanager
+    async def bulk_writer(self, index):
+        yield FakeWriter(self.client)
+
+
+JOBS = {"east": [1.0, 0.0], "north_east": [1.0, 1.0], "north": [0.0, 1.0], "west": [-1.0, 0.0]}
+
+
+def ranked_ids(store, user_id):
+    return [job["id"] for job in store.client.documents[user_id]["jobs"]]
+
+
+def test_each_user_gets_their_top_n_best_first():
+    store = FakeStore(JOBS, {"user_east": [2.0, 0.0], "user_north": [0.0, 1.0]})
+
+    stats = asyncio.run(build_user_recommendations(store, top_n=2))
+
+    assert ranked_ids(store, "user_east") == ["east", "north_east"]
+    assert ranked_ids(store, "user_north") == ["north", "north_east"]
+    best = store.client.documents["user_east"]["jobs"][0]
+    # Scores are on the Elasticsearch cosine scale and keep the job fields
+    assert best["score"] == 1.0 and best["job_title"] == "Job east"
+    assert stats["users"] == 2 and stats["jobs"] == 4
+    # Each list records the profile version it was computed from
+    assert [store.client.documents[user_id]["profile_seq_no"] for user_id in ("user_east", "user_north")] == [0, 1]
+
+
+def test_applied_jobs_are_left_out():
+    store = FakeStore(JOBS, {"user": [1.0, 0.0], "other": [1.0, 0.0]},
+                      applications=[("user", "east"), ("user", "expired_job")])
+
+    asyncio.run(build_user_recommendations(store, top_n=3))
+
+    assert ranked_ids(store, "user") == ["north_east", "north", "west"]
+    assert ranked_ids(store, "other") == ["east", "north_east", "north"]
+
+
+def test_lists_are_shorter_when_few_jobs_are_left():
+    store = FakeStore(JOBS, {"user": [1.0, 0.0]}, applications=[("user", "east"), ("user", "north")])
+
+    asyncio.run(build_user_recommendations(store, top_n=10))
+
+    assert ranked_ids(store, "user") == ["north_east", "west"]
+
+
+def test_recommendations_of_earlier_runs_are_removed():
+    earlier = {"generated_at": "2026-01-01T00:00:00+00:00", "jobs": []}
+    store = FakeStore(JOBS, {"user": [1.0, 0.0]}, recommendations={"user": earlier, "deleted_user": earlier})
+
+    stats = asyncio.run(build_user_recommendations(store, top_n=1))
+
+    assert list(store.client.documents) == ["user"]
+    assert ranked_ids(store, "user") == ["east"]
+    assert stats["removed"] == 1
@@ -0,0 +1,76 @@
+import asyncio
+import pytest
+from src.clients.single_flight import SingleFlight, single_flight, single_flight_stats
+
+# TESTS FOR SINGLE-FLIGHT REQUEST COALESCING
+
+
+class FakeClient:
+    def __init__(self):
+        self.calls = 0
+
+    @single_flight("test.fetch")
+    async def fetch(self, key, delay=0.01):
+        self.calls += 1
+        await asyncio.sleep(delay)
+        if key == "error":
+            raise RuntimeError("backend failed")
+        return {"key": key}
+
+
+def test_concurrent_identical_calls_share_one_call():
+    client = FakeClient()
+
+    async def run():
+        return await asyncio.gather(*[client.fetch("job_1") for _ in range(10)], client.fetch("job_2"))
+
+    results = asyncio.run(run())
+
+    assert client.calls == 2
+    assert results[0] is results[9]
+    assert results[10] == {"key": "job_2"}
+    assert single_flight_stats()["test.fetch"]["coalesced"] >= 9
+
+
+def test_sequential_calls_are_not_cached():
+    client = FakeClient()
+
+    async def run():
+        await client.fetch("job_1")
+        await client.fetch("job_1")
+
+    asyncio.run(run())
+
+    assert client.calls == 2
+
+
+def test_errors_reach_every_waiting_caller():
+    client = FakeClient()
+
+    async def run():
+        return await asyncio.gather(*[client.fetch("error") for _ in range(3)], return_exceptions=True)
+
+    results = asyncio.run(run())
+
+    assert client.calls == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_cancelled_caller_does_not_cancel_shared_call():
+    group = SingleFlight()
+
+    async def slow():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def run():
+        first = asyncio.ensure_future(group.do("key", slow))
+        second = asyncio.ensure_future(group.do("key", slow))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()) == "done"
+    assert group.stats()["calls"] == 1 and group.stats()["coalesced"] == 1
@@ -0,0 +1,163 @@
+import asyncio
+import os
+import threading
+import numpy as np
+from src.jobs_matcher.vector_index import JobVectorIndex
+from .conftest import FakeElasticsearch
+
+# TESTS FOR THE IN-PROCESS MEMORY-MAPPED KNN INDEX
+
+
+class FakeESClient:
+    """Serves jobs from memory with the same interface the index uses on ElasticsearchClient."""
+    def __init__(self, jobs: dict):
+        self.jobs = jobs
+        self.fetched_embeddings = []
+        self.client = FakeElasticsearch()
+
+    async def scan_jobs(self, source_fields, with_versions=False):
+        for job_id, job in self.jobs.items():
+            yield job_id, {f: job[f] for f in source_fields if f in job}, f"jobs-2026.10/{job.get('version', 1)}"
+
+    async def get_job_embeddings(self, job_ids):
+        self.fetched_embeddings.extend(job_ids)
+        return {job_id: self.jobs[job_id]["embedding"] for job_id in job_ids}
+
+
+def make_job(job_id, embedding):
+    return {
+        "job_title": f"Job {job_id}",
+        "company": "Company",
+        "location": {"country": "Romania", "city": "Bucharest"},
+        "date_uploaded": "2025-01-01T00:00:00Z",
+        "embedding": embedding,
+    }
+
+
+def random_jobs(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return {f"job_{i}": make_job(f"job_{i}", rng.normal(size=1536).tolist()) for i in range(n)}
+
+
+def brute_force(jobs, query, k, exclude=()):
+    q = np.array(query) / np.linalg.norm(query)
+    scores = {
+        job_id: np.dot(q, np.array(job["embedding"]) / np.linalg.norm(job["embedding"]))
+        for job_id, job in jobs.items() if job_id not in exclude
+    }
+    return sorted(scores, key=scores.get, reverse=True)[:k]
+
+
+def test_search_matches_brute_force(tmp_path):
+    jobs = random_jobs(200)
+    index = JobVectorIndex(directory=str(tmp_path))
+    asyncio.run(index.refresh(FakeESClient(jobs)))
+
+    query = jobs["job_7"]["embedding"]
+    results = index.search(query, k=10, exclude_job_ids=["job_7", "missing"])
+
+    assert [job.id for job in results] == brute_force(jobs, query, 10, exclude={"job_7"})
+    assert all(0.0 <= job.score <= 1.0 for job in results)
+    assert results[0].location.city == "Bucharest"
+
+
+def test_refresh_only_fetches_new_embeddings(tmp_path):
+    jobs = random_jobs(50)
+    es = FakeESClient(jobs)
+    index = JobVectorIndex(directory=str(tmp_path))
+    asyncio.run(index.refresh(es))
+
+    del jobs["job_0"]
+    jobs["job_new"] = make_job("job_new", np.ones(1536).tolist())
+    es.fetched_embeddings = []
+    stats = asyncio.run(index.refresh(es))
+
+    assert es.fetched_embeddings == ["job_new"]
+    assert stats == {"kept": 49, "updated": 0, "added": 1, "removed": 1}
+    assert len(index) == 50
+    assert index.search(np.ones(1536), k=1)[0].id == "job_new"
+
+
+def test_reader_picks_up_new_version(tmp_path):
+    jobs = random_jobs(20)
+    writer = JobVectorIndex(directory=str(tmp_path))
+    asyncio.run(writer.refresh(FakeESClient(jobs)))
+
+    reader = JobVectorIndex(directory=str(tmp_path))
+    assert reader.load()
+
+    jobs["job_new"] = make_job("job_new", np.ones(1536).tolist())
+    asyncio.run(writer.refresh(FakeESClient(jobs)))
+
+    assert reader.search(np.ones(1536), k=1)[0].id == "job_new"
+
+
+def test_int8_index_keeps_ranking(tmp_path):
+    jobs = random_jobs(300, seed=1)
+    index = JobVectorIndex(directory=str(tmp_path), dtype="int8")
+    asyncio.run(index.refresh(FakeESClient(jobs)))
+
+    query = jobs["job_3"]["embedding"]
+    expected = brute_force(jobs, query, 10)
+    found = [job.id for job in index.search(query, k=10)]
+
+    assert found[0] == "job_3"
+    assert len(set(found) & set(expected)) >= 8
+
+
+
+def test_refresh_refetches_rewritten_embeddings(tmp_path):
+    jobs = random_jobs(20)
+    es = FakeESClient(jobs)
+    index = JobVectorIndex(directory=str(tmp_path))
+    asyncio.run(index.refresh(es))
+
+    jobs["job_5"] = {**make_job("job_5", np.ones(1536).tolist()), "version": 2}
+    es.fetched_embeddings = []
+    stats = asyncio.run(index.refresh(es))
+
+    assert es.fetched_embeddings == ["job_5"]
+    assert stats == {"kept": 19, "updated": 1, "added": 0, "removed": 0}
+    assert index.search(np.ones(1536), k=1)[0].id == "job_5"
+
+
+def test_previous_version_files_outlive_one_refresh(tmp_path):
+    jobs = random_jobs(5)
+    writer = JobVectorIndex(directory=str(tmp_path))
+    versions = []
+    for i in range(3):
+        jobs[f"job_new_{i}"] = make_job(f"job_new_{i}", np.ones(1536).tolist())
+        asyncio.run(writer.refresh(FakeESClient(jobs)))
+        versions.append(writer._version)
+
+    files = sorted(os.listdir(tmp_path))
+    # A reader that read the previous manifest can still open its files; older versions are gone
+    assert f"vectors-{versions[1]}.f32" in files and f"vectors-{versions[2]}.f32" in files
+    assert f"vectors-{versions[0]}.f32" not in files and f"jobs-{versions[0]}.json" not in files
+
+
+def test_async_search_runs_off_the_event_loop(tmp_path):
+    jobs = random_jobs(20)
+    index = JobVectorIndex(directory=str(tmp_path))
+    query = jobs["job_3"]["embedding"]
+
+    # Without a built version the caller falls back to Elasticsearch
+    assert asyncio.run(index.search_async(query, k=5)) is None
+
+    asyncio.run(index.refresh(FakeESClient(jobs)))
+
+    async def search_with_loop_thread():
+        loop_thread = threading.get_ident()
+        threads = []
+        original = index.search
+
+        def search(*args, **kwargs):
+            threads.append(threading.get_ident())
+            return original(*args, **kwargs)
+        index.search = search
+        return await index.search_async(query, k=5, exclude_job_ids=["job_3"]), loop_thread, threads
+
+    results, loop_thread, threads = asyncio.run(search_with_loop_thread())
+
+    assert [job.id for job in results] == brute_force(jobs, query, 5, exclude={"job_3"})
+    assert threads and threads[0] != loop_thread
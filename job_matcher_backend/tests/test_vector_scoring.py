@@ -0,0 +1,59 @@
+import numpy as np
+from src.scoring.vector_scoring import normalize, stack_normalized, cosine_scores, top_k, top_k_rows, rank_by_cosine
+
+# TESTS FOR BATCH COSINE SCORING
+
+
+def per_vector_cosine(query, vec):
+    return np.dot(query, vec) / (np.linalg.norm(query) * np.linalg.norm(vec))
+
+
+def test_batch_scores_match_per_vector_scores():
+    rng = np.random.default_rng(0)
+    query = rng.normal(size=64)
+    vectors = rng.normal(size=(50, 64))
+
+    scores = cosine_scores(stack_normalized(vectors), query)
+    expected = [per_vector_cosine(query, vec) for vec in vectors]
+
+    assert scores.dtype == np.float32
+    assert np.allclose(scores, expected, atol=1e-5)
+
+
+def test_stack_normalized_does_not_modify_input():
+    vectors = np.full((3, 4), 2.0, dtype=np.float32)
+    matrix = stack_normalized(vectors)
+
+    assert matrix.flags["C_CONTIGUOUS"]
+    assert np.allclose(np.linalg.norm(matrix, axis=1), 1.0)
+    assert np.all(vectors == 2.0)
+
+
+def test_top_k_returns_best_first():
+    scores = np.array([0.1, 0.9, -np.inf, 0.5, 0.7], dtype=np.float32)
+
+    assert top_k(scores, 3).tolist() == [1, 4, 3]
+    assert top_k(scores, 10).tolist() == [1, 4, 3, 0, 2]
+    assert top_k(scores, 0).tolist() == []
+
+
+def test_top_k_rows_matches_top_k_per_row():
+    rng = np.random.default_rng(1)
+    scores = rng.normal(size=(8, 30)).astype(np.float32)
+
+    rows = top_k_rows(scores, 5)
+
+    assert rows.shape == (8, 5)
+    assert all(rows[i].tolist() == top_k(scores[i], 5).tolist() for i in range(8))
+
+
+def test_rank_by_cosine():
+    query = [1.0, 0.0]
+    vectors = [[0.0, 1.0], [1.0, 0.1], [-1.0, 0.0], [1.0, 1.0]]
+
+    indices, scores = rank_by_cosine(query, vectors, 2)
+
+    assert indices.tolist() == [1, 3]
+    assert np.isclose(scores[0], per_vector_cosine(np.array(query), np.array(vectors[1])))
+    assert rank_by_cosine(query, [], 2)[0].tolist() == []
+    assert np.isclose(np.linalg.norm(normalize(vectors[3])), 1.0)
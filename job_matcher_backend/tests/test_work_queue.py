@@ -0,0 +1,144 @@
+import asyncio
+import time
+from src.clients.es_client import ElasticsearchClient
+from src.jobs_processor import jobs_processor_parallel
+from src.jobs_processor.work_queue import WorkQueue, DONE, FAILED, IN_PROGRESS
+from .conftest import FakeElasticsearch
+
+# TESTS FOR THE INGESTION WORK QUEUE
+
+
+def make_queue(tmp_path, **options):
+    return WorkQueue(path=str(tmp_path / "queue.sqlite3"), **options)
+
+
+def test_checkpoint_only_advances_past_contiguous_resolved_jobs(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.enqueue("ejobs", [(job_id, job_id, None) for job_id in range(1, 7)])
+
+    claimed = [item["job_id"] for item in queue.claim("ejobs", 4)]
+    queue.mark("ejobs", [1, 2, 4], DONE)
+    queue.mark("ejobs", [3], FAILED)
+
+    assert claimed == [1, 2, 3, 4]
+    assert queue.checkpoint("ejobs")["job_id"] == 2
+    # The failed job is retried first, the queued ones follow
+    assert [item["job_id"] for item in queue.claim("ejobs")] == [3, 5, 6]
+    queue.mark("ejobs", [3, 5, 6], DONE)
+    assert queue.checkpoint("ejobs")["job_id"] == 6
+
+
+def test_jobs_out_of_attempts_no_longer_hold_the_checkpoint(tmp_path):
+    queue = make_queue(tmp_path, max_attempts=2)
+    queue.enqueue("ejobs", [(1, 1, None), (2, 2, None)])
+
+    for _ in range(2):
+        queue.claim("ejobs")
+        queue.mark("ejobs", [1], FAILED)
+        queue.mark("ejobs", [2], DONE)
+
+    assert queue.claim("ejobs") == []
+    assert queue.checkpoint("ejobs")["job_id"] == 2
+
+
+def test_expired_leases_are_claimed_again_after_a_crash(tmp_path):
+    crashed = make_queue(tmp_path, lease_timeout=0.05)
+    crashed.enqueue("ejobs", [(1, 1, None)])
+    crashed.claim("ejobs")
+
+    resumed = make_queue(tmp_path, lease_timeout=0.05)
+    assert resumed.claim("ejobs") == []
+    assert resumed.counts("ejobs") == {IN_PROGRESS: 1}
+    time.sleep(0.06)
+    assert [item["job_id"] for item in resumed.claim("ejobs")] == [1]
+
+
+def test_enqueue_keeps_existing_state_and_prune_drops_the_checkpointed_prefix(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.enqueue("dept", [(10, 100.0, "2025-01-01T00:00:00Z"), (11, 200.0, "2025-01-02T00:00:00Z")])
+    queue.claim("dept", 1)
+    queue.mark("dept", [10], DONE)
+
+    assert queue.enqueue("dept", [(10, 100.0, "2025-01-01T00:00:00Z"), (12, 300.0, None)]) == 1
+    checkpoint = queue.checkpoint("dept")
+    assert checkpoint == {"job_id": 10, "position": 100.0, "payload": "2025-01-01T00:00:00Z"}
+
+    queue.prune("dept", checkpoint["position"])
+    assert queue.counts("dept") == {"pending": 2}
+
+
+def indexed_es_client(site_ids):
+    """Elasticsearch client over a jobs index that holds the postings `site_ids`."""
+    documents = {f"job_{site_id}": {"site_id": str(site_id)} for site_id in site_ids}
+    return ElasticsearchClient(client=FakeElasticsearch(documents))
+
+
+def checked_site_ids(es_client):
+    requests = es_client.client.requests
+    return sorted(int(site_id) for request in requests for site_id in request["query"]["terms"]["site_id"])
+
+
+def test_only_claimed_jobs_are_checked_against_the_index(tmp_path, monkeypatch):
+    queue = make_queue(tmp_path)
+    queue.enqueue("ejobs", [(job_id, job_id, None) for job_id in range(1, 101)])
+    index = indexed_es_client({1, 2, 3, 5})
+    monkeypatch.setattr(jobs_processor_parallel, "work_queue", queue)
+    monkeypatch.setattr(jobs_processor_parallel, "es_client", index)
+
+    claimed, known = asyncio.run(jobs_processor_parallel.claim_unindexed_jobs("ejobs", limit=3))
+
+    assert [item["job_id"] for item in claimed] == [4, 6, 7]
+    assert known == 4
+    assert checked_site_ids(index) == [1, 2, 3, 4, 5, 6, 7]
+    # Indexed postings are done, so the next run neither claims nor checks them again
+    assert queue.counts("ejobs") == {"done": 4, "in_progress": 3, "pending": 93}
+
+
+def test_run_without_new_jobs_does_not_open_the_bulk_writer(tmp_path, monkeypatch):
+    queue = make_queue(tmp_path)
+    queue.enqueue("ejobs", [(job_id, job_id, None) for job_id in range(1, 4)])
+    index = indexed_es_client({1, 2, 3})
+
+    def bulk_writer(*args, **kwargs):
+        raise AssertionError("No bulk writer for a run that indexes nothing")
+    index.bulk_writer = bulk_writer
+    monkeypatch.setattr(jobs_processor_parallel, "work_queue", queue)
+    monkeypatch.setattr(jobs_processor_parallel, "es_client", index)
+
+    asyncio.run(jobs_processor_parallel.run_queued_jobs("ejobs", "all", limit=10))
+
+    assert queue.counts("ejobs") == {"done": 3}
+
+
+class FakeMetadataStore:
+    def __init__(self, metadata):
+        self.metadata = {"last_ejobs": metadata}
+
+    async def get_metadata(self, key):
+        return self.metadata.get(key, {})
+
+    async def update_metadata(self, key, value):
+        self.metadata[key] = value
+
+
+def test_checkpoint_short_of_the_latest_job_keeps_the_stored_creation_date(tmp_path, monkeypatch):
+    queue = make_queue(tmp_path)
+    store = FakeMetadataStore({"id": 10, "creation_date": "2026-10-01T00:00:00"})
+
+    async def get_latest_job_id():
+        return 20, "2026-10-18T00:00:00"
+
+    async def run_queued_jobs(queue_name, mode, force_merge, limit):
+        claimed = [item["job_id"] for item in queue.claim(queue_name, 5)]
+        queue.mark(queue_name, claimed, DONE)
+    monkeypatch.setattr(jobs_processor_parallel, "work_queue", queue)
+    monkeypatch.setattr(jobs_processor_parallel, "es_client", store)
+    monkeypatch.setattr(jobs_processor_parallel, "get_latest_job_id", get_latest_job_id)
+    monkeypatch.setattr(jobs_processor_parallel, "run_queued_jobs", run_queued_jobs)
+
+    asyncio.run(jobs_processor_parallel.process_and_index_new_jobs())
+    assert store.metadata["last_ejobs"] == {"id": 15, "creation_date": "2026-10-01T00:00:00"}
+
+    # The next run reaches the latest posting, whose date is known
+    asyncio.run(jobs_processor_parallel.process_and_index_new_jobs())
+    assert store.metadata["last_ejobs"] == {"id": 20, "creation_date": "2026-10-18T00:00:00"}
@@ -8,19 +8,27 @@ import { API_URL } from '../config/config';
 const AppliedJobsPage = () => {
   const { user } = useAuth();
   const [appliedJobs, setAppliedJobs] = useState<AppliedJob[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [isLoading, setIsLoading] = useState(true);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
+
+  const fetchAppliedJobsPage = async (cursor: string | null) => {
+    if (!user) return;
+    const token = await user.getIdToken();
+    const response = await axios.get(`${API_URL}/applied_jobs`, {
+      headers: { Authorization: `Bearer ${token}` },
+      params: cursor ? { cursor } : {}
+    });
+    setAppliedJobs((prevJobs) => cursor ? [...prevJobs, ...response.data.applications] : response.data.applications);
+    setNextCursor(response.data.next_cursor ?? null);
+  };
 
   useEffect(() => {
     const fetchAppliedJobs = async () => {
       if (!user) return;
       
       try {
-        const token = await user.getIdToken();
-        const response = await axios.get(`${API_URL}/applied_jobs`, {
-          headers: { Authorization: `Bearer ${token}` }
-        });
-        
-        setAppliedJobs(response.data.applications);
+        await fetchAppliedJobsPage(null);
       } catch (error) {
         console.error('Error fetching applied jobs:', error);
       } finally {
@@ -31,6 +39,17 @@ const AppliedJobsPage = () => {
     fetchAppliedJobs();
   }, [user]);
 
+  const handleLoadMore = async () => {
+    setIsLoadingMore(true);
+    try {
+      await fetchAppliedJobsPage(nextCursor);
+    } catch (error) {
+      console.error('Error fetching more applied jobs:', error);
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
   // Remove a job from the list after deletion
   const handleDelete = (jobId: string) => {
     setAppliedJobs((prevJobs) => prevJobs.filter((job) => job.id !== jobId));
@@ -44,7 +63,14 @@ const AppliedJobsPage = () => {
         <div>Loading applied jobs...</div>
       ) : (
         appliedJobs.length > 0 ? (
-          <JobList jobs={appliedJobs} onDelete={handleDelete}/>
+          <>
+            <JobList jobs={appliedJobs} onDelete={handleDelete}/>
+            {nextCursor && (
+              <button onClick={handleLoadMore} disabled={isLoadingMore}>
+                {isLoadingMore ? 'Loading...' : 'Load more'}
+              </button>
+            )}
+          </>
         ) : (
           <div>No applied jobs found</div>
         )